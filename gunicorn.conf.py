@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration.
+
+    $ gunicorn quiez.quiez.wsgi -c gunicorn.conf.py
+
+* GUNICORN_PRELOAD - import application in master process before forking workers, so workers boot
+without importing Django project and share its memory. Database connections must not be shared
+by forked processes, so master closes them before fork and workers drop inherited ones.
+"""
+import sys
+
+from decouple import config
+
+preload_app = config('GUNICORN_PRELOAD', default=False, cast=bool)
+
+
+def _close_database_connections():
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.close()
+    module_pool = sys.modules.get('quiez.quiez.db.postgresql_pool.base')
+    if module_pool is not None:
+        module_pool.close_pools()
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        _close_database_connections()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # connections are opened lazily, so worker opens own ones on first query
+        _close_database_connections()
@@ -0,0 +1,71 @@
+"""
+Response content compression (gzip, brotli when installed).
+"""
+import gzip
+from io import BytesIO
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def gzip_compress(bytes_content: bytes, int_level: int) -> bytes:
+    """
+    Compresses content with gzip.
+
+    :param bytes_content: content to compress.
+    :param int_level: compression level (1 - 9).
+    :return: compressed content.
+    """
+    buffer = BytesIO()
+    with gzip.GzipFile(mode='wb', compresslevel=int_level, fileobj=buffer, mtime=0) as file:
+        file.write(bytes_content)
+    return buffer.getvalue()
+
+
+def gzip_compress_sequence(sequence, int_level: int):
+    """
+    Compresses streaming content with gzip, compressed chunks are yielded as soon as compressor outputs them.
+
+    :param sequence: iterable of content chunks.
+    :param int_level: compression level (1 - 9).
+    :return: generator of compressed chunks.
+    """
+    buffer = BytesIO()
+    with gzip.GzipFile(mode='wb', compresslevel=int_level, fileobj=buffer, mtime=0) as file:
+        for item in sequence:
+            file.write(item)
+            bytes_compressed = buffer.getvalue()
+            if bytes_compressed:
+                buffer.seek(0)
+                buffer.truncate()
+                yield bytes_compressed
+    yield buffer.getvalue()
+
+
+def brotli_compress(bytes_content: bytes, int_quality: int) -> bytes:
+    """
+    Compresses content with brotli.
+
+    :param bytes_content: content to compress.
+    :param int_quality: compression quality (0 - 11).
+    :return: compressed content.
+    """
+    return brotli.compress(bytes_content, quality=int_quality)
+
+
+def brotli_compress_sequence(sequence, int_quality: int):
+    """
+    Compresses streaming content with brotli, compressed chunks are yielded as soon as compressor outputs them.
+
+    :param sequence: iterable of content chunks.
+    :param int_quality: compression quality (0 - 11).
+    :return: generator of compressed chunks.
+    """
+    compressor = brotli.Compressor(quality=int_quality)
+    for item in sequence:
+        bytes_compressed = compressor.process(item)
+        if bytes_compressed:
+            yield bytes_compressed
+    yield compressor.finish()
@@ -0,0 +1,148 @@
+"""
+PostgreSQL database backend with process-local connection pool.
+
+* Enabled by DB_POOL=builtin (see settings).
+* Connections are taken from the pool on connect and returned to it on close,
+so every request reuses an already established connection.
+* Connections are checked on checkout (closed or broken ones are replaced),
+connections inherited from parent process are discarded instead of being returned to pool of child.
+* When all MAX_SIZE connections are in use, checkout waits for returned one up to TIMEOUT seconds.
+"""
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions as psycopg2_extensions, pool as psycopg2_pool
+
+from django.db.backends.postgresql import base
+
+# pools are created lazily and keyed by process, so forked workers never share sockets
+_pools = {}
+_pools_lock = threading.Lock()
+
+FLOAT_CHECKOUT_INTERVAL = 0.05  # seconds between checkout attempts of exhausted pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Pooled PostgreSQL connection wrapper.
+        - Pool size and checkout timeout are configured by 'POOL' key of database settings
+        ('MIN_SIZE', 'MAX_SIZE', 'TIMEOUT').
+    """
+    def get_pool(self, conn_params: dict = None):
+        """
+        Returns connection pool of current process, creates it if needed.
+
+        :param conn_params: connection parameters used for pool creation.
+        :return: psycopg2 connection pool.
+        """
+        key = (self.alias, os.getpid())
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                dict_pool_settings = self.settings_dict.get('POOL', {})
+                pool = psycopg2_pool.ThreadedConnectionPool(dict_pool_settings.get('MIN_SIZE', 1),
+                                                            dict_pool_settings.get('MAX_SIZE', 10),
+                                                            **(conn_params or self.get_connection_params()))
+                _pools[key] = pool
+        return pool
+
+    def _getconn(self, pool):
+        """
+        Takes connection from pool, waits for returned one if all connections are in use.
+
+        :param pool: psycopg2 connection pool.
+        :return: psycopg2 connection.
+        :raise psycopg2.pool.PoolError: if no connection is returned in TIMEOUT seconds.
+        """
+        float_deadline = time.monotonic() + self.settings_dict.get('POOL', {}).get('TIMEOUT', 5)
+        while True:
+            try:
+                return pool.getconn()
+            except psycopg2_pool.PoolError:
+                if pool.closed or time.monotonic() >= float_deadline:
+                    raise
+            time.sleep(FLOAT_CHECKOUT_INTERVAL)
+
+    def _checkout(self, pool):
+        """
+        Takes healthy connection from pool.
+            - Closed connections and connections with lost server (unknown transaction status) are discarded,
+            connections left in transaction are rolled back.
+
+        :param pool: psycopg2 connection pool.
+        :return: psycopg2 connection.
+        """
+        while True:
+            connection = self._getconn(pool)
+            if not connection.closed:
+                int_status = connection.get_transaction_status()
+                if int_status == psycopg2_extensions.TRANSACTION_STATUS_IDLE:
+                    return connection
+                if int_status != psycopg2_extensions.TRANSACTION_STATUS_UNKNOWN:
+                    try:
+                        connection.rollback()
+                        return connection
+                    except psycopg2.Error:
+                        pass
+            pool.putconn(connection, close=True)
+
+    def get_new_connection(self, conn_params):
+        connection = self._checkout(self.get_pool(conn_params))
+        # connection belongs to pool of process that opened it
+        self.pool_pid = os.getpid()
+        # connection may come back from previous user in autocommit mode
+        if connection.autocommit:
+            connection.autocommit = False
+
+        # same isolation level handling as in parent backend
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                if getattr(self, 'pool_pid', None) != os.getpid():
+                    # opened before fork, pool of this process never issued it
+                    return _discard_inherited(self.connection)
+                # broken connections are discarded, healthy ones are returned to the pool
+                return self.get_pool().putconn(self.connection, close=bool(self.connection.closed))
+
+
+def _discard_inherited(connection) -> None:
+    """
+    Closes connection inherited from parent process without ending its server session.
+        - Socket of the connection is replaced with /dev/null in this process, so terminate message
+        of libpq goes nowhere and parent process keeps using the connection.
+
+    :param connection: psycopg2 connection opened by parent process.
+    :return: None
+    """
+    if not connection.closed:
+        int_devnull = os.open(os.devnull, os.O_RDWR)
+        try:
+            os.dup2(int_devnull, connection.fileno())
+        finally:
+            os.close(int_devnull)
+    connection.close()
+
+
+def close_pools() -> None:
+    """
+    Closes connection pools of current process (e.g. in gunicorn master before forking workers).
+
+    :return: None
+    """
+    int_pid = os.getpid()
+    with _pools_lock:
+        for key in [key for key in _pools if key[1] == int_pid]:
+            _pools.pop(key).closeall()
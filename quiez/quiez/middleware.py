@@ -0,0 +1,183 @@
+"""
+Project level middleware.
+"""
+import random
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import compression, profiling, routers
+
+
+class DatabaseHealthCheckMiddleware:
+    """
+    Persistent database connections health check middleware.
+        - Connections idle for more than DB_CONN_HEALTH_CHECK_IDLE seconds are pinged
+        before request processing and closed if they are broken (restarted server, dropped socket),
+        so the request opens a new one instead of failing.
+
+    * Disabled by DB_CONN_HEALTH_CHECKS=False.
+    """
+    def __init__(self, get_response):
+        if not settings.DB_CONN_HEALTH_CHECKS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.idle_timeout = settings.DB_CONN_HEALTH_CHECK_IDLE
+
+    def __call__(self, request):
+        float_now = time.monotonic()
+        for connection in connections.all():
+            if connection.connection is None or connection.in_atomic_block:
+                continue
+            float_last_used = getattr(connection, 'health_check_last_used', None)
+            if float_last_used is not None and float_now - float_last_used <= self.idle_timeout:
+                continue
+            if not connection.is_usable():
+                connection.close()
+
+        response = self.get_response(request)
+
+        float_now = time.monotonic()
+        for connection in connections.all():
+            if connection.connection is not None:
+                connection.health_check_last_used = float_now
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Read replica routing middleware.
+        - Safe requests (GET, HEAD, OPTIONS) read from one of replicas.
+        - Unsafe requests use primary and pin client reads to primary for DATABASE_REPLICA_PIN_SECONDS,
+        so e.g. results read right after test submission include the submission.
+
+    * Used only if DATABASE_REPLICAS are configured.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        bool_safe = request.method in self.SAFE_METHODS
+        if bool_safe and not routers.is_pinned_to_primary(request):
+            routers.use_replica(routers.choose_replica())
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.use_replica(None)
+        if not bool_safe and response.status_code < 400:
+            routers.pin_to_primary(request)
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Response compression middleware.
+        - Uses brotli if it is installed and accepted by client, gzip otherwise.
+        - Responses smaller than COMPRESSION_MIN_SIZE bytes are not compressed,
+        streaming responses (exports) are compressed chunk by chunk.
+
+    * Disabled by COMPRESSION_ENABLED=False.
+    """
+    re_accepts_gzip = re.compile(r'\bgzip\b')
+    re_accepts_brotli = re.compile(r'\bbr\b')
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        str_accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if compression.brotli is not None and self.re_accepts_brotli.search(str_accept_encoding):
+            str_encoding, int_level = 'br', self.brotli_quality
+            compress, compress_sequence = compression.brotli_compress, compression.brotli_compress_sequence
+        elif self.re_accepts_gzip.search(str_accept_encoding):
+            str_encoding, int_level = 'gzip', self.gzip_level
+            compress, compress_sequence = compression.gzip_compress, compression.gzip_compress_sequence
+        else:
+            return response
+
+        if response.streaming:
+            # compressed size is unknown until the stream ends
+            response.streaming_content = compress_sequence(response.streaming_content, int_level)
+            del response['Content-Length']
+        else:
+            bytes_compressed = compress(response.content, int_level)
+            if len(bytes_compressed) >= len(response.content):
+                return response
+            response.content = bytes_compressed
+            response['Content-Length'] = str(len(bytes_compressed))
+
+        # compressed representation is only weakly equal to the original one (RFC 7232 section 2.1)
+        str_etag = response.get('ETag')
+        if str_etag and str_etag.startswith('"'):
+            response['ETag'] = 'W/' + str_etag
+        response['Content-Encoding'] = str_encoding
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Request profiling middleware.
+        - Staff requests with X-Profile header or profile query parameter are profiled,
+        other requests are sampled with PROFILING_SAMPLE_RATE probability.
+        - Profile id is returned in X-Profile-Id header, profile is saved to PROFILING_DIR (see profiling module).
+
+    * Disabled by PROFILING_ENABLED=False.
+    * Placed last, so only view dispatch and rendering are profiled.
+    """
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+
+    @staticmethod
+    def _is_staff(request) -> bool:
+        if request.user.is_authenticated:
+            return request.user.is_staff
+        # API clients authenticate with token in view, so token is checked here
+        try:
+            tuple_auth = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return tuple_auth is not None and tuple_auth[0].is_staff
+
+    def _is_profiled(self, request) -> bool:
+        if 'HTTP_X_PROFILE' in request.META or 'profile' in request.GET:
+            return self._is_staff(request)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self._is_profiled(request):
+            return self.get_response(request)
+
+        profile = profiling.RequestProfile()
+        response, float_duration = profile.run(self.get_response, request)
+        if request.resolver_match is not None:
+            str_endpoint = '{} {}'.format(request.method, request.resolver_match.view_name)
+            response['X-Profile-Id'] = profiling.save_profile(profile, str_endpoint, float_duration)
+        return response
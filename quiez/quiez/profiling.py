@@ -0,0 +1,219 @@
+"""
+Request profiling (see ProfilingMiddleware).
+
+* Profiled request runs under cProfile, SQL statements and named code sections (serializer hot paths
+decorated with section) are timed separately, so request time splits into SQL, sections and the rest.
+* Every profile is saved to PROFILING_DIR/<endpoint>/ as JSON with top PROFILING_TOP hotspots (by own time)
+and folded stacks ('frame;frame;frame' - microseconds) for flame graphs, aggregated by profile_report command.
+* Folded stacks are reconstructed from cProfile caller / callee times, so deep stacks are approximations.
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+_local = threading.local()
+
+FLOAT_STACK_THRESHOLD = 0.001   # stacks with less than this part of request time are dropped
+INT_STACK_DEPTH_MAX = 64
+
+re_address = re.compile(r' at 0x[0-9a-f]+')
+
+
+class RequestProfile:
+    """
+    Profile of single request.
+    """
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.dict_sections = {}
+        self.float_sql = 0.0
+        self.int_queries = 0
+
+    def _execute(self, execute, sql, params, many, context):
+        float_start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.float_sql += time.perf_counter() - float_start
+            self.int_queries += 1
+
+    def run(self, func, *args):
+        """
+        Calls function under profiler.
+
+        :param func: profiled function.
+        :param args: function arguments.
+        :return: function result and duration in seconds.
+        """
+        _local.profile = self
+        float_start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self._execute))
+                result = self.profiler.runcall(func, *args)
+        finally:
+            _local.profile = None
+        return result, time.perf_counter() - float_start
+
+
+def section(str_label: str):
+    """
+    Decorator timing function as named section of profiled request (no-op for not profiled requests).
+
+    :param str_label: section name.
+    :return: decorator.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = getattr(_local, 'profile', None)
+            if profile is None:
+                return func(*args, **kwargs)
+            float_start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.dict_sections[str_label] = profile.dict_sections.get(str_label, 0.0) + \
+                    time.perf_counter() - float_start
+        return wrapper
+    return decorator
+
+
+def _get_path_prefixes() -> list:
+    # longest first, so frame file names are shortened to module paths
+    return sorted({os.path.join(os.path.abspath(str_path), '') for str_path in sys.path if str_path},
+                  key=len, reverse=True)
+
+
+def frame_label(func: tuple, list_prefixes: list) -> str:
+    """
+    Formats cProfile function key as frame name.
+
+    :param func: tuple (file name, line number, function name).
+    :param list_prefixes: path prefixes removed from file names.
+    :return: frame name ('module/path.py:function' or built-in name).
+    """
+    str_filename, _, str_function = func
+    if str_filename == '~':
+        # built-in and C functions, object address would split the same function between processes
+        return re_address.sub('', str_function)
+    for str_prefix in list_prefixes:
+        if str_filename.startswith(str_prefix):
+            str_filename = str_filename[len(str_prefix):]
+            break
+    return '{}:{}'.format(str_filename, str_function)
+
+
+def _fold_stacks(stats: pstats.Stats, list_prefixes: list) -> dict:
+    """
+    Reconstructs folded stacks from caller / callee times.
+        - Time of function called from several callers is split between them in proportion of their calls time.
+
+    :param stats: profile statistics.
+    :param list_prefixes: path prefixes removed from file names.
+    :return: dictionary folded stack - own time in seconds.
+    """
+    dict_callees = {}
+    for func, (_, _, _, _, dict_callers) in stats.stats.items():
+        for caller, tuple_edge in dict_callers.items():
+            dict_callees.setdefault(caller, []).append((func, tuple_edge[3]))
+    list_roots = [func for func, tuple_stat in stats.stats.items() if not tuple_stat[4]]
+    float_threshold = sum(stats.stats[func][3] for func in list_roots) * FLOAT_STACK_THRESHOLD
+    dict_folded = {}
+
+    def walk(func, list_path: list, set_path: set, float_scale: float):
+        _, _, float_own, float_total, _ = stats.stats[func]
+        if float_total * float_scale < float_threshold:
+            return
+        list_path.append(frame_label(func, list_prefixes))
+        set_path.add(func)
+        if float_own > 0:
+            str_stack = ';'.join(list_path)
+            dict_folded[str_stack] = dict_folded.get(str_stack, 0.0) + float_own * float_scale
+        if len(list_path) < INT_STACK_DEPTH_MAX:
+            for callee, float_edge_total in dict_callees.get(func, []):
+                float_callee_total = stats.stats[callee][3]
+                if callee not in set_path and float_callee_total > 0:
+                    walk(callee, list_path, set_path, float_scale * float_edge_total / float_callee_total)
+        list_path.pop()
+        set_path.discard(func)
+
+    for func in list_roots:
+        walk(func, [], set(), 1.0)
+    return dict_folded
+
+
+def endpoint_slug(str_endpoint: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str_endpoint).strip('_')
+
+
+def save_profile(profile: RequestProfile, str_endpoint: str, float_duration: float) -> str:
+    """
+    Saves request profile to PROFILING_DIR.
+
+    :param profile: finished request profile.
+    :param str_endpoint: endpoint name (method and view).
+    :param float_duration: request duration in seconds.
+    :return: profile id (file name without extension).
+    """
+    stats = pstats.Stats(profile.profiler)
+    list_prefixes = _get_path_prefixes()
+    list_hotspots = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:settings.PROFILING_TOP]
+    dict_profile = {
+        'endpoint': str_endpoint,
+        'date': time.time(),
+        'duration': float_duration,
+        'sql': {'duration': profile.float_sql, 'queries': profile.int_queries},
+        'sections': profile.dict_sections,
+        'hotspots': [{
+            'function': frame_label(func, list_prefixes),
+            'line': func[1],
+            'calls': int_calls,
+            'own': float_own,
+            'total': float_total,
+        } for func, (_, int_calls, float_own, float_total, _) in list_hotspots],
+        'stacks': {str_stack: int(float_time * 1000000)
+                   for str_stack, float_time in _fold_stacks(stats, list_prefixes).items()},
+    }
+    str_dir = os.path.join(settings.PROFILING_DIR, endpoint_slug(str_endpoint))
+    os.makedirs(str_dir, exist_ok=True)
+    str_profile_id = '{:.0f}-{}'.format(time.time() * 1000, uuid.uuid4().hex[:8])
+    with open(os.path.join(str_dir, str_profile_id + '.json'), 'w') as file_profile:
+        json.dump(dict_profile, file_profile)
+    return str_profile_id
+
+
+def load_profiles(str_endpoint: str = None) -> dict:
+    """
+    Reads saved profiles grouped by endpoint.
+
+    :param str_endpoint: part of endpoint name profiles are filtered by, case insensitive (None - all).
+    :return: dictionary endpoint - list of profile dictionaries.
+    """
+    dict_profiles = {}
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return dict_profiles
+    for str_dir in sorted(os.listdir(settings.PROFILING_DIR)):
+        str_dir_path = os.path.join(settings.PROFILING_DIR, str_dir)
+        if not os.path.isdir(str_dir_path):
+            continue
+        for str_file in sorted(os.listdir(str_dir_path)):
+            if not str_file.endswith('.json'):
+                continue
+            with open(os.path.join(str_dir_path, str_file)) as file_profile:
+                dict_profile = json.load(file_profile)
+            if str_endpoint is None or str_endpoint.lower() in dict_profile['endpoint'].lower():
+                dict_profiles.setdefault(dict_profile['endpoint'], []).append(dict_profile)
+    return dict_profiles
@@ -0,0 +1,90 @@
+"""
+Primary / read replica database router.
+
+* Replicas are configured by DATABASE_REPLICA_URLS (see settings).
+* Replica for current request is chosen by ReplicaRoutingMiddleware,
+reads outside of request (management commands, shell) always go to primary.
+* Once request writes (or locks rows), its remaining reads go to primary too, so it reads its own writes.
+* Client pins to primary are stored in the default cache, which is shared by processes (CACHE_BACKEND=db).
+"""
+import hashlib
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def use_replica(str_alias) -> None:
+    """
+    Routes reads of current thread to given replica.
+
+    :param str_alias: replica database alias, None to read from primary.
+    :return: None
+    """
+    _state.replica = str_alias
+
+
+def choose_replica() -> str:
+    """
+    Chooses replica for the current request.
+
+    :return: replica database alias.
+    """
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def _get_pin_key(request):
+    str_credentials = request.META.get('HTTP_AUTHORIZATION') or \
+                      request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not str_credentials:
+        return None
+    return 'replica-pin:' + hashlib.sha1(str_credentials.encode()).hexdigest()
+
+
+def pin_to_primary(request) -> None:
+    """
+    Pins reads of request client to primary for DATABASE_REPLICA_PIN_SECONDS,
+    so the client reads its own writes while replicas catch up.
+
+    :param request: request which made write.
+    :return: None
+    """
+    str_key = _get_pin_key(request)
+    if str_key:
+        cache.set(str_key, True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(request) -> bool:
+    """
+    Checks if request client has recently written to primary.
+
+    :param request: request to check.
+    :return: True if client reads should go to primary.
+    """
+    str_key = _get_pin_key(request)
+    return str_key is not None and cache.get(str_key, False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending writes to primary and reads to replica chosen for current request.
+        - Request is pinned to primary from its first write.
+    """
+    def db_for_read(self, model, **hints):
+        return getattr(_state, 'replica', None) or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # write is not on replica yet, reads of the rest of request follow it to primary
+        _state.replica = None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
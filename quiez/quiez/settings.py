@@ -15,7 +15,8 @@ import sys
 
 import django_heroku
 
-from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+from decouple import config, Csv
 import dj_database_url
 
 
@@ -28,8 +29,15 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = config('SECRET_KEY')
 
+# Settings profile: 'production', 'dev' or 'bench' (production without external services, for load testing)
+# it defines defaults of DEBUG, cache, logging and template settings below, each can still be set separately
+SETTINGS_PROFILE = config('SETTINGS_PROFILE', default='dev')
+if SETTINGS_PROFILE not in ('production', 'dev', 'bench'):
+    raise ImproperlyConfigured('SETTINGS_PROFILE must be one of production, dev, bench.')
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DEBUG also keeps every executed SQL statement of request in memory (connection.queries)
+DEBUG = config('DEBUG', default=SETTINGS_PROFILE == 'dev', cast=bool)
 
 ALLOWED_HOSTS = []
 
@@ -49,15 +57,27 @@ INSTALLED_APPS = [
     'corsheaders'
 ]
 
+# API schema (Swagger UI at /api/), disable in production to skip drf_yasg completely
+API_SCHEMA_ENABLED = config('API_SCHEMA_ENABLED', default=True, cast=bool)
+API_SCHEMA_CACHE_SECONDS = config('API_SCHEMA_CACHE_SECONDS', default=3600, cast=int)   # Cache-Control max-age
+# schema artifacts generated at deploy by generate_schema command (live generation only in DEBUG without them)
+API_SCHEMA_DIR = config('API_SCHEMA_DIR', default=os.path.join(BASE_DIR, 'schema'))
+if not API_SCHEMA_ENABLED:
+    INSTALLED_APPS.remove('drf_yasg')
+
 MIDDLEWARE = [
+    'quiez.quiez.middleware.DatabaseHealthCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'quiez.quiez.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'quiez.quiez.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'quiez.quiez.middleware.ProfilingMiddleware',  # last, profiles view dispatch and rendering only
 ]
 
 ROOT_URLCONF = 'quiez.quiez.urls'
@@ -77,6 +97,37 @@ TEMPLATES = [
         },
     },
 ]
+if not DEBUG:
+    # compiled templates are kept in memory (explicit loaders replace APP_DIRS)
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+# Cache: 'locmem' (process memory), 'db' (shared by processes, run ./manage.py createcachetable) or 'dummy'
+CACHE_BACKEND = config('CACHE_BACKEND', default='db' if SETTINGS_PROFILE == 'production' else 'locmem')
+DICT_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'quiez'),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'quiez_cache'),
+    'dummy': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+if CACHE_BACKEND not in DICT_CACHE_BACKENDS:
+    raise ImproperlyConfigured('CACHE_BACKEND must be one of {}.'.format(', '.join(DICT_CACHE_BACKENDS)))
+CACHES = {
+    'default': {
+        'BACKEND': DICT_CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': DICT_CACHE_BACKENDS[CACHE_BACKEND][1],
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),   # seconds, default for keys set without timeout
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
+    }
+}
+# every organization (tenant) has its own cache of tests, locmem caches are limited to this number of entries each
+TENANT_CACHE_MAX_ENTRIES = config('TENANT_CACHE_MAX_ENTRIES', default=1000, cast=int)
 
 WSGI_APPLICATION = 'quiez.quiez.wsgi.application'
 
@@ -107,6 +158,21 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing: PBKDF2 work factor and process pool offloading hashing from request threads
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=120000, cast=int)
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=2, cast=int)   # 0 - hash in request thread
+PASSWORD_HASHING_TIMEOUT = config('PASSWORD_HASHING_TIMEOUT', default=10, cast=int)   # seconds
+# maximum number of pending hashes per process, registrations over it respond with 503 at once
+PASSWORD_HASHING_QUEUE = config('PASSWORD_HASHING_QUEUE', default=8, cast=int)
+
+PASSWORD_HASHERS = [
+    'quiez.rest_api.passwords.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.0/topics/i18n/
 
@@ -133,13 +199,82 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # orjson based JSON rendering / parsing (falls back to stdlib json if orjson is not installed)
+    'DEFAULT_RENDERER_CLASSES': (
+        'quiez.rest_api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'quiez.rest_api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # token bucket throttling rates of views with throttle_scope
+    # '<scope>' - per user (per IP for anonymous), '<scope>.test' - per test
+    'DEFAULT_THROTTLE_RATES': {
+        'test_result': config('THROTTLE_TEST_RESULT', default='30/min'),
+        'test_result.test': config('THROTTLE_TEST_RESULT_PER_TEST', default='600/min'),
+        'test_submission': config('THROTTLE_TEST_SUBMISSION', default='10/min'),
+        'test_submission.test': config('THROTTLE_TEST_SUBMISSION_PER_TEST', default='3000/min'),
+        'test_submission_batch': config('THROTTLE_TEST_SUBMISSION_BATCH', default='10/min'),
+        'test_draft': config('THROTTLE_TEST_DRAFT', default='120/min'),
+        'test_leaderboard': config('THROTTLE_TEST_LEADERBOARD', default='60/min'),
+        'test_leaderboard.test': config('THROTTLE_TEST_LEADERBOARD_PER_TEST', default='6000/min'),
+        'registration': config('THROTTLE_REGISTRATION', default='3000/min'),
+        'registration.email': config('THROTTLE_REGISTRATION_PER_EMAIL', default='5/min'),
+    },
 }
+# token bucket store: 'local' (process memory) or 'cache' (Django cache, shared by processes)
+THROTTLE_STORE = config('THROTTLE_STORE', default='local')
+
+# Response compression (brotli is used when installed and accepted by client)
+COMPRESSION_ENABLED = config('COMPRESSION_ENABLED', default=True, cast=bool)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)   # bytes
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+
+# Owner feedback analytics read from rollup table (False - from submissions),
+# enable only with scheduled refresh_feedback_rollup command, nothing else fills the table
+FEEDBACK_ANALYTICS_ROLLUP = config('FEEDBACK_ANALYTICS_ROLLUP', default=False, cast=bool)
+# Maximum number of feedback answer submissions rolled up in one transaction by refresh_feedback_rollup command
+FEEDBACK_ROLLUP_BATCH_SIZE = config('FEEDBACK_ROLLUP_BATCH_SIZE', default=1000, cast=int)
+
+# Maximum number of submissions synced by one /api/submissions/batch/ request
+SUBMISSION_BATCH_MAX_SIZE = config('SUBMISSION_BATCH_MAX_SIZE', default=50, cast=int)
+
+# Write-behind submission queue: submissions are validated and queued (202), drain_submission_queue writes them
+SUBMISSION_QUEUE_ENABLED = config('SUBMISSION_QUEUE_ENABLED', default=False, cast=bool)
+SUBMISSION_QUEUE_BATCH_SIZE = config('SUBMISSION_QUEUE_BATCH_SIZE', default=500, cast=int)
+# seconds result views wait for queued submissions of test to be written before responding with 503
+SUBMISSION_QUEUE_RESULT_WAIT = config('SUBMISSION_QUEUE_RESULT_WAIT', default=2.0, cast=float)
+
+# Soft-deleted tests and users are removed by purge_deleted command in batches of this number of rows,
+# with pause between batches in seconds
+PURGE_BATCH_SIZE = config('PURGE_BATCH_SIZE', default=1000, cast=int)
+PURGE_SLEEP_SECONDS = config('PURGE_SLEEP_SECONDS', default=0.1, cast=float)
+
+# Result overview merges free text answers groups with at least this similarity (difflib ratio), 0 - only equal ones
+TEXT_ANSWERS_SIMILARITY = config('TEXT_ANSWERS_SIMILARITY', default=0.0, cast=float)
+
+# Seconds leaderboard (/api/test/<id>/leaderboard/) is cached, polling clients share it
+LEADERBOARD_CACHE_SECONDS = config('LEADERBOARD_CACHE_SECONDS', default=5, cast=int)
+
+# Request profiling: staff requests with X-Profile header or ?profile=1 and sampled part of other requests
+# are profiled, top PROFILING_TOP hotspots and folded stacks are saved to PROFILING_DIR (see profile_report command)
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_DIR = config('PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+PROFILING_TOP = config('PROFILING_TOP', default=30, cast=int)
+
+# PostgreSQL full-text search configuration ('simple' does not stem, suits mixed languages)
+SEARCH_CONFIG = config('SEARCH_CONFIG', default='simple')
 
 LOGIN_URL = 'rest_framework:login'
 LOGOUT_URL = 'rest_framework:logout'
 
 # Django REST Swagger
 SWAGGER_SETTINGS = {
+    'SPEC_URL': 'schema-json',  # Swagger UI loads schema artifact instead of generating it
     'SECURITY_DEFINITIONS': {
         'api_key': {
             'type': 'apiKey',
@@ -149,12 +284,16 @@ SWAGGER_SETTINGS = {
     },
 }
 
+# Logging: level of application and Django loggers, SQL statements are logged only with DEBUG
+LOG_LEVEL = config('LOG_LEVEL', default='WARNING' if SETTINGS_PROFILE == 'bench' else 'INFO')
+LOG_SQL = config('LOG_SQL', default=False, cast=bool)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
         'console': {
-            'level': 'INFO',
+            'level': 'DEBUG',
             'class': 'logging.StreamHandler',
             'stream': sys.stdout
         }
@@ -162,18 +301,64 @@ LOGGING = {
     'loggers': {
         'django': {
             'handlers': ['console'],
-            'propagate': True,
-            'level': 'INFO',
+            'propagate': False,
+            'level': LOG_LEVEL,
+        },
+        'django.db.backends': {
+            'handlers': ['console'],
+            'propagate': False,
+            'level': 'DEBUG' if LOG_SQL else LOG_LEVEL,
         },
         '': {
             'handlers': ['console'],
-            'level': 'INFO',
+            'level': LOG_LEVEL,
         }
     }
 }
 
-# Configure Django App for Heroku.
-django_heroku.settings(locals())
+# Configure Django App for Heroku (logging is configured above).
+django_heroku.settings(locals(), logging=False)
+
+# Database connections (applied after Heroku configuration, which overrides DATABASES)
+# keep connections open between requests for DB_CONN_MAX_AGE seconds (0 - new connection per request)
+DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=600, cast=int)
+# ping persistent connections idle for more than DB_CONN_HEALTH_CHECK_IDLE seconds before request
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DB_CONN_HEALTH_CHECK_IDLE = config('DB_CONN_HEALTH_CHECK_IDLE', default=30, cast=int)
+# connection pooling: 'none', 'builtin' (process-local pool) or 'pgbouncer' (transaction pooling mode)
+DB_POOL = config('DB_POOL', default='none')
+if DB_POOL == 'builtin':
+    DATABASES['default']['ENGINE'] = 'quiez.quiez.db.postgresql_pool'
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # connections are returned to the pool after each request
+    DATABASES['default']['POOL'] = {
+        'MIN_SIZE': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+        'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'TIMEOUT': config('DB_POOL_TIMEOUT', default=5, cast=float),   # seconds to wait for connection of full pool
+    }
+elif DB_POOL == 'pgbouncer':
+    # server-side cursors do not survive transaction pooling
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Read replicas: comma separated database URLs, safe requests read from one of them
+DATABASE_REPLICAS = []
+for int_replica, str_replica_url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv())):
+    str_replica_alias = 'replica_{}'.format(int_replica + 1)
+    DATABASES[str_replica_alias] = dj_database_url.parse(str_replica_url,
+                                                         conn_max_age=DATABASES['default']['CONN_MAX_AGE'])
+    if DATABASES[str_replica_alias]['ENGINE'].startswith('django.db.backends.postgresql'):
+        # same pooling mode as primary
+        for str_key in ('ENGINE', 'POOL', 'DISABLE_SERVER_SIDE_CURSORS'):
+            if str_key in DATABASES['default']:
+                DATABASES[str_replica_alias][str_key] = DATABASES['default'][str_key]
+    DATABASES[str_replica_alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(str_replica_alias)
+if DATABASE_REPLICAS:
+    # client pins to primary (see routers) must be seen by all worker processes
+    if CACHE_BACKEND != 'db':
+        raise ImproperlyConfigured('DATABASE_REPLICA_URLS requires shared cache CACHE_BACKEND=db.')
+    DATABASE_ROUTERS = ['quiez.quiez.routers.PrimaryReplicaRouter']
+# seconds during which client reads go to primary after its write (read-your-own-submission)
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=5, cast=int)
 
 # enable Cross-Origin Resource Sharing for any domain
 CORS_ORIGIN_ALLOW_ALL = True
@@ -0,0 +1,161 @@
+"""
+Owner feedback analytics.
+
+* Feedback questions are shared by all tests, so feedback answers are comparable across all owner tests.
+* Distributions are computed with grouped SQL, either directly over QuestionFeedbackAnswerSubmission
+or over FeedbackAnswerRollup table refreshed incrementally by refresh_feedback_rollup command.
+* Refresh rolls up submissions not flagged as rolled up yet, so submissions committed in any order are counted
+exactly once. Requests only read rollup table, it lags behind submissions until next refresh.
+* Deleted tests are excluded on read (their rollup rows are removed with them by purge),
+rolled up answers of purged users are subtracted from rollup rows of other tests.
+"""
+from django.db import transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Trunc
+
+from .models.analytics import FeedbackAnswerRollup, RollupLock
+from .models.answer import QuestionFeedbackAnswer, QuestionFeedbackAnswerSubmission
+from .models.question import QuestionFeedback
+from .models.test import Test
+
+FEEDBACK_ROLLUP = 'feedback_answer_rollup'
+TUPLE_PERIODS = ('day', 'month')
+
+
+def _feedback_groups(queryset_answer_submissions):
+    # choices number of feedback answers per rollup row (test, question, answer, day)
+    return queryset_answer_submissions \
+        .order_by() \
+        .values('question_id', 'answer_id',
+                test_id=F('test_submission__test_id'),
+                owner_id=F('test_submission__test__owner_id'),
+                date=Trunc('test_submission__date_submission', 'day', output_field=DateField())) \
+        .annotate(number=Count('id'))
+
+
+def _roll_up_batch(int_batch_size: int) -> int:
+    """
+    Adds batch of not rolled up feedback answer submissions to rollup table and flags them.
+
+    :param int_batch_size: maximum number of submissions.
+    :return: number of processed submissions.
+    """
+    with transaction.atomic():
+        RollupLock.objects.select_for_update().get_or_create(name=FEEDBACK_ROLLUP)
+        # exact ids, so rows committed during refresh are neither flagged nor counted
+        list_ids = list(QuestionFeedbackAnswerSubmission.objects
+                        .filter(rolled_up=False)
+                        .order_by('id')
+                        .values_list('id', flat=True)[:int_batch_size])
+        if not list_ids:
+            return 0
+
+        list_rollups_new = []
+        for dict_group in _feedback_groups(QuestionFeedbackAnswerSubmission.objects.filter(id__in=list_ids)):
+            if not FeedbackAnswerRollup.objects \
+                    .filter(test_id=dict_group['test_id'], question_id=dict_group['question_id'],
+                            answer_id=dict_group['answer_id'], date=dict_group['date']) \
+                    .update(choices_number=F('choices_number') + dict_group['number']):
+                list_rollups_new.append(FeedbackAnswerRollup(owner_id=dict_group['owner_id'],
+                                                             test_id=dict_group['test_id'],
+                                                             question_id=dict_group['question_id'],
+                                                             answer_id=dict_group['answer_id'],
+                                                             date=dict_group['date'],
+                                                             choices_number=dict_group['number']))
+        FeedbackAnswerRollup.objects.bulk_create(list_rollups_new)
+        QuestionFeedbackAnswerSubmission.objects.filter(id__in=list_ids).update(rolled_up=True)
+        return len(list_ids)
+
+
+def refresh_feedback_rollup(int_batch_size: int) -> int:
+    """
+    Adds feedback answer submissions not rolled up yet to rollup table, batch per transaction.
+
+    :param int_batch_size: maximum number of submissions per transaction.
+    :return: number of processed submissions.
+    """
+    int_processed = 0
+    while True:
+        int_batch = _roll_up_batch(int_batch_size)
+        if not int_batch:
+            return int_processed
+        int_processed += int_batch
+
+
+def subtract_from_rollup(queryset_test_submission_ids) -> None:
+    """
+    Subtracts rolled up feedback answers of test submissions from rollup table (called in transaction
+    deleting the submissions), rollup rows left without choices are deleted.
+
+    :param queryset_test_submission_ids: queryset of test submission ids.
+    :return: None
+    """
+    RollupLock.objects.select_for_update().get_or_create(name=FEEDBACK_ROLLUP)
+    for dict_group in _feedback_groups(QuestionFeedbackAnswerSubmission.objects
+                                       .filter(test_submission_id__in=queryset_test_submission_ids,
+                                               rolled_up=True)):
+        queryset_rollup = FeedbackAnswerRollup.objects.filter(test_id=dict_group['test_id'],
+                                                              question_id=dict_group['question_id'],
+                                                              answer_id=dict_group['answer_id'],
+                                                              date=dict_group['date'])
+        queryset_rollup.update(choices_number=F('choices_number') - dict_group['number'])
+        queryset_rollup.filter(choices_number__lte=0).delete()
+
+
+def get_feedback_distribution(owner_id: int, organization_id, str_period: str = 'month',
+                              bool_rollup: bool = True) -> dict:
+    """
+    Computes feedback answers distribution over time of all owner tests of tenant (not deleted).
+
+    :param owner_id: tests owner id.
+    :param organization_id: organization id, None - tests without organization.
+    :param str_period: distribution period ('day' or 'month').
+    :param bool_rollup: read from rollup table (as of last refresh) instead of submissions.
+    :return: JSON of feedback questions with answers choices number per period.
+    """
+    if bool_rollup:
+        queryset_groups = FeedbackAnswerRollup.objects \
+            .filter(owner_id=owner_id, test__organization_id=organization_id, test__date_delete__isnull=True) \
+            .order_by() \
+            .values('question_id', 'answer_id', period=Trunc('date', str_period, output_field=DateField())) \
+            .annotate(number=Sum('choices_number'))
+    else:
+        queryset_groups = QuestionFeedbackAnswerSubmission.objects \
+            .filter(test_submission__test__owner_id=owner_id,
+                    test_submission__test__organization_id=organization_id,
+                    test_submission__test__date_delete__isnull=True) \
+            .order_by() \
+            .values('question_id', 'answer_id',
+                    period=Trunc('test_submission__date_submission', str_period, output_field=DateField())) \
+            .annotate(number=Count('id'))
+
+    dict_answer_periods = {}
+    for dict_group in queryset_groups:
+        dict_answer_periods.setdefault(dict_group['answer_id'], []).append({
+            'period': dict_group['period'].isoformat(),
+            'choices_number': dict_group['number'],
+        })
+
+    dict_answers = {}
+    for answer_id, question_feedback_id, content in QuestionFeedbackAnswer.objects \
+            .values_list('id', 'question_feedback_id', 'content'):
+        list_periods = sorted(dict_answer_periods.get(answer_id, []), key=lambda dict_period: dict_period['period'])
+        dict_answers.setdefault(question_feedback_id, []).append({
+            'id': answer_id,
+            'content': content,
+            'choices_number': sum(dict_period['choices_number'] for dict_period in list_periods),
+            'periods': list_periods,
+        })
+
+    return {
+        'owner_id': owner_id,
+        'tests_number': Test.objects.alive().of_organization(organization_id).filter(owner_id=owner_id).count(),
+        'period': str_period,
+        'questions_feedback': [{
+            'id': question_feedback_id,
+            'description': description,
+            'type': str_type,
+            'answers': dict_answers.get(question_feedback_id, []),
+        } for question_feedback_id, description, str_type in QuestionFeedback.objects
+            .values_list('id', 'description', 'type')],
+    }
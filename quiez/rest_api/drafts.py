@@ -0,0 +1,100 @@
+"""
+Draft test submissions.
+
+* Participant saves answers of single questions while passing test, saved answers are appended
+as DraftAnswer rows (one bulk insert per save, no updates), so saving is cheap and progress survives crashes.
+* Finalization merges draft (latest answers of every question) into submission JSON
+and submits it with batch submission path (set-based validation, bulk inserts).
+"""
+import json
+
+from django.db import transaction
+
+from .models.draft import DraftAnswer
+from .submissions import RESERVED_KEY_PREFIX, submit_batch
+
+
+class DraftError(Exception):
+    """
+    Draft answers are invalid.
+    """
+
+
+def _get_draft_rows(list_questions, bool_feedback: bool) -> list:
+    str_field = 'questions_feedback' if bool_feedback else 'questions'
+    if list_questions is None:
+        return []
+    if not isinstance(list_questions, list):
+        raise DraftError('{} must be list.'.format(str_field))
+    list_rows = []
+    for dict_question in list_questions:
+        if not isinstance(dict_question, dict) or not isinstance(dict_question.get('answers'), list):
+            raise DraftError('Every item of {} must have answers list.'.format(str_field))
+        try:
+            question_id = int(dict_question.get('id'))
+        except (TypeError, ValueError):
+            raise DraftError('Every item of {} must have integer id.'.format(str_field))
+        list_rows.append((question_id, bool_feedback, json.dumps(dict_question['answers'])))
+    return list_rows
+
+
+def save_draft(test_id: int, user_id: int, dict_data: dict) -> int:
+    """
+    Appends answers of questions to draft.
+        - Questions and answers are validated on finalization.
+
+    :param test_id: test id.
+    :param user_id: participant id.
+    :param dict_data: JSON with questions and / or questions_feedback lists in test submission format.
+    :return: number of saved questions.
+    """
+    list_rows = _get_draft_rows(dict_data.get('questions'), bool_feedback=False) + \
+        _get_draft_rows(dict_data.get('questions_feedback'), bool_feedback=True)
+    if not list_rows:
+        raise DraftError('Questions or questions_feedback list is required.')
+    DraftAnswer.objects.bulk_create([
+        DraftAnswer(test_id=test_id, user_id=user_id, question_id=question_id, is_feedback=is_feedback,
+                    answers=str_answers)
+        for question_id, is_feedback, str_answers in list_rows
+    ])
+    return len(list_rows)
+
+
+def get_draft(test_id: int, user_id: int) -> dict:
+    """
+    Merges draft rows: latest saved answers of every question.
+
+    :param test_id: test id.
+    :param user_id: participant id.
+    :return: JSON of draft in test submission format.
+    """
+    dict_questions = {False: {}, True: {}}
+    for question_id, is_feedback, str_answers in DraftAnswer.objects \
+            .filter(test_id=test_id, user_id=user_id) \
+            .values_list('question_id', 'is_feedback', 'answers'):
+        # rows are ordered by id, so later saves overwrite earlier ones
+        dict_questions[is_feedback][question_id] = str_answers
+    return {
+        str_field: [{'id': question_id, 'answers': json.loads(str_answers)}
+                    for question_id, str_answers in dict_questions[is_feedback].items()]
+        for str_field, is_feedback in (('questions', False), ('questions_feedback', True))
+    }
+
+
+def finalize_draft(test_id: int, user) -> dict:
+    """
+    Submits draft as test submission and deletes it.
+        - Draft is kept if submission is invalid, so participant can fix it.
+
+    :param test_id: test id.
+    :param user: participant.
+    :return: batch item result (status and id or detail).
+    """
+    dict_item = get_draft(test_id, user.id)
+    dict_item['test_id'] = test_id
+    dict_item['idempotency_key'] = '{}draft:{}'.format(RESERVED_KEY_PREFIX, test_id)
+    with transaction.atomic():
+        dict_result = submit_batch(user, [dict_item], bool_reserved_keys=True)[0]
+        if dict_result['status'] in (200, 201):
+            DraftAnswer.objects.filter(test_id=test_id, user_id=user.id).delete()
+    return dict_result
@@ -0,0 +1,79 @@
+"""
+Test leaderboard.
+
+* Participants are ranked by right answers number (descending), ties are broken by earlier submission
+(and then by submission id), so every participant has distinct rank.
+* Top entries are read by index scan of (test, right answers number descending, submission date)
+index of TestSubmission, rank of participant is computed by counting submissions ranked above it.
+"""
+from django.db.models import Q
+
+from rest_framework import serializers
+
+from .models.test import TestSubmission
+
+_datetime_to_representation = serializers.DateTimeField().to_representation
+
+LEADERBOARD_FIELDS = ('id', 'right_answers_number', 'date_submission', 'user_id', 'user__first_name',
+                      'user__last_name')
+
+
+def _ranked(test_id: int):
+    # submissions without computed right answers number are not ranked
+    return TestSubmission.objects \
+        .filter(test_id=test_id, right_answers_number__isnull=False) \
+        .order_by('-right_answers_number', 'date_submission', 'id')
+
+
+def _entries(queryset_submissions, int_first_rank: int) -> list:
+    """
+    Converts ranked submissions to JSON.
+
+    :param queryset_submissions: sliced ranked submissions queryset.
+    :param int_first_rank: rank of first submission.
+    :return: JSON list of leaderboard entries.
+    """
+    return [{
+        'rank': int_first_rank + int_entry,
+        'participant': {'id': user_id, 'first_name': str_first_name, 'last_name': str_last_name},
+        'right_answers_number': int_right_answers,
+        'date_submission': _datetime_to_representation(date_submission),
+    } for int_entry, (_, int_right_answers, date_submission, user_id, str_first_name, str_last_name)
+        in enumerate(queryset_submissions.values_list(*LEADERBOARD_FIELDS))]
+
+
+def get_top(test_id: int, int_top: int) -> list:
+    """
+    Returns top of leaderboard.
+
+    :param test_id: test id.
+    :param int_top: number of entries.
+    :return: JSON list of leaderboard entries.
+    """
+    return _entries(_ranked(test_id)[:int_top], 1)
+
+
+def get_around(test_id: int, user_id: int, int_around: int):
+    """
+    Returns leaderboard entries around participant.
+
+    :param test_id: test id.
+    :param user_id: participant id.
+    :param int_around: number of entries before and after participant.
+    :return: dictionary with participant rank and entries, None if participant is not ranked.
+    """
+    tuple_submission = _ranked(test_id).filter(user_id=user_id) \
+        .values_list('id', 'right_answers_number', 'date_submission').first()
+    if tuple_submission is None:
+        return None
+    test_submission_id, int_right_answers, date_submission = tuple_submission
+    int_rank = _ranked(test_id).filter(
+        Q(right_answers_number__gt=int_right_answers) |
+        Q(right_answers_number=int_right_answers, date_submission__lt=date_submission) |
+        Q(right_answers_number=int_right_answers, date_submission=date_submission, id__lt=test_submission_id)
+    ).count() + 1
+    int_start = max(int_rank - 1 - int_around, 0)
+    return {
+        'rank': int_rank,
+        'entries': _entries(_ranked(test_id)[int_start:int_rank + int_around], int_start + 1),
+    }
@@ -0,0 +1,40 @@
+"""
+Helpers shared by benchmark management commands.
+"""
+import statistics
+import time
+
+
+def measure(func, repeat: int) -> list:
+    """
+    Measures execution time of function.
+
+    :param func: function without arguments.
+    :param repeat: number of calls.
+    :return: list of call durations in seconds.
+    """
+    list_timings = []
+    for _ in range(repeat):
+        float_start = time.perf_counter()
+        func()
+        list_timings.append(time.perf_counter() - float_start)
+    return list_timings
+
+
+def format_timings(label: str, list_timings: list) -> str:
+    """
+    Formats timings summary as single report line.
+
+    :param label: name of measured case.
+    :param list_timings: list of durations in seconds.
+    :return: report line (milliseconds).
+    """
+    list_sorted = sorted(list_timings)
+    float_p95 = list_sorted[max(0, int(len(list_sorted) * 0.95) - 1)]
+    return '{:<40} mean {:8.3f} ms  median {:8.3f} ms  p95 {:8.3f} ms  (n={})'.format(
+        label,
+        statistics.mean(list_sorted) * 1000,
+        statistics.median(list_sorted) * 1000,
+        float_p95 * 1000,
+        len(list_sorted)
+    )
@@ -0,0 +1,51 @@
+"""
+Response compression benchmark (CPU cost versus bytes saved) on seeded result payloads.
+
+    $ ./manage.py seed_benchmark --questions 50 --participants 300
+    $ ./manage.py benchmark_compression
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from quiez.quiez import compression
+from quiez.rest_api.models.test import Test
+from quiez.rest_api.renderers import FastJSONRenderer
+from quiez.rest_api.serializers.lean import test_to_representation
+from quiez.rest_api.serializers.test import TestResultOverviewGetSerializer
+
+from ._benchmark import measure, format_timings
+
+
+class Command(BaseCommand):
+    help = 'Measures compression time and ratio of test detail and result overview responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test-id', type=int, help='Closed test id (latest closed test by default).')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of calls per case.')
+
+    def handle(self, *args, **options):
+        queryset_tests = Test.objects.filter(date_close__isnull=False)
+        if options['test_id']:
+            queryset_tests = queryset_tests.filter(id=options['test_id'])
+        test = queryset_tests.first()
+        if test is None:
+            raise CommandError('There is no closed test to benchmark, run seed_benchmark command first.')
+
+        renderer = FastJSONRenderer()
+        list_cases = [('gzip level {}'.format(int_level), compression.gzip_compress, int_level)
+                      for int_level in (1, 6, 9)]
+        if compression.brotli is not None:
+            list_cases += [('brotli quality {}'.format(int_quality), compression.brotli_compress, int_quality)
+                           for int_quality in (1, 4, 11)]
+        else:
+            self.stdout.write('brotli is not installed, only gzip is measured.')
+
+        for str_payload, data in (('detail', test_to_representation(test)),
+                                  ('result overview', TestResultOverviewGetSerializer().to_representation(test))):
+            bytes_content = renderer.render(data)
+            self.stdout.write('{} of test id = {}: {} bytes'.format(str_payload, test.id, len(bytes_content)))
+            for str_label, compress, int_level in list_cases:
+                int_size = len(compress(bytes_content, int_level))
+                list_timings = measure(lambda: compress(bytes_content, int_level), options['repeat'])
+                self.stdout.write('  {}  {:>8} bytes ({:5.1f}% saved)'.format(
+                    format_timings(str_label, list_timings), int_size,
+                    100 - int_size * 100 / len(bytes_content)))
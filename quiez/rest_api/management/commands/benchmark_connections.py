@@ -0,0 +1,41 @@
+"""
+Per-request database connection overhead benchmark.
+
+    $ ./manage.py benchmark_connections --requests 500
+"""
+from django.core.management.base import BaseCommand
+from django.core.signals import request_started, request_finished
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from ._benchmark import measure, format_timings
+
+
+class Command(BaseCommand):
+    help = 'Measures per-request database connection overhead with and without persistent connections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Number of simulated requests per case.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to benchmark.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        int_conn_max_age = connection.settings_dict['CONN_MAX_AGE']
+
+        def simulate_request():
+            # same connection lifecycle as in request handling: signals close obsolete connections
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            request_finished.send(sender=self.__class__)
+
+        self.stdout.write('Engine: {}'.format(connection.settings_dict['ENGINE']))
+        try:
+            for str_label, conn_max_age in (('new connection per request', 0),
+                                            ('persistent connection', None)):
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+                list_timings = measure(simulate_request, options['requests'])
+                self.stdout.write(format_timings(str_label, list_timings))
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = int_conn_max_age
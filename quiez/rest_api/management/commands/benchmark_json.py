@@ -0,0 +1,75 @@
+"""
+JSON rendering / parsing benchmark on scaled up json/*.json fixtures.
+
+    $ ./manage.py benchmark_json --scale 50
+"""
+import copy
+import glob
+import io
+import os
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from quiez.rest_api.parsers import FastJSONParser
+from quiez.rest_api.renderers import FastJSONRenderer, orjson
+
+from ._benchmark import measure, format_timings
+
+
+def scale_up(data, int_scale: int):
+    """
+    Multiplies every list of fixture (questions, answers, ...) by scale factor.
+
+    :param data: fixture data.
+    :param int_scale: scale factor.
+    :return: scaled copy of data.
+    """
+    if isinstance(data, dict):
+        return {key: scale_up(value, int_scale) for key, value in data.items()}
+    if isinstance(data, list):
+        return [scale_up(copy.deepcopy(item), int_scale) for item in data for _ in range(int_scale)]
+    return data
+
+
+class Command(BaseCommand):
+    help = 'Compares DRF JSONRenderer / JSONParser with FastJSONRenderer / FastJSONParser.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=20, help='Multiplier of fixture lists.')
+        parser.add_argument('--repeat', type=int, default=50, help='Number of calls per case.')
+
+    def handle(self, *args, **options):
+        self.stdout.write('orjson: {}'.format('installed' if orjson is not None else 'not installed (stdlib fallback)'))
+        str_fixtures_dir = os.path.join(os.path.dirname(settings.BASE_DIR), 'json')
+        renderer, renderer_fast = JSONRenderer(), FastJSONRenderer()
+        parser, parser_fast = JSONParser(), FastJSONParser()
+
+        for str_path in sorted(glob.glob(os.path.join(str_fixtures_dir, '*.json'))):
+            with open(str_path, 'rb') as file:
+                data = parser.parse(file)
+            data = scale_up(data, options['scale'])
+            if isinstance(data, dict):
+                # values handled by encoder, not by serializer fields
+                data['rendered_at'] = now()
+                data['request_id'] = uuid.uuid4()
+            bytes_json = renderer.render(data)
+
+            self.stdout.write('{} ({} KB)'.format(os.path.basename(str_path), len(bytes_json) // 1024))
+            if renderer_fast.render(data) != bytes_json:
+                self.stderr.write('  FastJSONRenderer output differs from JSONRenderer output')
+            self.stdout.write('  ' + format_timings('render: JSONRenderer',
+                                                    measure(lambda: renderer.render(data), options['repeat'])))
+            self.stdout.write('  ' + format_timings('render: FastJSONRenderer',
+                                                    measure(lambda: renderer_fast.render(data), options['repeat'])))
+            self.stdout.write('  ' + format_timings('parse: JSONParser',
+                                                    measure(lambda: parser.parse(io.BytesIO(bytes_json)),
+                                                            options['repeat'])))
+            self.stdout.write('  ' + format_timings('parse: FastJSONParser',
+                                                    measure(lambda: parser_fast.parse(io.BytesIO(bytes_json)),
+                                                            options['repeat'])))
@@ -0,0 +1,95 @@
+"""
+Test result overview latency and memory under settings profiles.
+
+    $ ./manage.py seed_benchmark --participants 300
+    $ ./manage.py benchmark_profiles --test 1 --repeat 30
+
+* Settings are read once per process, so every profile is measured in its own interpreter
+(same command with --child and SETTINGS_PROFILE environment variable).
+* Throttling is disabled in measured process, it is not subject of comparison.
+* Memory: peak Python allocations of one request (tracemalloc) and SQL statements kept by connection.
+"""
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from quiez.rest_api.models.test import Test
+from quiez.rest_api.views.test import TestResultOverviewView
+from ._benchmark import measure, format_timings
+
+
+class Command(BaseCommand):
+    help = 'Measures test result overview latency and memory under production, dev and bench settings profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test', type=int, required=True, help='Closed test id (see seed_benchmark).')
+        parser.add_argument('--repeat', type=int, default=30, help='Number of measured requests per profile.')
+        parser.add_argument('--profiles', default='production,dev,bench', help='Comma separated profiles.')
+        parser.add_argument('--child', action='store_true', help='Measure current profile and print JSON report.')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            self.stdout.write(json.dumps(self._measure(options['test'], options['repeat'])))
+            return
+
+        for str_profile in options['profiles'].split(','):
+            # DEBUG and CACHE_BACKEND come from profile, not from environment of this process
+            dict_env = {str_key: str_value for str_key, str_value in os.environ.items()
+                        if str_key not in ('DEBUG', 'CACHE_BACKEND', 'LOG_LEVEL')}
+            dict_env['SETTINGS_PROFILE'] = str_profile
+            dict_env.setdefault('DJANGO_SETTINGS_MODULE', 'quiez.quiez.settings')
+            process = subprocess.run([sys.executable, 'manage.py', 'benchmark_profiles', '--child',
+                                      '--test', str(options['test']), '--repeat', str(options['repeat'])],
+                                     cwd=os.path.dirname(settings.BASE_DIR), env=dict_env,
+                                     stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            if process.returncode:
+                raise CommandError('Profile {} failed:\n{}'.format(str_profile, process.stderr[-2000:]))
+            dict_report = json.loads(process.stdout.strip().splitlines()[-1])
+            self.stdout.write(format_timings('{} (DEBUG={})'.format(str_profile, dict_report['debug']),
+                                             dict_report['timings']))
+            self.stdout.write('{:<40} peak {:8.1f} KiB  queries kept {}'.format(
+                '', dict_report['peak_bytes'] / 1024, dict_report['queries_kept']))
+
+    def _measure(self, int_test_id: int, int_repeat: int) -> dict:
+        """
+        Measures result overview requests in current process.
+
+        :param int_test_id: test id.
+        :param int_repeat: number of measured requests.
+        :return: report dictionary.
+        """
+        test = Test.objects.filter(id=int_test_id, date_close__isnull=False).first()
+        if test is None:
+            raise CommandError('Closed test with id = {} does not exist.'.format(int_test_id))
+        TestResultOverviewView.throttle_classes = ()
+        token, _ = Token.objects.get_or_create(user_id=test.owner_id)
+        client = Client(HTTP_AUTHORIZATION='Token {}'.format(token.key))
+        str_url = '/api/test/{}/result/'.format(int_test_id)
+
+        def request():
+            response = client.get(str_url)
+            if response.status_code != 200:
+                raise CommandError('Unexpected response {}.'.format(response.status_code))
+
+        request()   # warm up
+        list_timings = measure(request, int_repeat)
+
+        tracemalloc.start()
+        request()
+        _, int_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'debug': settings.DEBUG,
+            'timings': list_timings,
+            'peak_bytes': int_peak,
+            # queries of last request are kept until next request starts
+            'queries_kept': len(connection.queries_log),
+        }
@@ -0,0 +1,55 @@
+"""
+Registration burst load test (e.g. attendees registering at the start of a talk).
+
+    $ ./manage.py benchmark_registration --users 300 --concurrency 30
+"""
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+from ._benchmark import format_timings
+
+
+class Command(BaseCommand):
+    help = 'Registers users concurrently through registration endpoint and reports latency and throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Number of registrations.')
+        parser.add_argument('--concurrency', type=int, default=10, help='Number of concurrent clients.')
+        parser.add_argument('--keep', action='store_true', help='Keep registered users.')
+
+    def handle(self, *args, **options):
+        str_prefix = 'bench-register-{}-'.format(uuid.uuid4().hex[:8])
+
+        def register(int_user: int):
+            client = Client()
+            float_start = time.perf_counter()
+            response = client.post('/api/auth/register/', content_type='application/json', data={
+                'email': '{}{}@quiez.test'.format(str_prefix, int_user),
+                'password': 'benchmark-password',
+                'first_name': 'Bench',
+                'last_name': 'User',
+            })
+            float_duration = time.perf_counter() - float_start
+            connection.close()   # every thread has its own connection
+            return response.status_code, float_duration
+
+        float_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list_results = list(executor.map(register, range(options['users'])))
+        float_total = time.perf_counter() - float_start
+
+        dict_statuses = {}
+        for int_status, _ in list_results:
+            dict_statuses[int_status] = dict_statuses.get(int_status, 0) + 1
+        self.stdout.write(format_timings('registration', [float_duration for _, float_duration in list_results]))
+        self.stdout.write('throughput: {:.1f} registrations/s, statuses: {}'.format(
+            len(list_results) / float_total, dict_statuses))
+
+        if not options['keep']:
+            User.objects.filter(username__startswith=str_prefix).delete()
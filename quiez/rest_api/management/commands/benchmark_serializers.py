@@ -0,0 +1,53 @@
+"""
+Read serializers benchmark and golden output check of lean rendering.
+
+    $ ./manage.py seed_benchmark --questions 50 --participants 10
+    $ ./manage.py benchmark_serializers
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+from quiez.rest_api.models.test import Test
+from quiez.rest_api.serializers.lean import test_to_representation, tests_concise_to_representation
+from quiez.rest_api.serializers.test import TestGetSerializer, TestGetConciseSerializer
+
+from ._benchmark import measure, format_timings
+
+
+class Command(BaseCommand):
+    help = 'Checks that lean rendering outputs the same JSON as DRF serializers and compares their speed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test-id', type=int, help='Benchmarked test id (latest test by default).')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of calls per case.')
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        queryset_tests = Test.objects.all()
+        test = queryset_tests.filter(id=options['test_id']).first() if options['test_id'] else queryset_tests.first()
+        if test is None:
+            raise CommandError('There is no test to benchmark, run seed_benchmark command first.')
+
+        # golden output check: every test and list must render to identical JSON
+        list_mismatches = [test_checked.id for test_checked in queryset_tests
+                           if renderer.render(TestGetSerializer(test_checked).data) !=
+                           renderer.render(test_to_representation(test_checked))]
+        if renderer.render(TestGetConciseSerializer(queryset_tests, many=True).data) != \
+                renderer.render(tests_concise_to_representation(queryset_tests)):
+            list_mismatches.append('list')
+        if list_mismatches:
+            raise CommandError('Lean rendering differs from serializers output: {}'.format(list_mismatches))
+        self.stdout.write('Golden output check passed for {} tests.'.format(queryset_tests.count()))
+
+        self.stdout.write('Test id = {}'.format(test.id))
+        self.stdout.write(format_timings('detail: TestGetSerializer',
+                                         measure(lambda: TestGetSerializer(test).data, options['repeat'])))
+        self.stdout.write(format_timings('detail: lean',
+                                         measure(lambda: test_to_representation(test), options['repeat'])))
+        self.stdout.write(format_timings('list: TestGetConciseSerializer',
+                                         measure(lambda: TestGetConciseSerializer(queryset_tests, many=True).data,
+                                                 options['repeat'])))
+        self.stdout.write(format_timings('list: lean',
+                                         measure(lambda: tests_concise_to_representation(queryset_tests),
+                                                 options['repeat'])))
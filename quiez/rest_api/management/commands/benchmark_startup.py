@@ -0,0 +1,70 @@
+"""
+Worker startup time and import-time profile benchmark.
+
+    $ ./manage.py benchmark_startup --repeat 5 --top 25
+
+* Every run is a fresh interpreter (python -X importtime) importing WSGI application and URL configuration,
+same as gunicorn worker without --preload.
+"""
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ._benchmark import format_timings
+
+STR_STARTUP_CODE = 'from quiez.quiez.wsgi import application; ' \
+                   'from django.urls import get_resolver; get_resolver().url_patterns'
+
+
+def parse_importtime(str_stderr: str) -> dict:
+    """
+    Parses -X importtime report.
+
+    :param str_stderr: stderr of interpreter.
+    :return: dictionary module name - (self time, cumulative time) in microseconds.
+    """
+    dict_modules = {}
+    for str_line in str_stderr.splitlines():
+        if not str_line.startswith('import time:') or 'self [us]' in str_line:
+            continue
+        str_self, str_cumulative, str_module = str_line[len('import time:'):].split('|')
+        dict_modules[str_module.strip()] = (int(str_self), int(str_cumulative))
+    return dict_modules
+
+
+class Command(BaseCommand):
+    help = 'Measures worker startup time and reports slowest imports (python -X importtime).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Number of measured interpreter starts.')
+        parser.add_argument('--top', type=int, default=25, help='Number of reported top-level packages.')
+
+    def handle(self, *args, **options):
+        dict_env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE',
+                                                                          'quiez.quiez.settings'))
+        list_command = [sys.executable, '-X', 'importtime', '-c', STR_STARTUP_CODE]
+        list_timings = []
+        dict_modules = {}
+        for _ in range(options['repeat']):
+            float_start = time.perf_counter()
+            process = subprocess.run(list_command, cwd=os.path.dirname(settings.BASE_DIR), env=dict_env,
+                                     stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            list_timings.append(time.perf_counter() - float_start)
+            if process.returncode:
+                self.stderr.write(process.stderr[-2000:])
+                return
+            dict_modules = parse_importtime(process.stderr)
+        self.stdout.write(format_timings('startup (schema {})'.format(
+            'enabled' if settings.API_SCHEMA_ENABLED else 'disabled'), list_timings))
+
+        # top-level packages (cumulative time of their root import), last run
+        list_packages = sorted(((str_module, int_cumulative) for str_module, (_, int_cumulative)
+                                in dict_modules.items() if '.' not in str_module),
+                               key=lambda tuple_module: -tuple_module[1])
+        self.stdout.write('{:<40} {:>12}'.format('package', 'cumulative'))
+        for str_module, int_cumulative in list_packages[:options['top']]:
+            self.stdout.write('{:<40} {:>9.1f} ms'.format(str_module, int_cumulative / 1000))
@@ -0,0 +1,49 @@
+"""
+Token bucket throttling bookkeeping overhead benchmark.
+
+    $ ./manage.py benchmark_throttling --requests 100000
+"""
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from quiez.rest_api import throttling
+from quiez.rest_api.views.test import TestResultOverviewView
+
+
+class Command(BaseCommand):
+    help = 'Measures per-request overhead of token bucket throttles with local and cache stores.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100000, help='Number of throttle checks per case.')
+        parser.add_argument('--users', type=int, default=1000, help='Number of distinct clients.')
+
+    def handle(self, *args, **options):
+        list_requests = []
+        for int_user in range(options['users']):
+            request_user = RequestFactory().get('/api/test/1/result/', REMOTE_ADDR='10.0.{}.{}'.format(
+                int_user // 256, int_user % 256))
+            request_user.user = AnonymousUser()
+            list_requests.append(request_user)
+        view = TestResultOverviewView()
+        view.kwargs = {'test_id': 1}
+
+        store_default = throttling._store
+        try:
+            for str_label, store in (('local store', throttling.LocalTokenBucketStore()),
+                                     ('cache store', throttling.CacheTokenBucketStore())):
+                throttling._store = store
+                list_throttles = [throttle_class() for throttle_class in view.throttle_classes]
+                int_requests = options['requests']
+                float_start = time.perf_counter()
+                for int_request in range(int_requests):
+                    request_user = list_requests[int_request % len(list_requests)]
+                    for throttle in list_throttles:
+                        throttle.allow_request(request_user, view)
+                float_duration = time.perf_counter() - float_start
+                self.stdout.write('{:<15} {:8.2f} us per request ({} throttles, {} clients)'.format(
+                    str_label, float_duration / int_requests * 1000000, len(list_throttles), len(list_requests)))
+        finally:
+            throttling._store = store_default
@@ -0,0 +1,31 @@
+"""
+Write-behind submission queue worker.
+
+    $ ./manage.py drain_submission_queue --batch-size 500
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quiez.rest_api.submission_queue import drain_queue
+
+
+class Command(BaseCommand):
+    help = 'Writes queued test submissions in bulk batches (runs until stopped unless --once).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.SUBMISSION_QUEUE_BATCH_SIZE,
+                            help='Maximum number of submissions written in one transaction.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain current queue and exit.')
+
+    def handle(self, *args, **options):
+        while True:
+            int_processed = drain_queue(options['batch_size'])
+            if int_processed:
+                self.stdout.write('Processed {} queued submissions.'.format(int_processed))
+                continue
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
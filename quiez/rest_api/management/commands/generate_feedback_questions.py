@@ -0,0 +1,16 @@
+"""
+Generates feedback questions - answers if they are missing (release step, see Procfile).
+
+    $ ./manage.py generate_feedback_questions
+"""
+from django.core.management.base import BaseCommand
+
+from quiez.rest_api.prerequisites import generate_feedback_questions
+
+
+class Command(BaseCommand):
+    help = 'Generates feedback questions and their answers if they are missing.'
+
+    def handle(self, *args, **options):
+        generate_feedback_questions()
+        self.stdout.write('Feedback questions are ready.')
@@ -0,0 +1,28 @@
+"""
+Generates API schema artifacts served by /api/schema.json and /api/schema.yaml.
+
+    $ ./manage.py generate_schema
+
+* Run at deploy time (see bin/post_compile), so schema is not generated by web workers.
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quiez.rest_api.views.schema import encode_schema, generate_schema, get_schema_path, DICT_CONTENT_TYPES
+
+
+class Command(BaseCommand):
+    help = 'Generates API schema JSON and YAML artifacts into API_SCHEMA_DIR.'
+
+    def handle(self, *args, **options):
+        os.makedirs(settings.API_SCHEMA_DIR, exist_ok=True)
+        schema = generate_schema()
+        for str_format in DICT_CONTENT_TYPES:
+            # encoded before opening file, so failed encoding does not leave empty artifact
+            bytes_content = encode_schema(schema, str_format)
+            str_path = get_schema_path(str_format)
+            with open(str_path, 'wb') as file_schema:
+                file_schema.write(bytes_content)
+            self.stdout.write('Schema is written to {}.'.format(str_path))
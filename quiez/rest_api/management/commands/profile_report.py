@@ -0,0 +1,76 @@
+"""
+Prints profiles saved by ProfilingMiddleware aggregated by endpoint.
+
+    $ ./manage.py profile_report --endpoint ResultOverview --top 20
+    $ ./manage.py profile_report --folded > stacks.txt     # flamegraph.pl stacks.txt > flame.svg (or speedscope)
+"""
+from django.core.management.base import BaseCommand
+
+from quiez.quiez.profiling import load_profiles
+
+
+class Command(BaseCommand):
+    help = 'Prints mean request, SQL and section times and top hotspots of saved profiles by endpoint, ' \
+           'or aggregated folded stacks for flame graphs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', help='Part of endpoint name (method and view name).')
+        parser.add_argument('--top', type=int, default=20, help='Number of hotspots printed per endpoint.')
+        parser.add_argument('--folded', action='store_true',
+                            help='Print folded stacks (frames separated by ";" and microseconds) of all profiles.')
+
+    def handle(self, *args, **options):
+        dict_profiles = load_profiles(options['endpoint'])
+        if not dict_profiles:
+            self.stderr.write('No profiles found.')
+            return
+        if options['folded']:
+            self._write_folded(dict_profiles)
+            return
+        for str_endpoint, list_profiles in sorted(dict_profiles.items()):
+            self._write_endpoint(str_endpoint, list_profiles, options['top'])
+
+    def _write_folded(self, dict_profiles: dict) -> None:
+        dict_stacks = {}
+        for str_endpoint, list_profiles in dict_profiles.items():
+            for dict_profile in list_profiles:
+                for str_stack, int_time in dict_profile['stacks'].items():
+                    # endpoint is root frame, so endpoints are separate subtrees of one graph
+                    str_stack = '{};{}'.format(str_endpoint, str_stack)
+                    dict_stacks[str_stack] = dict_stacks.get(str_stack, 0) + int_time
+        for str_stack, int_time in sorted(dict_stacks.items()):
+            if int_time:
+                self.stdout.write('{} {}'.format(str_stack, int_time))
+
+    def _write_endpoint(self, str_endpoint: str, list_profiles: list, int_top: int) -> None:
+        int_profiles = len(list_profiles)
+
+        def mean_ms(float_sum: float) -> str:
+            return '{:.2f} ms'.format(float_sum / int_profiles * 1000)
+
+        self.stdout.write('{} ({} profiles)'.format(str_endpoint, int_profiles))
+        self.stdout.write('  request: {}, SQL: {} ({:.1f} queries)'.format(
+            mean_ms(sum(dict_profile['duration'] for dict_profile in list_profiles)),
+            mean_ms(sum(dict_profile['sql']['duration'] for dict_profile in list_profiles)),
+            sum(dict_profile['sql']['queries'] for dict_profile in list_profiles) / int_profiles))
+        dict_sections = {}
+        for dict_profile in list_profiles:
+            for str_label, float_time in dict_profile['sections'].items():
+                dict_sections[str_label] = dict_sections.get(str_label, 0.0) + float_time
+        for str_label, float_time in sorted(dict_sections.items(), key=lambda item: -item[1]):
+            self.stdout.write('  section {}: {}'.format(str_label, mean_ms(float_time)))
+
+        # hotspots are saved per profile, so function out of top of some profiles is summed only from others
+        dict_hotspots = {}
+        for dict_profile in list_profiles:
+            for dict_hotspot in dict_profile['hotspots']:
+                str_function = '{} (line {})'.format(dict_hotspot['function'], dict_hotspot['line'])
+                list_sums = dict_hotspots.setdefault(str_function, [0, 0.0, 0.0])
+                list_sums[0] += dict_hotspot['calls']
+                list_sums[1] += dict_hotspot['own']
+                list_sums[2] += dict_hotspot['total']
+        self.stdout.write('  {:>10} {:>12} {:>12}  function'.format('calls', 'own', 'total'))
+        for str_function, (int_calls, float_own, float_total) in \
+                sorted(dict_hotspots.items(), key=lambda item: -item[1][1])[:int_top]:
+            self.stdout.write('  {:>10.1f} {:>12} {:>12}  {}'.format(int_calls / int_profiles, mean_ms(float_own),
+                                                                     mean_ms(float_total), str_function))
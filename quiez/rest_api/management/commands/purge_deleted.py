@@ -0,0 +1,37 @@
+"""
+Removes soft-deleted tests and users with their content in bounded batches (e.g. periodically by scheduler).
+
+    $ ./manage.py purge_deleted --batch-size 1000 --sleep 0.1
+    $ ./manage.py purge_deleted -v 2        # progress after every batch
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quiez.rest_api.models.deletion import DeletedUser
+from quiez.rest_api.models.test import Test
+from quiez.rest_api.purge import purge_test, purge_user
+
+
+class Command(BaseCommand):
+    help = 'Deletes submissions and other content of soft-deleted tests and users in batches, then the rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.PURGE_BATCH_SIZE,
+                            help='Maximum number of rows deleted in one transaction.')
+        parser.add_argument('--sleep', type=float, default=settings.PURGE_SLEEP_SECONDS,
+                            help='Seconds to wait between batches.')
+
+    def handle(self, *args, **options):
+        def get_progress(str_object: str):
+            if options['verbosity'] < 2:
+                return None
+            return lambda int_deleted: self.stdout.write('{}: {} submissions deleted'.format(str_object, int_deleted))
+
+        for test_id in Test.objects.filter(date_delete__isnull=False).order_by('id').values_list('id', flat=True):
+            int_deleted = purge_test(test_id, options['batch_size'], options['sleep'],
+                                     get_progress('test {}'.format(test_id)))
+            self.stdout.write('Purged test id = {} ({} submissions).'.format(test_id, int_deleted))
+        for user_id in DeletedUser.objects.values_list('user_id', flat=True):
+            int_deleted = purge_user(user_id, options['batch_size'], options['sleep'],
+                                     get_progress('user {}'.format(user_id)))
+            self.stdout.write('Purged user id = {} ({} submissions).'.format(user_id, int_deleted))
@@ -0,0 +1,21 @@
+"""
+Refreshes owner feedback analytics rollup table (e.g. periodically by scheduler).
+
+    $ ./manage.py refresh_feedback_rollup --batch-size 1000
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quiez.rest_api.analytics import refresh_feedback_rollup
+
+
+class Command(BaseCommand):
+    help = 'Adds feedback answer submissions not rolled up yet to feedback analytics rollup table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.FEEDBACK_ROLLUP_BATCH_SIZE,
+                            help='Maximum number of submissions rolled up in one transaction.')
+
+    def handle(self, *args, **options):
+        int_processed = refresh_feedback_rollup(options['batch_size'])
+        self.stdout.write('Processed {} feedback answer submissions.'.format(int_processed))
@@ -0,0 +1,34 @@
+"""
+Recomputes denormalized test score distributions from submissions (e.g. after manual data changes).
+
+    $ ./manage.py repair_test_scores
+    $ ./manage.py repair_test_scores --test 1 --test 2
+    $ ./manage.py repair_test_scores --missing     # only tests without distribution (release step)
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quiez.rest_api.models.test import Test
+from quiez.rest_api.scores import recompute_scores
+
+
+class Command(BaseCommand):
+    help = 'Recomputes participants number and score distribution of tests in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test', type=int, action='append', help='Test id (all tests by default).')
+        parser.add_argument('--missing', action='store_true',
+                            help='Only tests without computed distribution (created before denormalization).')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of tests per transaction.')
+
+    def handle(self, *args, **options):
+        queryset_tests = Test.objects.order_by('id')
+        if options['test']:
+            queryset_tests = queryset_tests.filter(id__in=options['test'])
+        if options['missing']:
+            queryset_tests = queryset_tests.filter(participants_number__isnull=True)
+        list_test_ids = list(queryset_tests.values_list('id', flat=True))
+        for int_start in range(0, len(list_test_ids), options['batch_size']):
+            with transaction.atomic():
+                recompute_scores(list_test_ids[int_start:int_start + options['batch_size']])
+        self.stdout.write('Recomputed score distribution of {} tests.'.format(len(list_test_ids)))
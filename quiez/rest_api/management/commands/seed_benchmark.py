@@ -0,0 +1,115 @@
+"""
+Seeds closed test with submissions for benchmarks.
+
+    $ ./manage.py seed_benchmark --questions 50 --answers 5 --participants 300
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import localtime
+
+from quiez.rest_api import prerequisites
+from quiez.rest_api.models.test import Test, TestSubmission
+from quiez.rest_api.models.question import Question
+from quiez.rest_api.models.answer import QuestionAnswer, QuestionFeedbackAnswer, \
+    QuestionAnswerSubmission, QuestionFeedbackAnswerSubmission
+from quiez.rest_api.scores import recompute_scores
+
+LIST_QUESTION_TYPES = ['one', 'many', 'text']
+LIST_TEXT_ANSWERS = ['Yes', 'yes', 'No', 'Maybe', 'I do not know', 'Sure']
+
+
+class Command(BaseCommand):
+    help = 'Creates closed test with questions, answers and participant submissions for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=20, help='Number of test questions.')
+        parser.add_argument('--answers', type=int, default=4, help='Number of answers per choice question.')
+        parser.add_argument('--participants', type=int, default=100, help='Number of submissions.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        generator = random.Random(options['seed'])
+        prerequisites.generate_feedback_questions()
+        str_password = make_password(None)  # unusable password, no hashing cost
+        int_users_number = User.objects.count()
+
+        owner = User.objects.create(username='bench-owner-{}@quiez.test'.format(int_users_number),
+                                    email='bench-owner-{}@quiez.test'.format(int_users_number),
+                                    first_name='Bench', last_name='Owner', password=str_password)
+        test = Test.objects.create(name='Benchmark test', description='Seeded by seed_benchmark command.',
+                                   questions_number=options['questions'], owner=owner,
+                                   date_open=localtime())
+
+        # questions and answers
+        for int_question in range(options['questions']):
+            str_type = LIST_QUESTION_TYPES[int_question % len(LIST_QUESTION_TYPES)]
+            question = Question.objects.create(test=test, description='Question {}'.format(int_question + 1),
+                                               type=str_type)
+            if str_type == 'text':
+                list_answers = [QuestionAnswer(question=question, content='Yes', is_right=True)]
+            else:
+                list_answers = [QuestionAnswer(question=question, content='Answer {}'.format(int_answer + 1),
+                                               is_right=int_answer == 0)
+                                for int_answer in range(options['answers'])]
+            QuestionAnswer.objects.bulk_create(list_answers)
+        dict_question_answers = {}
+        for answer in QuestionAnswer.objects.filter(question__test=test).select_related('question'):
+            dict_question_answers.setdefault(answer.question, []).append(answer)
+        dict_feedback_answers = {}
+        for answer in QuestionFeedbackAnswer.objects.filter(question_feedback__tests=test):
+            dict_feedback_answers.setdefault(answer.question_feedback_id, []).append(answer)
+
+        # participants and submissions
+        list_participants = [User(username='bench-{}-{}@quiez.test'.format(test.id, int_participant),
+                                  email='bench-{}-{}@quiez.test'.format(test.id, int_participant),
+                                  password=str_password)
+                             for int_participant in range(options['participants'])]
+        User.objects.bulk_create(list_participants)
+        list_participants = User.objects.filter(username__startswith='bench-{}-'.format(test.id))
+        TestSubmission.objects.bulk_create([TestSubmission(test=test, user=participant, date_submission=localtime())
+                                            for participant in list_participants])
+
+        list_answer_submissions = []
+        list_feedback_answer_submissions = []
+        for test_submission in TestSubmission.objects.filter(test=test):
+            int_answers_right = 0
+            for question, list_answers in dict_question_answers.items():
+                if question.type == 'text':
+                    str_content = generator.choice(LIST_TEXT_ANSWERS)
+                    list_chosen = [(list_answers[0], str_content, str_content == list_answers[0].content)]
+                elif question.type == 'one':
+                    answer = generator.choice(list_answers)
+                    list_chosen = [(answer, answer.content, answer.is_right)]
+                else:
+                    list_chosen = [(answer, answer.content, answer.is_right)
+                                   for answer in generator.sample(list_answers, generator.randint(1, 2))]
+                if all(bool_right for _, _, bool_right in list_chosen):
+                    int_answers_right += 1
+                list_answer_submissions.extend(
+                    QuestionAnswerSubmission(test_submission=test_submission, question=question, answer=answer,
+                                             content=str_content, is_right=bool_right)
+                    for answer, str_content, bool_right in list_chosen
+                )
+            for int_question_feedback, list_answers in dict_feedback_answers.items():
+                answer = generator.choice(list_answers)
+                list_feedback_answer_submissions.append(
+                    QuestionFeedbackAnswerSubmission(test_submission=test_submission,
+                                                     question_id=int_question_feedback, answer=answer,
+                                                     content=answer.content or 'Feedback')
+                )
+            test_submission.right_answers_number = int_answers_right
+            test_submission.save(update_fields=['right_answers_number'])
+        QuestionAnswerSubmission.objects.bulk_create(list_answer_submissions)
+        QuestionFeedbackAnswerSubmission.objects.bulk_create(list_feedback_answer_submissions)
+
+        test.date_close = localtime()
+        test.save()
+        Test.objects.filter(id=test.id).update(version=options['participants'])
+        recompute_scores([test.id])
+        self.stdout.write('Created test id = {} (owner id = {}, {} submissions).'.format(
+            test.id, owner.id, options['participants']))
@@ -0,0 +1,21 @@
+"""
+Creates full-text search index structures (FTS5 table on SQLite, GIN index on PostgreSQL is created by migrations)
+and indexes tests missing in index (release step, see Procfile).
+
+    $ ./manage.py setup_search
+    $ ./manage.py setup_search --all     # reindex all tests (e.g. after SEARCH_CONFIG change)
+"""
+from django.core.management.base import BaseCommand
+
+from quiez.rest_api.search import setup_index
+
+
+class Command(BaseCommand):
+    help = 'Creates full-text search index structures and indexes tests missing in index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reindex all tests.')
+
+    def handle(self, *args, **options):
+        str_backend, int_indexed = setup_index(options['all'])
+        self.stdout.write('Search index is ready ({}), {} tests indexed.'.format(str_backend, int_indexed))
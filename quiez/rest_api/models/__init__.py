@@ -0,0 +1 @@
+from . import organization, test, question, answer, draft, queue, analytics, deletion  # noqa: F401
@@ -0,0 +1,36 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+from .question import QuestionFeedback
+from .answer import QuestionFeedbackAnswer
+from .test import Test
+
+
+class FeedbackAnswerRollup(models.Model):
+    """
+    Daily feedback answer choices number of test.
+        - Refreshed incrementally from QuestionFeedbackAnswerSubmission (see analytics module).
+        - Owner is denormalized from test for reading all owner tests.
+    """
+    id = models.AutoField(primary_key=True)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=False, related_name='+')
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, null=False, related_name='+')
+    question = models.ForeignKey(QuestionFeedback, on_delete=models.CASCADE, null=False, related_name='+')
+    answer = models.ForeignKey(QuestionFeedbackAnswer, on_delete=models.CASCADE, null=False, related_name='+')
+    date = models.DateField(null=False)     # submission date
+    choices_number = models.IntegerField(null=False, default=0)
+
+    class Meta:
+        unique_together = ('test', 'question', 'answer', 'date')
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['owner', 'date'], name='feedback_rollup_owner_idx'),
+        ]
+
+
+class RollupLock(models.Model):
+    """
+    Row locked by rollup refresh, so concurrent refreshes of the same rollup run one after another.
+    """
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100, null=False, unique=True)
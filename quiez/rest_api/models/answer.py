@@ -70,3 +70,10 @@ class QuestionFeedbackAnswerSubmission(AbstractAnswerSubmission):
                                  related_name='+')
     answer = models.ForeignKey(QuestionFeedbackAnswer, on_delete=models.CASCADE, null=False,
                                related_name='+')
+    rolled_up = models.BooleanField(null=False, default=False)  # counted in FeedbackAnswerRollup
+
+    class Meta(AbstractAnswerSubmission.Meta):
+        indexes = [
+            # few rows are not rolled up yet, refresh finds them by index
+            models.Index(fields=['rolled_up'], name='feedback_rolled_up_idx'),
+        ]
@@ -0,0 +1,15 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class DeletedUser(models.Model):
+    """
+    Soft-deleted user.
+        - User is deactivated at once, his tests are soft-deleted, his submissions and other content
+        are removed by purge_deleted command (see purge module).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    date_delete = models.DateTimeField(null=False, auto_now_add=True)
+
+    class Meta:
+        ordering = ['date_delete']
@@ -0,0 +1,23 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+from .test import Test
+
+
+class DraftAnswer(models.Model):
+    """
+    Draft answers of test question saved during test passing.
+        - Append-only: every save inserts new row, latest row of question wins (see drafts module).
+        - Rows are deleted when draft is finalized into TestSubmission.
+    """
+    id = models.AutoField(primary_key=True)
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, null=False, related_name='+')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=False, related_name='+')
+    question_id = models.IntegerField(null=False)   # Question or QuestionFeedback id
+    is_feedback = models.BooleanField(null=False, default=False)
+    answers = models.TextField(null=False)      # JSON list of answers in test submission format
+    date_save = models.DateTimeField(null=False, auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        index_together = ('test', 'user')
@@ -0,0 +1,37 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class Organization(models.Model):
+    """
+    Organization (tenant) model class.
+        - Tests of organization are visible only to its members (see tenancy module).
+    """
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=150, null=False)
+    date_creation = models.DateTimeField(null=False, auto_now_add=True)
+    members = models.ManyToManyField(User, through='Membership', related_name='organizations')
+
+    class Meta:
+        ordering = ['id']
+
+
+class Membership(models.Model):
+    """
+    Organization membership model class.
+        - Admins add members, creator of organization is its admin.
+    """
+    ADMIN = 'admin'
+    MEMBER = 'member'
+
+    id = models.AutoField(primary_key=True)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, null=False, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=False, related_name='memberships')
+    role = models.CharField(choices=(
+        (ADMIN, "manages members"),
+        (MEMBER, "creates and passes tests")
+    ), max_length=6, null=False, default=MEMBER)
+    date_join = models.DateTimeField(null=False, auto_now_add=True)
+
+    class Meta:
+        unique_together = ('organization', 'user')
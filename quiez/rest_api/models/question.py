@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Q
+from django.contrib.auth.models import User
 
 from .test import Test
 
@@ -21,12 +23,46 @@ class AbstractQuestion(models.Model):
         ordering = ['id']  # sorted by id ascending (old first)
 
 
+class QuestionQuerySet(models.QuerySet):
+    """
+    Question queryset class.
+    """
+    def of_test(self, test_id: int):
+        """
+        Filters questions of test: own questions and linked question bank versions.
+
+        :param test_id: test id.
+        :return: filtered queryset.
+        """
+        return self.filter(Q(test_id=test_id) |
+                           Q(id__in=Question.bank_tests.through.objects
+                             .filter(test_id=test_id)
+                             .values('question_id')))
+
+    def bank_latest(self, owner_id: int):
+        """
+        Filters latest versions of owner question bank.
+
+        :param owner_id: question bank owner id.
+        :return: filtered queryset.
+        """
+        return self.filter(owner_id=owner_id, test__isnull=True, next_versions__isnull=True)
+
+
 class Question(AbstractQuestion):
     """
     Question model class.
         - Extends AbstractQuestion class with many-to-one relation with test.
+        - Question bank version if test is null: immutable, shared by tests via many-to-many relation,
+        editing creates new version (copy-on-write), so tests and submissions keep referencing old one.
     """
-    test = models.ForeignKey(Test, on_delete=models.CASCADE, null=False, related_name="questions")
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, null=True, related_name="questions")   # null for bank
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name="bank_questions")
+    version = models.IntegerField(null=False, default=1)
+    previous = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, related_name="next_versions")
+    bank_tests = models.ManyToManyField(Test, related_name="bank_questions")
+
+    objects = QuestionQuerySet.as_manager()
 
 
 class QuestionFeedback(AbstractQuestion):
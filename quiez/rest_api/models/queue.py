@@ -0,0 +1,34 @@
+import uuid
+
+from django.db import models
+from django.contrib.auth.models import User
+
+from .test import Test
+
+
+class QueuedSubmission(models.Model):
+    """
+    Validated test submission waiting to be written (write-behind queue, see submission_queue module).
+        - Drained by drain_submission_queue command in bulk batches.
+    """
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = models.AutoField(primary_key=True)
+    token = models.UUIDField(null=False, unique=True, default=uuid.uuid4)
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, null=False, related_name='+')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=False, related_name='+')
+    data = models.TextField(null=False)     # JSON of validated submission
+    status = models.CharField(choices=(
+        (PENDING, "waiting to be written"),
+        (DONE, "written"),
+        (FAILED, "not written")
+    ), max_length=7, null=False, default=PENDING)
+    detail = models.CharField(max_length=250, null=True)   # failure reason
+    date_queue = models.DateTimeField(null=False, auto_now_add=True)
+    date_process = models.DateTimeField(null=True)
+
+    class Meta:
+        ordering = ['id']
+        index_together = (('status', 'id'), ('test', 'status'))
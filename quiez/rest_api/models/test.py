@@ -1,28 +1,88 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.utils.timezone import localtime
 
+from .organization import Organization
+
+
+class TestQuerySet(models.QuerySet):
+    """
+    Test queryset class.
+    """
+    def alive(self):
+        """
+        Filters tests which are not deleted (deleted tests wait for purge_deleted command).
+
+        :return: filtered queryset.
+        """
+        return self.filter(date_delete__isnull=True)
+
+    def of_organization(self, organization_id):
+        """
+        Filters tests of tenant (tenant column leads test_tenant_idx index).
+
+        :param organization_id: organization id, None - tests without organization.
+        :return: filtered queryset.
+        """
+        return self.filter(organization_id=organization_id)
+
 
 class Test(models.Model):
     """
     Test model class.
+        - organization: tenant of test, None for tests created without organization.
     """
     id = models.AutoField(primary_key=True)
     questions_number = models.IntegerField(null=False)
     date_creation = models.DateTimeField(null=False)
     date_open = models.DateTimeField(null=True)
     date_close = models.DateTimeField(null=True)
+    date_delete = models.DateTimeField(null=True)     # soft-delete, rows are removed by purge_deleted command
     name = models.CharField(max_length=150, null=True)
     description = models.CharField(max_length=250, null=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, null=False, related_name="tests")
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, null=True, related_name="tests")
+    version = models.IntegerField(null=False, default=0)   # incremented on structure change and submission
+    search_vector = SearchVectorField(null=True)    # PostgreSQL full-text search document (see search module)
+    shuffle = models.BooleanField(null=False, default=False)   # questions and answers order per participant
+    # denormalized score distribution of submissions, updated on submission (see scores module)
+    # None - not computed yet (tests created before denormalization), computed on release or on first read
+    participants_number = models.IntegerField(null=True)
+    right_answers_sum = models.IntegerField(null=False, default=0)
+    right_answers_min = models.IntegerField(null=True)
+    right_answers_max = models.IntegerField(null=True)
+    score_histogram = models.TextField(null=False, default='')     # participants per right answers number
+
+    objects = TestQuerySet.as_manager()
 
     class Meta:
         ordering = ['-id']      # sorted by id descending (new first)
+        indexes = [
+            # tenant lists in default order
+            models.Index(fields=['organization', '-id'], name='test_tenant_idx'),
+            # full-text search (see search module)
+            GinIndex(fields=['search_vector'], name='test_search_vector_gin'),
+        ]
+
+    @staticmethod
+    def increment_version(test_id: int) -> None:
+        """
+        Increments test version atomically (without loading instance).
+
+        :param test_id: id of test to increment version.
+        :return: None
+        """
+        Test.objects.filter(id=test_id).update(version=F('version') + 1)
 
     def save(self, *args, **kwargs):
         if not self.pk:
             if not self.date_creation:  # automatically fill date_creation when save instance
                 self.date_creation = localtime()
+            if self.participants_number is None:    # new test has no submissions
+                self.participants_number = 0
 
         super().save(*args, **kwargs)
 
@@ -50,10 +110,32 @@ class TestSubmission(models.Model):
 
     class Meta:
         ordering = ['-id']      # sorted by id descending (new first)
+        indexes = [
+            # leaderboard order (see leaderboard module)
+            models.Index(fields=['test', '-right_answers_number', 'date_submission'], name='submission_rank_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.pk:
+        bool_created = not self.pk
+        if bool_created:
             if not self.date_submission:  # automatically fill date_submission when save instance
                 self.date_submission = localtime()
 
         super().save(*args, **kwargs)
+
+        if bool_created:
+            Test.increment_version(self.test_id)
+
+
+class TestSubmissionKey(models.Model):
+    """
+    Idempotency key of test submission made by batch submission sync.
+        - Repeated key of the same user returns already created submission instead of creating new one.
+    """
+    id = models.AutoField(primary_key=True)
+    key = models.CharField(max_length=100, null=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=False, related_name='+')
+    test_submission = models.ForeignKey(TestSubmission, on_delete=models.CASCADE, null=False, related_name='+')
+
+    class Meta:
+        unique_together = ('user', 'key')
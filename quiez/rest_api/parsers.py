@@ -0,0 +1,31 @@
+"""
+Fast JSON parser.
+
+* Uses orjson when it is installed and falls back to DRF (stdlib json) parser otherwise.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser based on orjson.
+        - orjson accepts only UTF-8 and rejects NaN / Infinity (same as strict DRF parser),
+        other encodings and non-strict mode are handled by DRF JSONParser.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Parses the incoming bytestream as JSON and returns the resulting data.
+        """
+        parser_context = parser_context or {}
+        str_encoding = parser_context.get('encoding', 'utf-8')
+        if orjson is None or not self.strict or str_encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
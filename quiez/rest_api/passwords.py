@@ -0,0 +1,88 @@
+"""
+Password hashing.
+
+* PBKDF2 hasher with work factor configured by settings.
+* Hashing in bounded process pool, so bursts of registrations do not saturate request workers' CPU.
+Pool processes are forked (they inherit configured Django), where fork is not available hashing runs in request thread.
+* Number of pending hashes (running and queued) is limited by PASSWORD_HASHING_QUEUE, registrations over it
+are rejected at once instead of queueing CPU work, jobs not started before timeout are cancelled.
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+
+_executor = None
+_executor_pid = None
+_executor_pending = None
+_executor_lock = threading.Lock()
+
+
+class PasswordHashingBusy(Exception):
+    """
+    Password hashing pool has PASSWORD_HASHING_QUEUE pending hashes.
+    """
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 password hasher with PASSWORD_PBKDF2_ITERATIONS iterations.
+        - Same algorithm name as Django hasher, so existing hashes are verified
+        and updated to the configured work factor on next login.
+    """
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+def _get_executor() -> tuple:
+    """
+    Returns password hashing process pool of current process, creates it if needed.
+
+    :return: process pool executor and semaphore of its pending hashes (None, None if fork is not available).
+    """
+    global _executor, _executor_pid, _executor_pending
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return None, None
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # Python 3.6 pool always uses default start method, which is fork where it is available
+            dict_kwargs = {'mp_context': multiprocessing.get_context('fork')} if sys.version_info >= (3, 7) else {}
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASHING_WORKERS, **dict_kwargs)
+            _executor_pid = os.getpid()
+            _executor_pending = threading.BoundedSemaphore(max(settings.PASSWORD_HASHING_QUEUE,
+                                                               settings.PASSWORD_HASHING_WORKERS))
+    return _executor, _executor_pending
+
+
+def hash_password(str_password: str) -> str:
+    """
+    Hashes password in process pool (in current thread if PASSWORD_HASHING_WORKERS = 0 or fork is not available).
+
+    :param str_password: raw password.
+    :return: encoded password hash.
+    :raise PasswordHashingBusy: if pool already has PASSWORD_HASHING_QUEUE pending hashes.
+    :raise concurrent.futures.TimeoutError: if hash is not ready in PASSWORD_HASHING_TIMEOUT seconds.
+    """
+    if settings.PASSWORD_HASHING_WORKERS <= 0:
+        return make_password(str_password)
+    executor, semaphore_pending = _get_executor()
+    if executor is None:
+        return make_password(str_password)
+    if not semaphore_pending.acquire(blocking=False):
+        raise PasswordHashingBusy()
+    try:
+        future = executor.submit(make_password, str_password)
+    except BaseException:
+        semaphore_pending.release()
+        raise
+    # slot is released when job finishes or is cancelled, so abandoned running jobs still count
+    future.add_done_callback(lambda _: semaphore_pending.release())
+    try:
+        return future.result(timeout=settings.PASSWORD_HASHING_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
@@ -1,10 +1,9 @@
 """
-Separate script for generating feedback questions - answers.
+Generating feedback questions - answers.
 
-* Run it after migrations and before application use.
+* Run it after migrations and before application use (generate_feedback_questions command, Procfile release step).
 
-    $ ./manage.py shell
-    >> exec(open('quiez/rest_api/prerequisites.py').read())
+    $ ./manage.py generate_feedback_questions
 """
 from quiez.rest_api.models.question import QuestionFeedback
 from quiez.rest_api.models.answer import QuestionFeedbackAnswer
@@ -70,6 +69,3 @@ def _generate_feedback_questions() -> None:
     tuple_question_general_impression = QuestionFeedback.objects.get_or_create(**data)
     if tuple_question_general_impression[1]:
         _bind_answers(tuple_question_general_impression[0], list_str_answers)
-
-
-generate_feedback_questions()
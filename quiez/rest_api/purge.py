@@ -0,0 +1,149 @@
+"""
+Soft-delete and background purge of tests and users.
+
+* Deletion in request only marks rows (Test.date_delete, DeletedUser), deleted tests disappear from all views at once.
+* purge_deleted command removes rows afterwards: submissions and other large child tables are deleted
+in bounded batches (submission id ranges) with raw DELETE statements, without Django deletion collector
+loading them into Python, every batch in own short transaction. Remaining small rows are deleted by collector.
+"""
+import time
+
+from django.db import connections, router, transaction
+from django.utils.timezone import localtime
+
+from .analytics import subtract_from_rollup
+from .models.answer import QuestionAnswerSubmission, QuestionFeedbackAnswerSubmission
+from .models.deletion import DeletedUser
+from .models.draft import DraftAnswer
+from .models.queue import QueuedSubmission
+from .models.test import Test, TestSubmission, TestSubmissionKey
+from .scores import recompute_scores
+
+
+def soft_delete_test(test_id: int) -> None:
+    """
+    Marks test deleted.
+
+    :param test_id: test id.
+    :return: None
+    """
+    Test.objects.filter(id=test_id, date_delete__isnull=True).update(date_delete=localtime())
+
+
+def soft_delete_user(user) -> None:
+    """
+    Deactivates user (token authentication rejects him) and marks him and his tests deleted.
+
+    :param user: User model instance.
+    :return: None
+    """
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        DeletedUser.objects.get_or_create(user=user)
+        Test.objects.filter(owner_id=user.id, date_delete__isnull=True).update(date_delete=localtime())
+
+
+def _raw_delete(model, str_column: str, queryset_ids) -> int:
+    """
+    Deletes rows referencing selected ids with single DELETE statement.
+
+    :param model: model of deleted rows.
+    :param str_column: column referencing ids.
+    :param queryset_ids: queryset of single id column.
+    :return: number of deleted rows.
+    """
+    str_sql, tuple_params = queryset_ids.query.sql_with_params()
+    with connections[router.db_for_write(model)].cursor() as cursor:
+        cursor.execute('DELETE FROM {} WHERE {} IN ({})'.format(model._meta.db_table, str_column, str_sql),
+                       tuple_params)
+        return cursor.rowcount
+
+
+def _delete_in_batches(queryset, int_batch_size: int, float_sleep: float, list_children: tuple = (),
+                       progress=None, before_delete=None) -> int:
+    """
+    Deletes queryset rows and their children in batches of id ranges.
+
+    :param queryset: deleted rows.
+    :param int_batch_size: maximum number of rows per batch.
+    :param float_sleep: pause between batches in seconds (leaves database time for requests).
+    :param list_children: pairs (child model, column referencing deleted rows), deleted before rows.
+    :param progress: function called with number of deleted rows after every batch.
+    :param before_delete: function called with queryset of batch ids in batch transaction before deletion.
+    :return: number of deleted rows.
+    """
+    model = queryset.model
+    int_deleted = 0
+    while True:
+        list_ids = list(queryset.order_by('id').values_list('id', flat=True)[:int_batch_size])
+        if not list_ids:
+            return int_deleted
+        # range is bounded by ids of batch, so it is a range scan of primary key index
+        queryset_batch = queryset.order_by().filter(id__gte=list_ids[0], id__lte=list_ids[-1]).values('id')
+        with transaction.atomic(using=router.db_for_write(model)):
+            if before_delete is not None:
+                before_delete(queryset_batch)
+            for child_model, str_column in list_children:
+                _raw_delete(child_model, str_column, queryset_batch)
+            int_deleted += _raw_delete(model, 'id', queryset_batch)
+        if progress is not None:
+            progress(int_deleted)
+        if float_sleep:
+            time.sleep(float_sleep)
+
+
+SUBMISSION_CHILDREN = (
+    (QuestionAnswerSubmission, 'test_submission_id'),
+    (QuestionFeedbackAnswerSubmission, 'test_submission_id'),
+    (TestSubmissionKey, 'test_submission_id'),
+)
+
+
+def purge_test(test_id: int, int_batch_size: int, float_sleep: float, progress=None) -> int:
+    """
+    Removes deleted test with its submissions, drafts and queued submissions.
+
+    :param test_id: id of deleted test.
+    :param int_batch_size: maximum number of rows per batch.
+    :param float_sleep: pause between batches in seconds.
+    :param progress: function called with number of deleted submissions after every batch.
+    :return: number of deleted submissions.
+    """
+    int_deleted = _delete_in_batches(TestSubmission.objects.filter(test_id=test_id), int_batch_size, float_sleep,
+                                     SUBMISSION_CHILDREN, progress)
+    _delete_in_batches(DraftAnswer.objects.filter(test_id=test_id), int_batch_size, float_sleep)
+    _delete_in_batches(QueuedSubmission.objects.filter(test_id=test_id), int_batch_size, float_sleep)
+    # questions, answers and links are bounded by test size
+    with transaction.atomic():
+        Test.objects.filter(id=test_id, date_delete__isnull=False).delete()
+    return int_deleted
+
+
+def purge_user(user_id: int, int_batch_size: int, float_sleep: float, progress=None) -> int:
+    """
+    Removes deleted user with his tests, submissions and other content.
+        - Score distributions of other tests he submitted are recomputed, his feedback answers are subtracted
+        from feedback analytics rollup of their owners.
+
+    :param user_id: id of deleted user.
+    :param int_batch_size: maximum number of rows per batch.
+    :param float_sleep: pause between batches in seconds.
+    :param progress: function called with number of deleted submissions after every batch.
+    :return: number of deleted submissions.
+    """
+    list_submitted_test_ids = list(TestSubmission.objects.filter(user_id=user_id).order_by()
+                                   .values_list('test_id', flat=True).distinct())
+    int_deleted = _delete_in_batches(TestSubmission.objects.filter(user_id=user_id), int_batch_size, float_sleep,
+                                     SUBMISSION_CHILDREN, progress, subtract_from_rollup)
+    for int_start in range(0, len(list_submitted_test_ids), int_batch_size):
+        with transaction.atomic():
+            recompute_scores(list_submitted_test_ids[int_start:int_start + int_batch_size])
+    _delete_in_batches(DraftAnswer.objects.filter(user_id=user_id), int_batch_size, float_sleep)
+    _delete_in_batches(QueuedSubmission.objects.filter(user_id=user_id), int_batch_size, float_sleep)
+    for test_id in Test.objects.filter(owner_id=user_id).values_list('id', flat=True):
+        int_deleted += purge_test(test_id, int_batch_size, float_sleep, progress)
+    # bank questions, memberships, tokens and analytics rows are left for collector
+    with transaction.atomic():
+        DeletedUser.objects.filter(user_id=user_id).select_related('user').get().user.delete()
+    return int_deleted
@@ -0,0 +1,45 @@
+"""
+Fast JSON renderer.
+
+* Uses orjson when it is installed and falls back to DRF (stdlib json) renderer otherwise.
+* Output is byte-compatible with DRF JSONRenderer: compact separators, raw unicode,
+escaped line / paragraph separators, datetimes via DRF encoder ('Z' suffix for UTC).
+* Except floats: exponent notation differs ('1e16' instead of '1e+16', '1.5e-7' instead of '1.5e-07')
+and NaN / Infinity are rendered as null instead of error. API floats (score mean) are rounded
+decimals and render the same (see tests).
+"""
+from rest_framework.renderers import JSONRenderer
+
+from quiez.quiez.profiling import section
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer based on orjson.
+        - Indented output (browsable API, 'indent' media type parameter), non-compact or ASCII-only settings
+        and values orjson can not encode (e.g. integers over 64 bit) are rendered by DRF JSONRenderer.
+    """
+    if orjson is not None:
+        # datetimes are passed to DRF encoder to keep its formatting
+        orjson_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | \
+                         getattr(orjson, 'OPT_PASSTHROUGH_DATACLASS', 0)
+
+    @section('renderer.render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render `data` into JSON, returning a bytestring.
+        """
+        if orjson is None or data is None or not self.compact or self.ensure_ascii or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.orjson_options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # same escaping of line / paragraph separators as in DRF JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
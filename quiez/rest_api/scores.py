@@ -0,0 +1,156 @@
+"""
+Denormalized test score distribution.
+
+* Test keeps participants number, sum / min / max of right answers numbers and histogram
+(number of participants per right answers number), so lists and result overview do not read submissions.
+* Scores are added in transaction of submission with test row locked, so concurrent submissions do not lose updates.
+* Tests created before denormalization have participants number None, their distributions are computed
+by `repair_test_scores --missing` (release step) or on first read (fill_missing_scores).
+* Histogram is stored as comma separated counts, index is right answers number ('3,0,5' - three participants
+with no right answers, five with two).
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from .models.test import Test, TestSubmission
+
+SCORE_FIELDS = ('participants_number', 'right_answers_sum', 'right_answers_min', 'right_answers_max',
+                'score_histogram')
+
+
+def parse_histogram(str_histogram: str) -> list:
+    return [int(str_count) for str_count in str_histogram.split(',')] if str_histogram else []
+
+
+def format_histogram(list_histogram: list) -> str:
+    return ','.join(str(int_count) for int_count in list_histogram)
+
+
+def score_to_representation(row: tuple) -> dict:
+    """
+    Converts score fields to JSON.
+
+    :param row: values of SCORE_FIELDS.
+    :return: JSON of score distribution (mean is None without participants).
+    """
+    _, int_sum, int_min, int_max, str_histogram = row
+    list_histogram = parse_histogram(str_histogram)
+    int_scored = sum(list_histogram)
+    return {
+        'mean': round(int_sum / int_scored, 2) if int_scored else None,
+        'min': int_min,
+        'max': int_max,
+        'histogram': list_histogram,
+    }
+
+
+def _add_to_histogram(list_histogram: list, int_score, int_number: int = 1) -> None:
+    """
+    Adds participants with right answers number to histogram.
+
+    :param list_histogram: histogram counts (extended if needed).
+    :param int_score: right answers number (None - not computed, not added).
+    :param int_number: number of participants.
+    :return: None
+    """
+    if int_score is None:
+        return
+    if int_score >= len(list_histogram):
+        list_histogram.extend([0] * (int_score + 1 - len(list_histogram)))
+    list_histogram[int_score] += int_number
+
+
+def _score_fields(list_histogram: list, int_participants: int) -> dict:
+    """
+    Computes score fields from histogram.
+
+    :param list_histogram: histogram counts.
+    :param int_participants: participants number.
+    :return: dictionary of Test field values.
+    """
+    list_scores = [int_score for int_score, int_count in enumerate(list_histogram) if int_count]
+    return {
+        'participants_number': int_participants,
+        'right_answers_sum': sum(int_score * int_count for int_score, int_count in enumerate(list_histogram)),
+        'right_answers_min': list_scores[0] if list_scores else None,
+        'right_answers_max': list_scores[-1] if list_scores else None,
+        'score_histogram': format_histogram(list_histogram),
+    }
+
+
+def add_scores(list_submissions: list) -> None:
+    """
+    Adds new submissions to score distribution of their tests (should be called in transaction).
+
+    :param list_submissions: created TestSubmission model instances.
+    :return: None
+    """
+    dict_test_submissions = {}
+    for test_submission in list_submissions:
+        dict_test_submissions.setdefault(test_submission.test_id, []).append(test_submission)
+    list_missing_test_ids = []
+    # tests are locked in id order, so concurrent batches do not deadlock
+    for test_id, int_participants, str_histogram in Test.objects.select_for_update() \
+            .filter(id__in=dict_test_submissions) \
+            .order_by('id') \
+            .values_list('id', 'participants_number', 'score_histogram'):
+        if int_participants is None:
+            # not computed yet, new submissions are already written
+            list_missing_test_ids.append(test_id)
+            continue
+        list_histogram = parse_histogram(str_histogram)
+        for test_submission in dict_test_submissions[test_id]:
+            _add_to_histogram(list_histogram, test_submission.right_answers_number)
+        Test.objects.filter(id=test_id).update(
+            **_score_fields(list_histogram, int_participants + len(dict_test_submissions[test_id]))
+        )
+    if list_missing_test_ids:
+        recompute_scores(list_missing_test_ids)
+
+
+def recompute_scores(list_test_ids: list) -> None:
+    """
+    Recomputes score distribution of tests from their submissions with single aggregation query
+    (should be called in transaction).
+
+    :param list_test_ids: ids of tests.
+    :return: None
+    """
+    # locked as in add_scores, so submissions made during recomputation are not lost
+    list_test_ids = list(Test.objects.select_for_update().filter(id__in=list_test_ids).order_by('id')
+                         .values_list('id', flat=True))
+    dict_test_scores = {test_id: ([], 0) for test_id in list_test_ids}
+    for test_id, int_score, int_number in TestSubmission.objects \
+            .filter(test_id__in=list_test_ids) \
+            .order_by() \
+            .values_list('test_id', 'right_answers_number') \
+            .annotate(number=Count('id')):
+        list_histogram, int_participants = dict_test_scores[test_id]
+        _add_to_histogram(list_histogram, int_score, int_number)
+        dict_test_scores[test_id] = (list_histogram, int_participants + int_number)
+    for test_id, (list_histogram, int_participants) in dict_test_scores.items():
+        Test.objects.filter(id=test_id).update(**_score_fields(list_histogram, int_participants))
+
+
+def fill_missing_scores(list_test_ids: list) -> dict:
+    """
+    Computes score distribution of tests which do not have it yet.
+
+    :param list_test_ids: ids of tests with participants number None.
+    :return: dictionary test id - values of SCORE_FIELDS.
+    """
+    with transaction.atomic():
+        recompute_scores(list_test_ids)
+    return {row[0]: row[1:] for row in Test.objects.filter(id__in=list_test_ids).values_list('id', *SCORE_FIELDS)}
+
+
+def ensure_test_scores(test: Test) -> None:
+    """
+    Computes score distribution of test instance if it does not have it yet.
+
+    :param test: Test model instance.
+    :return: None
+    """
+    if test.participants_number is None:
+        for str_field, value in zip(SCORE_FIELDS, fill_missing_scores([test.id])[test.id]):
+            setattr(test, str_field, value)
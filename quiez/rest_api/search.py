@@ -0,0 +1,164 @@
+"""
+Full-text search over tests (name, description, questions descriptions).
+
+* PostgreSQL: Test.search_vector column with GIN index (declared in Test model, created by migrations),
+ranked by ts_rank.
+* SQLite: FTS5 virtual table (rowid = test id), ranked by bm25.
+* Other databases (or missing index): unranked icontains fallback.
+* Index is updated on test creation (index_test), `./manage.py setup_search` (release step) creates FTS5 table
+and indexes tests missing in index.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, router
+from django.db.models import F, Q, TextField, Value
+
+from .models.question import Question
+from .models.test import Test
+
+FTS_TABLE = 'rest_api_test_fts'
+
+_set_fts_aliases = set()  # aliases of databases where FTS table is known to exist
+
+
+def _get_connection(bool_write: bool = False):
+    str_alias = router.db_for_write(Test) if bool_write else router.db_for_read(Test)
+    return connections[str_alias]
+
+
+def _has_fts_table(connection) -> bool:
+    if connection.alias not in _set_fts_aliases and FTS_TABLE in connection.introspection.table_names():
+        _set_fts_aliases.add(connection.alias)
+    return connection.alias in _set_fts_aliases
+
+
+def _get_questions_texts(list_test_ids: list) -> dict:
+    """
+    Reads questions descriptions of tests.
+
+    :param list_test_ids: test ids.
+    :return: dictionary test id - questions descriptions joined into one text.
+    """
+    dict_texts = {}
+    for test_id, description in Question.objects \
+            .filter(test_id__in=list_test_ids) \
+            .values_list('test_id', 'description'):
+        dict_texts.setdefault(test_id, []).append(description)
+    for test_id, description in Question.bank_tests.through.objects \
+            .filter(test_id__in=list_test_ids) \
+            .values_list('test_id', 'question__description'):
+        dict_texts.setdefault(test_id, []).append(description)
+    return {test_id: '\n'.join(list_descriptions) for test_id, list_descriptions in dict_texts.items()}
+
+
+def index_tests(list_tests: list) -> None:
+    """
+    Adds tests (with their questions) to search index.
+
+    :param list_tests: Test model instances.
+    :return: None
+    """
+    connection = _get_connection(bool_write=True)
+    dict_texts = _get_questions_texts([test.id for test in list_tests])
+    if connection.vendor == 'postgresql':
+        str_config = settings.SEARCH_CONFIG
+        for test in list_tests:
+            Test.objects.filter(id=test.id).update(search_vector=(
+                SearchVector('name', weight='A', config=str_config) +
+                SearchVector('description', weight='B', config=str_config) +
+                SearchVector(Value(dict_texts.get(test.id, ''), output_field=TextField()), weight='C',
+                             config=str_config)
+            ))
+    elif connection.vendor == 'sqlite' and _has_fts_table(connection):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT OR REPLACE INTO {} (rowid, name, description, questions) VALUES (%s, %s, %s, %s)'
+                .format(FTS_TABLE),
+                [(test.id, test.name or '', test.description or '', dict_texts.get(test.id, ''))
+                 for test in list_tests]
+            )
+
+
+def index_test(test: Test) -> None:
+    """
+    Adds test to search index (called after test and its questions are created).
+
+    :param test: Test model instance.
+    :return: None
+    """
+    index_tests([test])
+
+
+def setup_index(bool_all: bool = False) -> tuple:
+    """
+    Creates search index structures of current database (FTS5 table) and indexes tests missing in index.
+
+    :param bool_all: reindex all tests.
+    :return: tuple (name of used search backend, number of indexed tests).
+    """
+    connection = _get_connection(bool_write=True)
+    queryset_tests = Test.objects.only('id', 'name', 'description')
+    if connection.vendor == 'postgresql':
+        str_backend = 'postgresql'
+        if not bool_all:
+            queryset_tests = queryset_tests.filter(search_vector__isnull=True)
+    elif connection.vendor == 'sqlite':
+        str_backend = 'sqlite fts5'
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5(name, description, questions)'
+                           .format(FTS_TABLE))
+            if not bool_all:
+                cursor.execute('SELECT rowid FROM {}'.format(FTS_TABLE))
+                queryset_tests = queryset_tests.exclude(id__in=[row[0] for row in cursor.fetchall()])
+    else:
+        return 'icontains', 0
+    list_tests = list(queryset_tests)
+    for int_start in range(0, len(list_tests), 500):
+        index_tests(list_tests[int_start:int_start + 500])
+    return str_backend, len(list_tests)
+
+
+def _quote_fts_query(str_query: str) -> str:
+    # every word is quoted, so user input can not use FTS5 query syntax
+    return ' '.join('"{}"'.format(str_word.replace('"', '""')) for str_word in str_query.split())
+
+
+def search_tests(str_query: str, organization_id, int_offset: int, int_limit: int) -> tuple:
+    """
+    Searches tests of tenant (not deleted) by name, description and questions descriptions.
+
+    :param str_query: search query.
+    :param organization_id: organization id, None - tests without organization.
+    :param int_offset: number of skipped results.
+    :param int_limit: maximum number of returned results.
+    :return: tuple (total number of found tests, list of found test ids ordered by rank).
+    """
+    connection = _get_connection()
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(str_query, config=settings.SEARCH_CONFIG)
+        queryset_found = Test.objects.alive().of_organization(organization_id).filter(search_vector=query)
+        list_ids = list(queryset_found
+                        .annotate(rank=SearchRank(F('search_vector'), query))
+                        .order_by('-rank', '-id')
+                        .values_list('id', flat=True)[int_offset:int_offset + int_limit])
+        return queryset_found.count(), list_ids
+    if connection.vendor == 'sqlite' and _has_fts_table(connection):
+        str_fts_query = _quote_fts_query(str_query)
+        if not str_fts_query:
+            return 0, []
+        with connection.cursor() as cursor:
+            # IS matches NULL organization too
+            str_from = 'FROM {0} JOIN {1} ON {1}.id = {0}.rowid ' \
+                       'WHERE {0} MATCH %s AND {1}.organization_id IS %s AND {1}.date_delete IS NULL' \
+                .format(FTS_TABLE, Test._meta.db_table)
+            cursor.execute('SELECT count(*) ' + str_from, [str_fts_query, organization_id])
+            int_count = cursor.fetchone()[0]
+            cursor.execute('SELECT {0}.rowid {1} ORDER BY bm25({0}), {0}.rowid DESC LIMIT %s OFFSET %s'
+                           .format(FTS_TABLE, str_from), [str_fts_query, organization_id, int_limit, int_offset])
+            return int_count, [row[0] for row in cursor.fetchall()]
+    queryset_found = Test.objects.alive().of_organization(organization_id) \
+        .filter(Q(name__icontains=str_query) | Q(description__icontains=str_query) |
+                Q(questions__description__icontains=str_query) |
+                Q(bank_questions__description__icontains=str_query)) \
+        .distinct()
+    return queryset_found.count(), list(queryset_found.values_list('id', flat=True)[int_offset:int_offset + int_limit])
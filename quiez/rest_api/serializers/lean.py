@@ -0,0 +1,135 @@
+"""
+Lean read-only test rendering.
+
+* Builds the same dictionaries as TestGetSerializer / TestGetConciseSerializer
+from values_list() rows with precompiled field extractors, without ModelSerializer per-field overhead.
+* Whole test is read with constant number of queries (test owner, questions, answers,
+feedback questions, feedback answers).
+"""
+from django.contrib.auth.models import User
+
+from rest_framework import serializers
+
+from quiez.quiez.profiling import section
+
+from ..models.test import Test
+from ..models.question import Question, QuestionFeedback
+from ..models.answer import QuestionAnswer, QuestionFeedbackAnswer
+from ..scores import SCORE_FIELDS, fill_missing_scores, score_to_representation
+
+_datetime_to_representation = serializers.DateTimeField().to_representation
+
+
+def _datetime(value):
+    return None if value is None else _datetime_to_representation(value)
+
+
+def _compile(fields: tuple, converters: dict = None):
+    """
+    Compiles row to dictionary extractor.
+
+    :param fields: output field names in order of row values.
+    :param converters: field name - value converter function (for non JSON native values).
+    :return: function converting row tuple to dictionary.
+    """
+    if not converters:
+        return lambda row: dict(zip(fields, row))
+    list_converters = [converters.get(field) for field in fields]
+    return lambda row: {field: converter(value) if converter else value
+                        for field, converter, value in zip(fields, list_converters, row)}
+
+
+# fields of read serializers (same order as in their Meta.fields)
+OWNER_FIELDS = ('id', 'first_name', 'last_name', 'email')
+TEST_FIELDS = ('id', 'name', 'description', 'date_creation', 'date_open', 'date_close')
+QUESTION_FIELDS = ('id', 'description', 'type')
+ANSWER_FIELDS = ('id', 'content', 'is_right')
+FEEDBACK_ANSWER_FIELDS = ('id', 'content')
+
+_owner = _compile(OWNER_FIELDS)
+_test = _compile(TEST_FIELDS, {'date_creation': _datetime, 'date_open': _datetime, 'date_close': _datetime})
+_question = _compile(QUESTION_FIELDS)
+_answer = _compile(ANSWER_FIELDS)
+_feedback_answer = _compile(FEEDBACK_ANSWER_FIELDS)
+
+
+def _group_answers(queryset_answers, str_parent_field: str, fields: tuple, extractor) -> dict:
+    """
+    Groups answer rows by parent question id.
+
+    :param queryset_answers: answers queryset.
+    :param str_parent_field: question foreign key field name.
+    :param fields: answer fields.
+    :param extractor: answer row extractor.
+    :return: dictionary question id - list of answer dictionaries.
+    """
+    dict_answers = {}
+    for row in queryset_answers.values_list(str_parent_field, *fields):
+        dict_answers.setdefault(row[0], []).append(extractor(row[1:]))
+    return dict_answers
+
+
+@section('lean.test_to_representation')
+def test_to_representation(test: Test) -> dict:
+    """
+    Converts Test instance to JSON, same as TestGetSerializer(test).data.
+
+    :param test: Test model instance.
+    :return: JSON of test instance.
+    """
+    dict_test = _test(tuple(getattr(test, field) for field in TEST_FIELDS))
+    dict_test['owner'] = _owner(User.objects.filter(id=test.owner_id).values_list(*OWNER_FIELDS).get())
+
+    list_questions_rows = list(Question.objects.of_test(test.id).values_list(*QUESTION_FIELDS))
+    dict_answers = _group_answers(QuestionAnswer.objects.filter(question_id__in=[row[0] for row in list_questions_rows]),
+                                  'question_id', ANSWER_FIELDS, _answer)
+    list_questions = []
+    for row in list_questions_rows:
+        dict_question = _question(row)
+        dict_question['answers'] = dict_answers.get(row[0], [])
+        list_questions.append(dict_question)
+    dict_test['questions'] = list_questions
+
+    list_questions_feedback_rows = list(QuestionFeedback.objects.filter(tests=test.id).values_list(*QUESTION_FIELDS))
+    dict_feedback_answers = _group_answers(
+        QuestionFeedbackAnswer.objects.filter(question_feedback_id__in=[row[0] for row in list_questions_feedback_rows]),
+        'question_feedback_id', FEEDBACK_ANSWER_FIELDS, _feedback_answer
+    )
+    list_questions_feedback = []
+    for row in list_questions_feedback_rows:
+        dict_question = _question(row)
+        dict_question['answers'] = dict_feedback_answers.get(row[0], [])
+        list_questions_feedback.append(dict_question)
+    dict_test['questions_feedback'] = list_questions_feedback
+    return dict_test
+
+
+@section('lean.tests_concise_to_representation')
+def tests_concise_to_representation(queryset_tests) -> list:
+    """
+    Converts Test queryset to JSON list, same as TestGetConciseSerializer(queryset_tests, many=True).data.
+        - Tests, owners and score distributions are read with single query.
+        - Missing score distributions (tests created before denormalization) are computed on first read.
+
+    :param queryset_tests: Test queryset.
+    :return: JSON list of tests.
+    """
+    int_test_fields = len(TEST_FIELDS)
+    int_owner_fields = int_test_fields + len(OWNER_FIELDS)
+    list_tests = []
+    dict_missing_scores = {}
+    for row in queryset_tests.values_list(*TEST_FIELDS, *('owner__' + field for field in OWNER_FIELDS),
+                                          *SCORE_FIELDS):
+        dict_test = _test(row[:int_test_fields])
+        dict_test['owner'] = _owner(row[int_test_fields:int_owner_fields])
+        if row[int_owner_fields] is None:
+            dict_missing_scores[dict_test['id']] = dict_test
+        else:
+            dict_test['participants_number'] = row[int_owner_fields]
+            dict_test['score'] = score_to_representation(row[int_owner_fields:])
+        list_tests.append(dict_test)
+    if dict_missing_scores:
+        for test_id, row in fill_missing_scores(list(dict_missing_scores)).items():
+            dict_missing_scores[test_id]['participants_number'] = row[0]
+            dict_missing_scores[test_id]['score'] = score_to_representation(row)
+    return list_tests
@@ -0,0 +1,43 @@
+from rest_framework import serializers
+
+from ..models.organization import Organization, Membership
+
+
+class OrganizationSerializer(serializers.ModelSerializer):
+    """
+    Organization instance serializer class.
+    """
+    class Meta:
+        model = Organization
+        fields = ('id', 'name', 'date_creation')
+        extra_kwargs = {
+            'id':            {'read_only': True},
+            'date_creation': {'read_only': True}
+        }
+
+
+class MembershipGetSerializer(serializers.ModelSerializer):
+    """
+    Organization member serializer class.
+
+    * Only for read purposes.
+    """
+    id = serializers.IntegerField(source='user.id')
+    first_name = serializers.CharField(source='user.first_name')
+    last_name = serializers.CharField(source='user.last_name')
+    email = serializers.CharField(source='user.email')
+
+    class Meta:
+        model = Membership
+        fields = ('id', 'first_name', 'last_name', 'email', 'role', 'date_join')
+
+
+class MembershipPostSerializer(serializers.Serializer):
+    """
+    Organization member addition serializer class.
+        - User is found by email.
+
+    * Only for creation purposes.
+    """
+    email = serializers.EmailField()
+    role = serializers.ChoiceField(choices=(Membership.ADMIN, Membership.MEMBER), default=Membership.MEMBER)
@@ -47,6 +47,19 @@ class QuestionGetSerializer(serializers.ModelSerializer):
         fields = ('id', 'description', 'type', 'answers')
 
 
+class QuestionBankGetSerializer(serializers.ModelSerializer):
+    """
+    Question bank version instance serializer class.
+
+    * Only for read purposes.
+    """
+    answers = QuestionAnswerGetSerializer(many=True)
+
+    class Meta:
+        model = Question
+        fields = ('id', 'description', 'type', 'version', 'previous', 'answers')
+
+
 class QuestionFeedbackGetSerializer(serializers.ModelSerializer):
     """
     Feedback question instance serializer class.
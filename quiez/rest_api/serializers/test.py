@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.contrib.auth.models import User
 
 from rest_framework import serializers
 
+from quiez.quiez.profiling import section
+
 from ..models.test import Test, TestSubmission
 from ..models.question import Question, QuestionFeedback
 from ..models.answer import QuestionAnswer, QuestionFeedbackAnswer,\
@@ -11,19 +14,47 @@ from .question import QuestionPostSerializer, QuestionGetSerializer, \
     QuestionFeedbackGetSerializer
 from .answer import QuestionAnswerSubmissionPostSerializer, QuestionFeedbackAnswerSubmissionPostSerializer
 from .auth import UserSerializer
+from .lean import test_to_representation
+from ..scores import SCORE_FIELDS, score_to_representation, add_scores, ensure_test_scores
+from ..search import index_test
+from ..text_answers import group_text_answers
 
 
 class TestPostSerializer(serializers.ModelSerializer):
     """
     Test instance serializer class.
+        - bank_questions: ids of question bank versions of request user, only link rows are inserted for them.
+        - shuffle: participants get questions and answers in their own order.
 
     * Only for creation purposes.
     """
-    questions = QuestionPostSerializer(many=True)
+    questions = QuestionPostSerializer(many=True, required=False)
+    bank_questions = serializers.ListField(child=serializers.IntegerField(), required=False)
 
     class Meta:
         model = Test
-        fields = ('name', 'description', 'questions')
+        fields = ('name', 'description', 'shuffle', 'questions', 'bank_questions')
+
+    def validate_bank_questions(self, list_bank_questions_ids):
+        set_bank_questions_ids = set(list_bank_questions_ids)
+        if len(set_bank_questions_ids) != len(list_bank_questions_ids):
+            raise serializers.ValidationError('Bank questions must not repeat.')
+        request = self.context.get('request')
+        set_existing_ids = set(Question.objects
+                               .filter(id__in=set_bank_questions_ids, test__isnull=True,
+                                       owner_id=request.user.id if request else None)
+                               .values_list('id', flat=True))
+        if set_existing_ids != set_bank_questions_ids:
+            raise serializers.ValidationError('There are not bank questions with ids = {}'.format(
+                sorted(set_bank_questions_ids - set_existing_ids)))
+        return list_bank_questions_ids
+
+    def validate(self, attrs):
+        if not attrs.get('questions') and not attrs.get('bank_questions'):
+            raise serializers.ValidationError({
+                'questions': 'Questions or bank questions list field is required.'
+            })
+        return attrs
 
     def create(self, validated_data):
         """
@@ -32,25 +63,32 @@ class TestPostSerializer(serializers.ModelSerializer):
         :param validated_data: validated json.
         :return: Test model instance.
         """
-        questions_data = validated_data.pop('questions')
-        validated_data['questions_number'] = len(questions_data)
+        questions_data = validated_data.pop('questions', [])
+        list_bank_questions_ids = validated_data.pop('bank_questions', [])
+        validated_data['questions_number'] = len(questions_data) + len(list_bank_questions_ids)
         test = Test.objects.create(**validated_data)
         for question_data in questions_data:
             serializer = QuestionPostSerializer(data=question_data)
             if serializer.is_valid():
                 serializer.validated_data['test'] = test
                 serializer.create(validated_data=serializer.validated_data)
+        Question.bank_tests.through.objects.bulk_create([
+            Question.bank_tests.through(test_id=test.id, question_id=question_id)
+            for question_id in list_bank_questions_ids
+        ])
+        index_test(test)
         return test
 
 
 class TestGetSerializer(serializers.ModelSerializer):
     """
     Test instance serializer class.
+        - Questions are own test questions and linked question bank versions.
 
     * Only for read purposes.
     """
     owner = UserSerializer(read_only=True)
-    questions = QuestionGetSerializer(many=True, read_only=True)
+    questions = serializers.SerializerMethodField()
     questions_feedback = QuestionFeedbackGetSerializer(many=True, read_only=True)
 
     class Meta:
@@ -58,19 +96,32 @@ class TestGetSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'description', 'date_creation', 'date_open', 'date_close',
                   'owner', 'questions', 'questions_feedback')
 
+    def get_questions(self, test):
+        return QuestionGetSerializer(Question.objects.of_test(test.id), many=True).data
+
 
 class TestGetConciseSerializer(serializers.ModelSerializer):
     """
     Test instance serializer class.
         - Concise description.
+        - Participants number and score distribution (denormalized, see scores module).
 
     * Only for read purposes.
     """
     owner = UserSerializer(read_only=True)
+    score = serializers.SerializerMethodField()
 
     class Meta:
         model = Test
-        fields = ('id', 'name', 'description', 'date_creation', 'date_open', 'date_close', 'owner')
+        fields = ('id', 'name', 'description', 'date_creation', 'date_open', 'date_close', 'owner',
+                  'participants_number', 'score')
+
+    def to_representation(self, test):
+        ensure_test_scores(test)
+        return super().to_representation(test)
+
+    def get_score(self, test):
+        return score_to_representation(tuple(getattr(test, field) for field in SCORE_FIELDS))
 
 
 class TestSubmissionPostSerializer(serializers.ModelSerializer):
@@ -136,7 +187,7 @@ class TestSubmissionPostSerializer(serializers.ModelSerializer):
                     'id': 'Question id field is required.'
                 })
             else:
-                if not Question.objects.filter(id__exact=int(question_id), test_id=test_id).exists():
+                if not Question.objects.of_test(test_id).filter(id__exact=int(question_id)).exists():
                     raise serializers.ValidationError({
                         'question_id': 'There is not question with id = {}'.format(question_id)
                     })
@@ -230,7 +281,7 @@ class TestSubmissionPostSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """
-        Creates instance of TestSubmission class from validated json.
+        Creates instance of TestSubmission class from validated json (should be called in transaction).
 
         :param validated_data: validated json.
         :return: TestSubmission model instance.
@@ -257,6 +308,7 @@ class TestSubmissionPostSerializer(serializers.ModelSerializer):
                 int_answers_right += 1
         test_submission.right_answers_number = int_answers_right
         test_submission.save()
+        add_scores([test_submission])
 
         for question_feedback_data in questions_feedback_data:
             answers_data = question_feedback_data.pop('answers')
@@ -273,9 +325,63 @@ class TestSubmissionPostSerializer(serializers.ModelSerializer):
 class TestResultOverviewGetSerializer(serializers.Serializer):
     """
     Test result overview serializer class.
+        - Answer submissions are read with one query per question kind and aggregated in a single pass.
+        - Free text answers are grouped by normalized content (see text_answers module).
 
     * Only for read purposes.
     """
+    @staticmethod
+    @section('result_overview.aggregate_answers')
+    def _aggregate_answers(list_questions: list, iterable_rows, bool_is_right: bool) -> None:
+        """
+        Adds answers overview to question dictionaries.
+
+        :param list_questions: question dictionaries of test.
+        :param iterable_rows: answer submission rows
+        (test submission id, question id, answer id, content[, is_right]), newest submissions first.
+        :param bool_is_right: rows contain is_right value.
+        :return: None
+        """
+        set_text_questions = {dict_question['id'] for dict_question in list_questions
+                              if dict_question['type'] == 'text'}
+        set_answered = set()
+        set_answered_right = set()
+        dict_choices = {}
+        dict_text_rows = {}
+        for row in iterable_rows:
+            test_submission_id, question_id, answer_id = row[:3]
+            set_answered.add((test_submission_id, question_id))
+            if bool_is_right and row[4]:
+                set_answered_right.add((test_submission_id, question_id))
+            if question_id in set_text_questions:
+                dict_text_rows.setdefault(question_id, []).append(row[3:] + (answer_id,))
+            else:
+                dict_choices[answer_id] = dict_choices.get(answer_id, 0) + 1
+        dict_answers_numbers = {}
+        for _, question_id in set_answered:
+            dict_answers_numbers[question_id] = dict_answers_numbers.get(question_id, 0) + 1
+        dict_right_answers_numbers = {}
+        for _, question_id in set_answered_right:
+            dict_right_answers_numbers[question_id] = dict_right_answers_numbers.get(question_id, 0) + 1
+
+        float_similarity = settings.TEXT_ANSWERS_SIMILARITY
+        for dict_question in list_questions:
+            dict_question['answers_number'] = dict_answers_numbers.get(dict_question['id'], 0)
+            if bool_is_right:
+                dict_question['right_answers_number'] = dict_right_answers_numbers.get(dict_question['id'], 0)
+            if dict_question['id'] not in set_text_questions:
+                for dict_answer in dict_question['answers']:
+                    dict_answer['choices_number'] = dict_choices.get(dict_answer['id'], 0)
+                continue
+            dict_question['answers'] = []
+            for row, int_number in group_text_answers(dict_text_rows.get(dict_question['id'], []), float_similarity):
+                dict_answer = {"id": row[-1], "content": row[0]}
+                if bool_is_right:
+                    dict_answer['is_right'] = row[1]
+                dict_answer['choices_number'] = int_number
+                dict_question['answers'].append(dict_answer)
+
+    @section('result_overview.to_representation')
     def to_representation(self, test):
         """
         Converts Test and TestSubmission instances to JSON.
@@ -283,103 +389,29 @@ class TestResultOverviewGetSerializer(serializers.Serializer):
         :param test: Test model instance.
         :return: JSON of test instance.
         """
-        serializer_test = TestGetSerializer(test)
-        dict_test_result = serializer_test.data
+        dict_test_result = test_to_representation(test)
         # questions number
         dict_test_result['questions_number'] = test.questions_number
-        # participants number
-        dict_test_result['participants_number'] = TestSubmission.objects.filter(test__id=test.id).count()
+        # participants number and score distribution (denormalized)
+        ensure_test_scores(test)
+        dict_test_result['participants_number'] = test.participants_number
+        dict_test_result['score'] = score_to_representation(tuple(getattr(test, field) for field in SCORE_FIELDS))
+        if not dict_test_result['participants_number']:
+            return dict_test_result
         # question answers overview
-        for test_submission in TestSubmission.objects.filter(test__id=test.id):
-            for dict_question in dict_test_result['questions']:
-                try:
-                    dict_question['answers_number']
-                except KeyError:
-                    dict_question['answers_number'] = 0
-                try:
-                    dict_question['right_answers_number']
-                except KeyError:
-                    dict_question['right_answers_number'] = 0
-
-                if QuestionAnswerSubmission.objects \
-                        .filter(test_submission__id=test_submission.id,
-                                question__id=dict_question['id'])\
-                        .exists():
-                    dict_question['answers_number'] += 1
-                if QuestionAnswerSubmission.objects. \
-                        filter(test_submission__id=test_submission.id,
-                               question__id=dict_question['id'],
-                               is_right=True)\
-                        .exists():
-                    dict_question['right_answers_number'] += 1
-                for dict_answer in dict_question['answers']:
-                    if dict_question['type'] == "text":
-                        answer_text_submission = QuestionAnswerSubmission.objects \
-                            .get(test_submission__id=test_submission.id, question__id=dict_question['id'])
-                        if len(dict_question['answers']) == 1 and \
-                                dict_question['answers'][0].get('choices_number', None) is None:
-                            dict_question['answers'].clear()
-                        if len(dict_question['answers']) == 0 or \
-                                answer_text_submission.content not in \
-                                list(map(lambda _dict_answer: _dict_answer.get('content', None),
-                                         dict_question['answers'])):
-                            dict_question['answers'].append({
-                                "id": dict_answer['id'],
-                                "content": answer_text_submission.content,
-                                "is_right": answer_text_submission.is_right,
-                                "choices_number": QuestionAnswerSubmission.objects \
-                                    .filter(test_submission_id=test_submission.id,
-                                            question__id=dict_question['id'],
-                                            content=answer_text_submission.content) \
-                                    .count()
-                            })
-                    else:
-                        dict_answer['choices_number'] = dict_answer.get('choices_number', 0) + \
-                                                        QuestionAnswerSubmission.objects \
-                                                            .filter(test_submission__id=test_submission.id,
-                                                                    question__id=dict_question['id'],
-                                                                    answer__id=dict_answer['id']) \
-                                                            .count()
-
-            # feedback question answers overview
-            for dict_question in dict_test_result['questions_feedback']:
-                try:
-                    dict_question['answers_number']
-                except KeyError:
-                    dict_question['answers_number'] = 0
-
-                if QuestionFeedbackAnswerSubmission.objects \
-                        .filter(test_submission__id=test_submission.id,
-                                question__id=dict_question['id'])\
-                        .exists:
-                    dict_question['answers_number'] += 1
-                for dict_answer in dict_question['answers']:
-                    if dict_question['type'] == "text":
-                        answer_text_submission = QuestionFeedbackAnswerSubmission.objects \
-                            .get(test_submission__id=test_submission.id, question__id=dict_question['id'])
-                        if len(dict_question['answers']) == 1 and \
-                                dict_question['answers'][0].get('choices_number', None) is None:
-                            dict_question['answers'].clear()
-                        if len(dict_question['answers']) == 0 or \
-                                answer_text_submission.content not in \
-                                list(map(lambda _dict_answer: _dict_answer['content'], dict_question['answers'])):
-                            dict_question['answers'].append({
-                                "id": dict_answer['id'],
-                                "content": answer_text_submission.content,
-                                "choices_number": QuestionFeedbackAnswerSubmission.objects \
-                                    .filter(test_submission_id=test_submission.id,
-                                            question__id=dict_question['id'],
-                                            content=answer_text_submission.content) \
-                                    .count()
-                            })
-                    else:
-                        dict_answer['choices_number'] = dict_answer.get('choices_number', 0) + \
-                                                        QuestionFeedbackAnswerSubmission.objects \
-                                                            .filter(test_submission__id=test_submission.id,
-                                                                    question__id=dict_question['id'],
-                                                                    answer__id=dict_answer['id']) \
-                                                            .count()
-
+        self._aggregate_answers(dict_test_result['questions'],
+                                QuestionAnswerSubmission.objects
+                                .filter(test_submission__test_id=test.id)
+                                .order_by('-test_submission_id', 'id')
+                                .values_list('test_submission_id', 'question_id', 'answer_id', 'content', 'is_right'),
+                                bool_is_right=True)
+        # feedback question answers overview
+        self._aggregate_answers(dict_test_result['questions_feedback'],
+                                QuestionFeedbackAnswerSubmission.objects
+                                .filter(test_submission__test_id=test.id)
+                                .order_by('-test_submission_id', 'id')
+                                .values_list('test_submission_id', 'question_id', 'answer_id', 'content'),
+                                bool_is_right=False)
         return dict_test_result
 
 
@@ -389,6 +421,7 @@ class UserTestResultGetSerializer(serializers.Serializer):
 
     * Only for read purposes.
     """
+    @section('user_result.to_representation')
     def to_representation(self, test, test_submission):
         """
         Converts Test and TestSubmission instances to JSON.
@@ -397,8 +430,7 @@ class UserTestResultGetSerializer(serializers.Serializer):
         :param test_submission: TestSubmission model instance.
         :return: JSON of test instance.
         """
-        serializer_test = TestGetSerializer(test)
-        json_test_result = serializer_test.data
+        json_test_result = test_to_representation(test)
         # participant info
         json_test_result['participant'] = UserSerializer(test_submission.user).data
         # questions, right answers number
@@ -0,0 +1,36 @@
+"""
+Per participant questions and answers ordering.
+
+* Permutation is generated from deterministic seed (test id, user id), so it is not stored
+and the same participant always gets the same order.
+* Shuffled copy is made over cached test structure, cached dictionaries are not modified.
+* Submissions reference questions and answers by id, so they need no mapping back.
+"""
+import random
+
+
+def _shuffled(list_items: list, rand: random.Random) -> list:
+    list_items = list(list_items)
+    rand.shuffle(list_items)
+    return list_items
+
+
+def shuffle_test(dict_test: dict, test_id: int, user_id: int) -> dict:
+    """
+    Orders test questions and their answers for participant.
+        - Feedback questions keep their order.
+
+    :param dict_test: JSON of test (not modified).
+    :param test_id: test id.
+    :param user_id: participant id.
+    :return: JSON of test with shuffled questions and answers.
+    """
+    rand = random.Random('{}:{}'.format(test_id, user_id))
+    dict_test_shuffled = dict(dict_test)
+    list_questions = []
+    for dict_question in _shuffled(dict_test['questions'], rand):
+        dict_question = dict(dict_question)
+        dict_question['answers'] = _shuffled(dict_question['answers'], rand)
+        list_questions.append(dict_question)
+    dict_test_shuffled['questions'] = list_questions
+    return dict_test_shuffled
@@ -0,0 +1,147 @@
+"""
+Test item analysis statistics.
+
+* Per question: correct rate, point-biserial discrimination (correlation of question correctness
+with participant total score) and answer (distractor) choice frequencies.
+* Participant answers are read with a single query into participants x questions matrix,
+metrics are computed with NumPy when it is installed and in pure Python otherwise.
+"""
+import math
+from collections import Counter
+from functools import lru_cache
+
+from .models.answer import QuestionAnswer, QuestionAnswerSubmission
+from .models.question import Question
+from .models.test import TestSubmission
+
+
+@lru_cache(maxsize=None)
+def _get_numpy():
+    # numpy is imported on first computation, not on worker startup
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _round(value):
+    return None if value is None else round(value, 4)
+
+
+def _get_correctness_matrix(test_id: int):
+    """
+    Reads participant answers of test.
+        - Question is answered correctly if all chosen answers are right (as in right_answers_number).
+
+    :param test_id: test id.
+    :return: tuple (list of submission ids, dictionary (submission id, question id) - correctness,
+    dictionary answer id - choices number).
+    """
+    list_submission_ids = list(TestSubmission.objects.filter(test_id=test_id).order_by().values_list('id', flat=True))
+    dict_correctness = {}
+    dict_answer_choices = {}
+    for test_submission_id, question_id, answer_id, is_right in QuestionAnswerSubmission.objects \
+            .filter(test_submission__test_id=test_id) \
+            .order_by() \
+            .values_list('test_submission_id', 'question_id', 'answer_id', 'is_right'):
+        key = (test_submission_id, question_id)
+        dict_correctness[key] = dict_correctness.get(key, True) and is_right
+        dict_answer_choices[answer_id] = dict_answer_choices.get(answer_id, 0) + 1
+    return list_submission_ids, dict_correctness, dict_answer_choices
+
+
+def _compute_numpy(list_rows: list) -> tuple:
+    """
+    Computes correct rates and point-biserial coefficients with NumPy.
+
+    :param list_rows: participants x questions correctness matrix (0 / 1).
+    :return: tuple (list of correct rates, list of discrimination coefficients or None).
+    """
+    matrix = _get_numpy().array(list_rows, dtype=float)
+    totals = matrix.sum(axis=1)
+    std_items = matrix.std(axis=0)
+    std_totals = totals.std()
+    covariances = (matrix - matrix.mean(axis=0)).T.dot(totals - totals.mean()) / matrix.shape[0]
+    list_discrimination = [None if std_item == 0 or std_totals == 0 else float(covariance / (std_item * std_totals))
+                           for covariance, std_item in zip(covariances, std_items)]
+    return [float(rate) for rate in matrix.mean(axis=0)], list_discrimination
+
+
+def _compute_python(list_rows: list) -> tuple:
+    """
+    Computes correct rates and point-biserial coefficients in pure Python.
+
+    :param list_rows: participants x questions correctness matrix (0 / 1).
+    :return: tuple (list of correct rates, list of discrimination coefficients or None).
+    """
+    int_participants = len(list_rows)
+    list_totals = [sum(row) for row in list_rows]
+    float_total_mean = sum(list_totals) / int_participants
+    float_total_std = math.sqrt(sum((total - float_total_mean) ** 2 for total in list_totals) / int_participants)
+    list_rates, list_discrimination = [], []
+    for int_question in range(len(list_rows[0])):
+        list_items = [row[int_question] for row in list_rows]
+        float_rate = sum(list_items) / int_participants
+        float_item_std = math.sqrt(float_rate * (1 - float_rate))
+        list_rates.append(float_rate)
+        if float_item_std == 0 or float_total_std == 0:
+            list_discrimination.append(None)
+            continue
+        float_covariance = sum((item - float_rate) * (total - float_total_mean)
+                               for item, total in zip(list_items, list_totals)) / int_participants
+        list_discrimination.append(float_covariance / (float_item_std * float_total_std))
+    return list_rates, list_discrimination
+
+
+def get_test_statistics(test_id: int) -> dict:
+    """
+    Computes item analysis statistics of test.
+
+    :param test_id: test id.
+    :return: JSON of statistics.
+    """
+    list_questions = list(Question.objects.of_test(test_id).values_list('id', 'description', 'type'))
+    list_submission_ids, dict_correctness, dict_answer_choices = _get_correctness_matrix(test_id)
+    int_participants = len(list_submission_ids)
+
+    list_rates = list_discrimination = [None] * len(list_questions)
+    if int_participants and list_questions:
+        list_rows = [[1 if dict_correctness.get((test_submission_id, question_id), False) else 0
+                      for question_id, _, _ in list_questions]
+                     for test_submission_id in list_submission_ids]
+        compute = _compute_numpy if _get_numpy() is not None else _compute_python
+        list_rates, list_discrimination = compute(list_rows)
+
+    counter_answered = Counter(question_id for _, question_id in dict_correctness)
+    dict_answers = {}
+    for answer_id, question_id, content, is_right in QuestionAnswer.objects \
+            .filter(question_id__in=[question_id for question_id, _, _ in list_questions]) \
+            .values_list('id', 'question_id', 'content', 'is_right'):
+        int_choices = dict_answer_choices.get(answer_id, 0)
+        dict_answers.setdefault(question_id, []).append({
+            'id': answer_id,
+            'content': content,
+            'is_right': is_right,
+            'choices_number': int_choices,
+            'choices_rate': _round(int_choices / int_participants) if int_participants else None,
+        })
+
+    list_json_questions = []
+    for (question_id, description, str_type), float_rate, float_discrimination in \
+            zip(list_questions, list_rates, list_discrimination):
+        list_json_questions.append({
+            'id': question_id,
+            'description': description,
+            'type': str_type,
+            'answers_number': counter_answered[question_id],
+            'correct_rate': _round(float_rate),
+            'discrimination': _round(float_discrimination),
+            # free text answers are not choices, so they have no distractors
+            'answers': dict_answers.get(question_id, []) if str_type != 'text' else [],
+        })
+    return {
+        'test_id': test_id,
+        'participants_number': int_participants,
+        'questions': list_json_questions,
+    }
@@ -0,0 +1,136 @@
+"""
+Write-behind test submission queue.
+
+* When SUBMISSION_QUEUE_ENABLED, test submission is validated (constant number of queries) and appended
+to QueuedSubmission table, client gets 202 with token to poll submission status.
+* drain_submission_queue command locks pending rows with SELECT ... FOR UPDATE SKIP LOCKED
+(several workers do not block each other) and writes them with bulk inserts.
+* Result views wait for drain of test (SUBMISSION_QUEUE_RESULT_WAIT) or report pending submissions.
+"""
+import json
+import time
+
+from django.db import DatabaseError, transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import localtime
+
+from .models.queue import QueuedSubmission
+from .models.test import TestSubmission
+from .submissions import create_submissions
+
+
+def enqueue_submission(dict_data: dict) -> QueuedSubmission:
+    """
+    Appends validated submission to queue.
+
+    :param dict_data: validated submission (see submissions.validate_submission).
+    :return: QueuedSubmission model instance.
+    """
+    dict_json = dict(dict_data, date_submission=dict_data['date_submission'].isoformat())
+    return QueuedSubmission.objects.create(test_id=dict_data['test_id'], user_id=dict_data['user_id'],
+                                           data=json.dumps(dict_json))
+
+
+def is_queued(test_id: int, user_id: int) -> bool:
+    return QueuedSubmission.objects.filter(test_id=test_id, user_id=user_id, status=QueuedSubmission.PENDING).exists()
+
+
+def get_pending_number(test_id: int) -> int:
+    return QueuedSubmission.objects.filter(test_id=test_id, status=QueuedSubmission.PENDING).count()
+
+
+def wait_for_drain(test_id: int, float_timeout: float, float_interval: float = 0.2) -> int:
+    """
+    Waits until pending submissions of test are drained.
+
+    :param test_id: test id.
+    :param float_timeout: maximum waiting time in seconds.
+    :param float_interval: polling interval in seconds.
+    :return: number of still pending submissions.
+    """
+    float_deadline = time.monotonic() + float_timeout
+    int_pending = get_pending_number(test_id)
+    while int_pending and time.monotonic() < float_deadline:
+        time.sleep(float_interval)
+        int_pending = get_pending_number(test_id)
+    return int_pending
+
+
+def _load(queued_submission: QueuedSubmission) -> dict:
+    dict_data = json.loads(queued_submission.data)
+    dict_data['date_submission'] = parse_datetime(dict_data['date_submission'])
+    return dict_data
+
+
+def _fail(list_queued: list, str_detail: str, date_now) -> None:
+    QueuedSubmission.objects \
+        .filter(id__in=[queued_submission.id for queued_submission in list_queued]) \
+        .update(status=QueuedSubmission.FAILED, detail=str_detail, date_process=date_now)
+
+
+def drain_queue(int_batch_size: int) -> int:
+    """
+    Writes one batch of pending submissions.
+        - Duplicate submissions (same user and test) are marked failed.
+        - If bulk write fails, submissions are written one by one, so single bad submission fails alone.
+
+    :param int_batch_size: maximum number of written submissions.
+    :return: number of processed queued submissions.
+    """
+    with transaction.atomic():
+        list_queued = list(QueuedSubmission.objects
+                           .select_for_update(skip_locked=True)
+                           .filter(status=QueuedSubmission.PENDING)
+                           .order_by('id')[:int_batch_size])
+        if not list_queued:
+            return 0
+        date_now = localtime()
+        set_submitted = set(TestSubmission.objects
+                            .filter(test_id__in={queued_submission.test_id for queued_submission in list_queued},
+                                    user_id__in={queued_submission.user_id for queued_submission in list_queued})
+                            .values_list('test_id', 'user_id'))
+        list_unique, list_duplicates = [], []
+        for queued_submission in list_queued:
+            tuple_key = (queued_submission.test_id, queued_submission.user_id)
+            if tuple_key in set_submitted:
+                list_duplicates.append(queued_submission)
+            else:
+                set_submitted.add(tuple_key)
+                list_unique.append(queued_submission)
+        _fail(list_duplicates, 'Test has been already submitted.', date_now)
+
+        try:
+            with transaction.atomic():
+                create_submissions([_load(queued_submission) for queued_submission in list_unique])
+            list_done = list_unique
+        except DatabaseError:
+            list_done = []
+            for queued_submission in list_unique:
+                try:
+                    with transaction.atomic():
+                        create_submissions([_load(queued_submission)])
+                    list_done.append(queued_submission)
+                except DatabaseError as error:
+                    _fail([queued_submission], str(error)[:250], date_now)
+        QueuedSubmission.objects \
+            .filter(id__in=[queued_submission.id for queued_submission in list_done]) \
+            .update(status=QueuedSubmission.DONE, date_process=date_now)
+    return len(list_queued)
+
+
+def get_status(queued_submission: QueuedSubmission) -> dict:
+    """
+    Returns status of queued submission.
+
+    :param queued_submission: QueuedSubmission model instance.
+    :return: JSON with token, status and submission id (when written) or detail (when failed).
+    """
+    dict_status = {'token': str(queued_submission.token), 'status': queued_submission.status}
+    if queued_submission.status == QueuedSubmission.DONE:
+        dict_status['id'] = TestSubmission.objects \
+            .filter(test_id=queued_submission.test_id, user_id=queued_submission.user_id) \
+            .values_list('id', flat=True) \
+            .first()
+    elif queued_submission.status == QueuedSubmission.FAILED:
+        dict_status['detail'] = queued_submission.detail
+    return dict_status
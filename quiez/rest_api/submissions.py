@@ -0,0 +1,304 @@
+"""
+Batch test submission sync.
+
+* Items have the shape of test submission JSON plus test_id and idempotency_key.
+* Tests, questions and answers of all items are validated with a constant number of queries,
+valid items are written in one transaction with bulk inserts.
+* Item with idempotency key already used by the user is not submitted again, its submission id is returned.
+* Keys with RESERVED_KEY_PREFIX are used by server side submissions (finalized drafts), client keys can not use it.
+"""
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils.timezone import localtime
+
+from .models.answer import QuestionAnswer, QuestionFeedbackAnswer, \
+    QuestionAnswerSubmission, QuestionFeedbackAnswerSubmission
+from .models.question import Question, QuestionFeedback
+from .models.test import Test, TestSubmission, TestSubmissionKey
+from .scores import add_scores
+
+INT_CONTENT_MAX_LENGTH = QuestionAnswerSubmission._meta.get_field('content').max_length
+RESERVED_KEY_PREFIX = 'server:'
+
+
+class ItemError(Exception):
+    """
+    Batch item can not be submitted.
+    """
+    def __init__(self, int_status: int, detail):
+        super().__init__(detail)
+        self.int_status = int_status
+        self.detail = detail
+
+
+def _to_int(value, str_field: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ItemError(400, {str_field: '{} field must be integer.'.format(str_field)})
+
+
+def _read_catalog(set_test_ids: set, queryset_tests=None) -> dict:
+    """
+    Reads tests, their questions and answers of batch.
+
+    :param set_test_ids: ids of batch tests.
+    :param queryset_tests: tests batch may refer to (e.g. tests of tenant), all not deleted tests by default.
+    :return: dictionary with tests, question ids of test, question id of answer (for questions and feedback).
+    """
+    if queryset_tests is None:
+        queryset_tests = Test.objects.alive()
+    dict_tests = {dict_test['id']: dict_test for dict_test in queryset_tests
+                  .filter(id__in=set_test_ids)
+                  .values('id', 'owner_id', 'date_open', 'date_close')}
+    set_test_ids = set(dict_tests)
+    dict_test_questions = {}
+    for question_id, test_id in Question.objects.filter(test_id__in=set_test_ids).values_list('id', 'test_id'):
+        dict_test_questions.setdefault(test_id, set()).add(question_id)
+    for test_id, question_id in Question.bank_tests.through.objects \
+            .filter(test_id__in=set_test_ids) \
+            .values_list('test_id', 'question_id'):
+        dict_test_questions.setdefault(test_id, set()).add(question_id)
+    set_question_ids = set().union(*dict_test_questions.values())
+    dict_test_questions_feedback = {}
+    for test_id, question_feedback_id in QuestionFeedback.tests.through.objects \
+            .filter(test_id__in=set_test_ids) \
+            .values_list('test_id', 'questionfeedback_id'):
+        dict_test_questions_feedback.setdefault(test_id, set()).add(question_feedback_id)
+    set_question_feedback_ids = set().union(*dict_test_questions_feedback.values())
+    return {
+        'tests': dict_tests,
+        'test_questions': dict_test_questions,
+        'answer_question': dict(QuestionAnswer.objects
+                                .filter(question_id__in=set_question_ids)
+                                .values_list('id', 'question_id')),
+        'test_questions_feedback': dict_test_questions_feedback,
+        'answer_question_feedback': dict(QuestionFeedbackAnswer.objects
+                                         .filter(question_feedback_id__in=set_question_feedback_ids)
+                                         .values_list('id', 'question_feedback_id')),
+    }
+
+
+def _validate_answers(list_questions, set_question_ids: set, dict_answer_question: dict, bool_feedback: bool) -> list:
+    """
+    Validates answers of item questions.
+
+    :param list_questions: questions JSON of item.
+    :param set_question_ids: ids of test questions.
+    :param dict_answer_question: answer id - question id.
+    :param bool_feedback: questions are feedback questions (answers have no is_right).
+    :return: list of tuples (question id, answer id, content, is_right).
+    """
+    str_field = 'questions_feedback' if bool_feedback else 'questions'
+    if not list_questions or not isinstance(list_questions, list):
+        raise ItemError(400, {str_field: '{} list field is required.'.format(
+            'Feedback question' if bool_feedback else 'Questions')})
+    list_answers = []
+    for dict_question in list_questions:
+        if not isinstance(dict_question, dict) or not isinstance(dict_question.get('answers'), list):
+            raise ItemError(400, {'answers': 'Answers list field is required.'})
+        question_id = _to_int(dict_question.get('id'), 'id')
+        if question_id not in set_question_ids:
+            raise ItemError(400, {'question_id': 'There is not {}question with id = {}'.format(
+                'feedback ' if bool_feedback else '', question_id)})
+        if not dict_question['answers']:
+            raise ItemError(400, {'answers': 'Answers list field is required.'})
+        for dict_answer in dict_question['answers']:
+            if not isinstance(dict_answer, dict):
+                raise ItemError(400, {'answers': 'Answer must be object.'})
+            answer_id = _to_int(dict_answer.get('id'), 'id')
+            if dict_answer_question.get(answer_id) != question_id:
+                raise ItemError(400, {'answer_id': 'There is not answer with id = {}'.format(answer_id)})
+            content = dict_answer.get('content')
+            if not content or not isinstance(content, str) or len(content) > INT_CONTENT_MAX_LENGTH:
+                raise ItemError(400, {'content': 'Content field is required (at most {} characters).'.format(
+                    INT_CONTENT_MAX_LENGTH)})
+            is_right = dict_answer.get('is_right')
+            if not bool_feedback and not isinstance(is_right, bool):
+                raise ItemError(400, {'is_right': 'is_right field is required.'})
+            list_answers.append((question_id, answer_id, content, is_right))
+    return list_answers
+
+
+def _validate_item(dict_item, user, dict_catalog: dict, set_submitted_test_ids: set, date_now) -> dict:
+    """
+    Validates batch item with the same rules as single test submission.
+
+    :return: dictionary with test id, answers and feedback answers.
+    """
+    test_id = _to_int(dict_item.get('test_id'), 'test_id')
+    dict_test = dict_catalog['tests'].get(test_id)
+    if dict_test is None:
+        raise ItemError(404, {'test_id': 'There is not test with id = {}'.format(test_id)})
+    if dict_test['owner_id'] == user.id:
+        raise ItemError(400, 'Owner can not submit his test.')
+    if test_id in set_submitted_test_ids:
+        raise ItemError(400, 'Test has been already submitted.')
+    if dict_test['date_open'] is None:
+        raise ItemError(400, 'Test is not open for submission.')
+    if dict_test['date_open'] > date_now:
+        raise ItemError(400, 'Test open date is in future.')
+    if dict_test['date_close'] is not None:
+        raise ItemError(410, 'Test is closed for submission.')
+    return {
+        'test_id': test_id,
+        'answers': _validate_answers(dict_item.get('questions'), dict_catalog['test_questions'].get(test_id, set()),
+                                     dict_catalog['answer_question'], bool_feedback=False),
+        'answers_feedback': _validate_answers(dict_item.get('questions_feedback'),
+                                              dict_catalog['test_questions_feedback'].get(test_id, set()),
+                                              dict_catalog['answer_question_feedback'], bool_feedback=True),
+    }
+
+
+def _count_right_answers(list_answers: list) -> int:
+    # question is answered right if all its chosen answers are right (same as single submission)
+    dict_question_right = {}
+    for question_id, _, _, is_right in list_answers:
+        dict_question_right[question_id] = dict_question_right.get(question_id, True) and is_right
+    return sum(dict_question_right.values())
+
+
+def _insert_submissions(list_submissions: list) -> bool:
+    """
+    Inserts test submissions, sets their ids.
+        - Single bulk insert when database returns inserted ids, otherwise TestSubmission.save per submission.
+
+    :param list_submissions: TestSubmission model instances.
+    :return: True if submissions were bulk inserted (TestSubmission.save was not called).
+    """
+    connection = connections[router.db_for_write(TestSubmission)]
+    if getattr(connection.features, 'can_return_ids_from_bulk_insert', False) or \
+            getattr(connection.features, 'can_return_rows_from_bulk_insert', False):
+        TestSubmission.objects.bulk_create(list_submissions)
+        return True
+    for test_submission in list_submissions:
+        test_submission.save(force_insert=True)
+    return False
+
+
+def create_submissions(list_data: list) -> list:
+    """
+    Writes validated submissions with bulk inserts (should be called in transaction).
+
+    :param list_data: dictionaries with user_id, test_id, date_submission, answers and answers_feedback
+    (as returned by validate_submission).
+    :return: list of created TestSubmission model instances in order of data.
+    """
+    list_submissions = [TestSubmission(test_id=dict_data['test_id'], user_id=dict_data['user_id'],
+                                       date_submission=dict_data['date_submission'],
+                                       right_answers_number=_count_right_answers(dict_data['answers']))
+                        for dict_data in list_data]
+    bool_bulk = _insert_submissions(list_submissions)
+    list_answer_submissions, list_feedback_answer_submissions = [], []
+    for dict_data, test_submission in zip(list_data, list_submissions):
+        list_answer_submissions.extend(
+            QuestionAnswerSubmission(test_submission_id=test_submission.id, question_id=question_id,
+                                     answer_id=answer_id, content=content, is_right=is_right)
+            for question_id, answer_id, content, is_right in dict_data['answers'])
+        list_feedback_answer_submissions.extend(
+            QuestionFeedbackAnswerSubmission(test_submission_id=test_submission.id, question_id=question_id,
+                                             answer_id=answer_id, content=content)
+            for question_id, answer_id, content, _ in dict_data['answers_feedback'])
+    QuestionAnswerSubmission.objects.bulk_create(list_answer_submissions)
+    QuestionFeedbackAnswerSubmission.objects.bulk_create(list_feedback_answer_submissions)
+    add_scores(list_submissions)
+    if bool_bulk:
+        # TestSubmission.save is bypassed, so test versions are incremented here
+        Test.objects \
+            .filter(id__in={dict_data['test_id'] for dict_data in list_data}) \
+            .update(version=F('version') + 1)
+    return list_submissions
+
+
+def validate_submission(dict_item: dict, user, set_submitted_test_ids: set = frozenset()) -> dict:
+    """
+    Validates single test submission with constant number of queries.
+
+    :param dict_item: test submission JSON with test_id.
+    :param user: submitting user.
+    :param set_submitted_test_ids: ids of tests user has submitted in other way (e.g. queued submissions).
+    :return: validated data for create_submissions.
+    :raise ItemError: if submission is invalid.
+    """
+    test_id = _to_int(dict_item.get('test_id'), 'test_id')
+    set_submitted_test_ids = set(set_submitted_test_ids) | set(TestSubmission.objects
+                                                               .filter(user_id=user.id, test_id=test_id)
+                                                               .values_list('test_id', flat=True))
+    date_now = localtime()
+    dict_data = _validate_item(dict_item, user, _read_catalog({test_id}), set_submitted_test_ids, date_now)
+    dict_data['user_id'] = user.id
+    dict_data['date_submission'] = date_now
+    return dict_data
+
+
+def submit_batch(user, list_items: list, queryset_tests=None, bool_reserved_keys: bool = False) -> list:
+    """
+    Submits batch of tests.
+
+    :param user: submitting user.
+    :param list_items: submission items.
+    :param queryset_tests: tests items may refer to (e.g. tests of tenant), all not deleted tests by default.
+    :param bool_reserved_keys: items are made by server and use keys with RESERVED_KEY_PREFIX.
+    :return: list of item results (idempotency_key, status and id or detail) in order of items.
+    """
+    list_results = [None] * len(list_items)
+    dict_item_keys = {}
+    for int_item, dict_item in enumerate(list_items):
+        str_key = dict_item.get('idempotency_key') if isinstance(dict_item, dict) else None
+        if not str_key or not isinstance(str_key, str) or len(str_key) > 100:
+            list_results[int_item] = {'idempotency_key': str_key, 'status': 400,
+                                      'detail': 'Idempotency key field is required (at most 100 characters).'}
+        elif str_key.startswith(RESERVED_KEY_PREFIX) != bool_reserved_keys:
+            list_results[int_item] = {'idempotency_key': str_key, 'status': 400,
+                                      'detail': 'Idempotency key must {}start with "{}".'.format(
+                                          '' if bool_reserved_keys else 'not ', RESERVED_KEY_PREFIX)}
+        elif str_key in dict_item_keys.values():
+            list_results[int_item] = {'idempotency_key': str_key, 'status': 400,
+                                      'detail': 'Idempotency key is repeated in batch.'}
+        else:
+            dict_item_keys[int_item] = str_key
+
+    # replays of already synced items
+    dict_key_submissions = dict(TestSubmissionKey.objects
+                                .filter(user_id=user.id, key__in=dict_item_keys.values())
+                                .values_list('key', 'test_submission_id'))
+    set_test_ids = set()
+    for int_item, str_key in list(dict_item_keys.items()):
+        if str_key in dict_key_submissions:
+            list_results[int_item] = {'idempotency_key': str_key, 'status': 200, 'id': dict_key_submissions[str_key]}
+            del dict_item_keys[int_item]
+        else:
+            try:
+                set_test_ids.add(int(list_items[int_item].get('test_id')))
+            except (TypeError, ValueError):
+                pass
+
+    dict_catalog = _read_catalog(set_test_ids, queryset_tests)
+    set_submitted_test_ids = set(TestSubmission.objects
+                                 .filter(user_id=user.id, test_id__in=set_test_ids)
+                                 .values_list('test_id', flat=True))
+    date_now = localtime()
+    dict_valid = {}
+    for int_item, str_key in dict_item_keys.items():
+        try:
+            dict_valid[int_item] = _validate_item(list_items[int_item], user, dict_catalog,
+                                                  set_submitted_test_ids, date_now)
+        except ItemError as error:
+            list_results[int_item] = {'idempotency_key': str_key, 'status': error.int_status, 'detail': error.detail}
+            continue
+        set_submitted_test_ids.add(dict_valid[int_item]['test_id'])
+
+    if dict_valid:
+        for dict_data in dict_valid.values():
+            dict_data['user_id'] = user.id
+            dict_data['date_submission'] = date_now
+        with transaction.atomic():
+            list_submissions = create_submissions(list(dict_valid.values()))
+            list_keys = []
+            for int_item, test_submission in zip(dict_valid, list_submissions):
+                list_keys.append(TestSubmissionKey(key=dict_item_keys[int_item], user_id=user.id,
+                                                   test_submission_id=test_submission.id))
+                list_results[int_item] = {'idempotency_key': dict_item_keys[int_item], 'status': 201,
+                                          'id': test_submission.id}
+            TestSubmissionKey.objects.bulk_create(list_keys)
+    return list_results
@@ -0,0 +1,85 @@
+"""
+Multi-tenant organizations.
+
+* Tenant of request is set by X-Organization header (organization id), requests without it work with tests
+that do not belong to any organization.
+* Test and analytics views read tests only through tenant_tests(request) / of_organization, so tests of other
+tenants are not found. Scoping is explicit instead of default manager filter: management commands (purge, score
+repair, search setup) work across tenants with plain Test.objects.
+* Only Test rows have tenant column (leading test_tenant_idx). Submissions, answers, drafts and rollups are read
+by test id of already scoped test, so their indexes are led by test, not by tenant.
+* Every tenant has its own cache (separate memory and size limit with locmem backend, key prefix with others),
+so cached tests of one tenant are not evicted by load of another one.
+"""
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from rest_framework.exceptions import ParseError, PermissionDenied
+
+from .models.organization import Membership
+from .models.test import Test
+
+STR_LOCMEM_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+_tenant_caches = {}
+_tenant_caches_lock = threading.Lock()
+
+
+def get_organization_id(request):
+    """
+    Returns tenant of request, checks membership of request user once per request.
+
+    :param request: request instance.
+    :return: organization id or None (no organization).
+    :raise ParseError: if header is not organization id.
+    :raise PermissionDenied: if request user is not member of organization.
+    """
+    if hasattr(request, '_organization_id'):
+        return request._organization_id
+    str_organization_id = request.META.get('HTTP_X_ORGANIZATION')
+    organization_id = None
+    if str_organization_id:
+        try:
+            organization_id = int(str_organization_id)
+        except ValueError:
+            raise ParseError('X-Organization header must be organization id.')
+        if not Membership.objects.filter(organization_id=organization_id, user_id=request.user.id).exists():
+            raise PermissionDenied('You are not a member of organization with id = {}.'.format(organization_id))
+    request._organization_id = organization_id
+    return organization_id
+
+
+def tenant_tests(request):
+    """
+    Returns tests of request tenant (not deleted).
+
+    :param request: request instance.
+    :return: Test queryset.
+    """
+    return Test.objects.alive().of_organization(get_organization_id(request))
+
+
+def get_tenant_cache(organization_id):
+    """
+    Returns cache of tenant, creates it on first use.
+
+    :param organization_id: organization id or None.
+    :return: cache instance.
+    """
+    str_tenant = 'tenant-{}'.format(organization_id or 0)
+    with _tenant_caches_lock:
+        tenant_cache = _tenant_caches.get(str_tenant)
+        if tenant_cache is None:
+            dict_params = dict(settings.CACHES['default'])
+            str_backend = dict_params.pop('BACKEND')
+            str_location = dict_params.pop('LOCATION', '')
+            if str_backend == STR_LOCMEM_BACKEND:
+                str_location = '{}-{}'.format(str_location, str_tenant)
+                dict_params['OPTIONS'] = dict(dict_params.get('OPTIONS', {}),
+                                              MAX_ENTRIES=settings.TENANT_CACHE_MAX_ENTRIES)
+            dict_params['KEY_PREFIX'] = str_tenant
+            tenant_cache = import_string(str_backend)(str_location, dict_params)
+            _tenant_caches[str_tenant] = tenant_cache
+    return tenant_cache
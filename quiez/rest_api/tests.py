@@ -0,0 +1,579 @@
+import datetime
+import json
+import os
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, models
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import throttling
+from .analytics import get_feedback_distribution, refresh_feedback_rollup
+from .models.analytics import FeedbackAnswerRollup
+from .models.answer import QuestionAnswerSubmission, QuestionFeedbackAnswerSubmission
+from .models.draft import DraftAnswer
+from .models.queue import QueuedSubmission
+from .models.test import Test, TestSubmission, TestSubmissionKey
+from .prerequisites import generate_feedback_questions
+from .purge import purge_user, soft_delete_test, soft_delete_user
+from .renderers import FastJSONRenderer, orjson
+from .scores import score_to_representation
+from .serializers.lean import test_to_representation, tests_concise_to_representation
+from .serializers.test import TestGetSerializer, TestGetConciseSerializer
+from .submission_queue import drain_queue, enqueue_submission, get_pending_number, get_status
+from .submissions import submit_batch, validate_submission
+from .tenancy import get_tenant_cache
+
+
+def load_test_json() -> dict:
+    with open(os.path.join(os.path.dirname(settings.BASE_DIR), 'json', 'post_test.json')) as file_test:
+        return json.load(file_test)
+
+
+def create_user(str_email: str) -> User:
+    return User.objects.create_user(username=str_email, email=str_email, password='password')
+
+
+def get_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def create_open_test(owner: User) -> dict:
+    """
+    Creates test of json/post_test.json and opens it for submission.
+
+    :param owner: test owner.
+    :return: test JSON as rendered to participants.
+    """
+    client = get_client(owner)
+    test_id = client.post('/api/test/', load_test_json(), format='json').json()['id']
+    client.post('/api/test/{}/open/'.format(test_id))
+    return client.get('/api/test/{}/'.format(test_id)).json()
+
+
+def submission_json(dict_test: dict, int_answer: int = 0) -> dict:
+    """
+    Builds test submission JSON choosing the same answer of every question.
+
+    :param dict_test: test JSON as rendered to participants.
+    :param int_answer: index of chosen answer (modulo answers number).
+    :return: test submission JSON.
+    """
+    return {
+        'questions': [{'id': dict_question['id'], 'answers': [
+            dict(dict_question['answers'][int_answer % len(dict_question['answers'])])
+        ]} for dict_question in dict_test['questions']],
+        'questions_feedback': [{'id': dict_question['id'], 'answers': [
+            dict(dict_question['answers'][0], content=dict_question['answers'][0]['content'] or 'free')
+        ]} for dict_question in dict_test['questions_feedback']],
+    }
+
+
+class APITestCase(TestCase):
+    """
+    Test case of API requests.
+        - Throttling buckets and caches are reset before every test, so requests of other tests are not counted
+        and not served from cache.
+    """
+    def setUp(self):
+        throttling._store = None
+        cache.clear()
+        get_tenant_cache(None).clear()
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    """
+    FastJSONRenderer output is pinned to DRF JSONRenderer output for values API returns.
+    """
+    def assertRenderedSame(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_score(self):
+        # score mean is the only float of API
+        for row in ((7, 20, 1, 5, '1,2,0,3,1'), (3, 1, 0, 1, '2,1'), (1, 5, 5, 5, '0,0,0,0,0,1'), (0, 0, None, None, '')):
+            self.assertRenderedSame({'score': score_to_representation(row)})
+
+    def test_datetimes(self):
+        self.assertRenderedSame({
+            'utc': datetime.datetime(2020, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+            'naive': datetime.datetime(2020, 1, 2, 3, 4, 5),
+            'offset': datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+            'date': datetime.date(2020, 1, 2),
+        })
+
+    def test_text(self):
+        self.assertRenderedSame({'content': 'Ответ "1"\n  \t', 'list': [1, None, True, 0.5]})
+
+    def test_exponent_floats(self):
+        # documented difference: orjson omits exponent sign and zero padding
+        if orjson is None:
+            self.skipTest('orjson is not installed')
+        self.assertEqual(FastJSONRenderer().render([1e16, 1.5e-7]), b'[1e16,1.5e-7]')
+        self.assertEqual(JSONRenderer().render([1e16, 1.5e-7]), b'[1e+16,1.5e-07]')
+
+
+class LeanRenderingTestCase(TestCase):
+    """
+    Golden output check: lean rendering outputs the same JSON as DRF serializers.
+        - Tests cover choice and text questions, feedback questions, shuffled tests, question bank versions
+        and submitted tests (score distribution).
+    """
+    @classmethod
+    def setUpTestData(cls):
+        generate_feedback_questions()
+        owner = User.objects.create_user(username='owner@test.com', email='owner@test.com', password='password',
+                                         first_name='Owner', last_name='Test')
+        client = get_client(owner)
+        dict_test = load_test_json()
+
+        list_bank_ids = [client.post('/api/bank/', dict_question, format='json').json()['id']
+                         for dict_question in dict_test['questions']]
+        # new version of bank question, test links previous one
+        client.put('/api/bank/{}/'.format(list_bank_ids[0]), dict(dict_test['questions'][0], description='q1 v2'),
+                   format='json')
+
+        cls.list_test_ids = [
+            client.post('/api/test/', dict_test, format='json').json()['id'],
+            client.post('/api/test/', dict(dict_test, shuffle=True), format='json').json()['id'],
+            client.post('/api/test/', {'name': 'bank', 'description': 'bank', 'bank_questions': list_bank_ids},
+                        format='json').json()['id'],
+            client.post('/api/test/', dict(dict_test, questions=dict_test['questions'][:1],
+                                           bank_questions=list_bank_ids[1:]), format='json').json()['id'],
+        ]
+
+        # submitted test
+        test_id = cls.list_test_ids[-1]
+        dict_rendered = client.get('/api/test/{}/'.format(test_id)).json()
+        client.post('/api/test/{}/open/'.format(test_id))
+        for int_participant in range(3):
+            participant = User.objects.create_user(username='p{}@test.com'.format(int_participant),
+                                                   email='p{}@test.com'.format(int_participant), password='password')
+            client_participant = APIClient()
+            client_participant.force_authenticate(participant)
+            client_participant.post('/api/test/{}/submit/'.format(test_id), {
+                'questions': [{'id': dict_question['id'], 'answers': [
+                    dict(dict_question['answers'][int_participant % len(dict_question['answers'])])
+                ]} for dict_question in dict_rendered['questions']],
+                'questions_feedback': [{'id': dict_question['id'], 'answers': [
+                    dict(dict_question['answers'][0], content=dict_question['answers'][0]['content'] or 'free')
+                ]} for dict_question in dict_rendered['questions_feedback']],
+            }, format='json')
+        client.post('/api/test/{}/close/'.format(test_id))
+
+    def test_fixtures(self):
+        self.assertEqual(Test.objects.filter(id__in=self.list_test_ids).count(), len(self.list_test_ids))
+        self.assertEqual(Test.objects.get(id=self.list_test_ids[-1]).participants_number, 3)
+
+    def test_detail(self):
+        renderer = JSONRenderer()
+        for test in Test.objects.filter(id__in=self.list_test_ids):
+            with self.subTest(test_id=test.id):
+                dict_lean = test_to_representation(test)
+                self.assertEqual(len(dict_lean['questions']), test.questions_number)
+                self.assertTrue(dict_lean['questions_feedback'])
+                self.assertEqual(renderer.render(TestGetSerializer(test).data), renderer.render(dict_lean))
+
+    def test_list(self):
+        renderer = JSONRenderer()
+        queryset_tests = Test.objects.all()
+        self.assertEqual(renderer.render(TestGetConciseSerializer(queryset_tests, many=True).data),
+                         renderer.render(tests_concise_to_representation(queryset_tests)))
+
+
+class SubmitBatchTestCase(APITestCase):
+    """
+    Batch submission sync: per item statuses, idempotency keys and both submission insert paths.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        generate_feedback_questions()
+        owner = create_user('owner@test.com')
+        cls.participant = create_user('participant@test.com')
+        cls.list_tests = [create_open_test(owner), create_open_test(owner)]
+
+    def item(self, int_test: int, str_key: str) -> dict:
+        dict_test = self.list_tests[int_test]
+        return dict(submission_json(dict_test), test_id=dict_test['id'], idempotency_key=str_key)
+
+    def post_batch(self, list_items: list):
+        response = get_client(self.participant).post('/api/submissions/batch/', list_items, format='json')
+        self.assertEqual(response.status_code, 207)
+        return response.json()
+
+    def test_replay(self):
+        list_results = self.post_batch([self.item(0, 'key-1')])
+        self.assertEqual(list_results[0]['status'], 201)
+        list_results_replay = self.post_batch([self.item(0, 'key-1')])
+        self.assertEqual(list_results_replay, [{'idempotency_key': 'key-1', 'status': 200,
+                                                'id': list_results[0]['id']}])
+        self.assertEqual(TestSubmission.objects.filter(user=self.participant).count(), 1)
+
+    def test_mixed_statuses(self):
+        dict_invalid = self.item(1, 'key-2')
+        dict_invalid['questions'][0]['answers'][0]['id'] = -1
+        list_results = self.post_batch([self.item(0, 'key-1'), dict_invalid])
+        self.assertEqual([dict_result['status'] for dict_result in list_results], [201, 400])
+        self.assertEqual(list_results[1]['detail'], {'answer_id': 'There is not answer with id = -1'})
+        self.assertEqual(list(TestSubmission.objects.filter(user=self.participant).values_list('id', flat=True)),
+                         [list_results[0]['id']])
+
+    def test_duplicate_keys(self):
+        list_results = self.post_batch([self.item(0, 'key-1'), self.item(1, 'key-1')])
+        self.assertEqual([dict_result['status'] for dict_result in list_results], [201, 400])
+        self.assertEqual(list_results[1]['detail'], 'Idempotency key is repeated in batch.')
+        self.assertFalse(TestSubmission.objects.filter(test_id=self.list_tests[1]['id']).exists())
+
+    def test_reserved_key_prefix(self):
+        list_results = self.post_batch([self.item(0, 'server:key-1')])
+        self.assertEqual(list_results[0]['detail'], 'Idempotency key must not start with "server:".')
+        list_results = submit_batch(self.participant, [self.item(0, 'key-1')], bool_reserved_keys=True)
+        self.assertEqual(list_results[0]['detail'], 'Idempotency key must start with "server:".')
+        self.assertFalse(TestSubmission.objects.filter(user=self.participant).exists())
+
+    @staticmethod
+    def get_connections(bool_returning: bool) -> dict:
+        # database features deciding between bulk insert and TestSubmission.save per submission
+        features = SimpleNamespace(can_return_ids_from_bulk_insert=bool_returning,
+                                   can_return_rows_from_bulk_insert=bool_returning)
+        return {'default': SimpleNamespace(features=features)}
+
+    def get_versions(self) -> list:
+        return [Test.objects.get(id=dict_test['id']).version for dict_test in self.list_tests]
+
+    def assertSubmitted(self, list_versions: list, list_results: list):
+        # versions are incremented once per submission on both insert paths
+        self.assertEqual([dict_result['status'] for dict_result in list_results], [201, 201])
+        self.assertEqual(self.get_versions(), [int_version + 1 for int_version in list_versions])
+        for dict_test, dict_result in zip(self.list_tests, list_results):
+            self.assertEqual(QuestionAnswerSubmission.objects.filter(test_submission_id=dict_result['id']).count(),
+                             len(dict_test['questions']))
+
+    def test_insert_per_submission(self):
+        with mock.patch('quiez.rest_api.submissions.connections', self.get_connections(False)), \
+                mock.patch.object(TestSubmission, 'save', autospec=True, side_effect=TestSubmission.save) as save:
+            list_versions = self.get_versions()
+            list_results = submit_batch(self.participant, [self.item(0, 'key-1'), self.item(1, 'key-2')])
+        self.assertEqual(save.call_count, 2)
+        self.assertSubmitted(list_versions, list_results)
+
+    def test_insert_bulk(self):
+        def bulk_create(list_submissions):
+            # database returning ids of bulk inserted rows
+            for test_submission in list_submissions:
+                models.Model.save(test_submission, force_insert=True)
+            return list_submissions
+
+        with mock.patch('quiez.rest_api.submissions.connections', self.get_connections(True)), \
+                mock.patch.object(TestSubmission.objects, 'bulk_create', side_effect=bulk_create) as bulk, \
+                mock.patch.object(TestSubmission, 'save', autospec=True) as save:
+            list_versions = self.get_versions()
+            list_results = submit_batch(self.participant, [self.item(0, 'key-1'), self.item(1, 'key-2')])
+        self.assertEqual(bulk.call_count, 1)
+        save.assert_not_called()
+        self.assertSubmitted(list_versions, list_results)
+
+
+class DraftFinalizeTestCase(APITestCase):
+    """
+    Draft answers saving and finalization into test submission.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        generate_feedback_questions()
+        owner = create_user('owner@test.com')
+        cls.participant = create_user('participant@test.com')
+        cls.dict_test = create_open_test(owner)
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.participant)
+        self.str_draft_url = '/api/test/{}/draft/'.format(self.dict_test['id'])
+
+    def save_answers(self, int_answer: int):
+        response = self.client.patch(self.str_draft_url, submission_json(self.dict_test, int_answer), format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_repeated_save(self):
+        self.save_answers(1)
+        self.save_answers(0)
+        dict_question = self.dict_test['questions'][0]
+        self.client.patch(self.str_draft_url, {'questions': [
+            {'id': dict_question['id'], 'answers': [dict_question['answers'][2]]}]}, format='json')
+        dict_draft = self.client.get(self.str_draft_url).json()
+        # latest save of every question wins
+        self.assertEqual(dict_draft['questions'][0]['answers'], [dict_question['answers'][2]])
+        self.assertEqual(dict_draft['questions'][1:], submission_json(self.dict_test, 0)['questions'][1:])
+        self.assertEqual(DraftAnswer.objects.filter(user=self.participant).count(),
+                         2 * (len(self.dict_test['questions']) + len(self.dict_test['questions_feedback'])) + 1)
+
+    def test_finalize(self):
+        self.save_answers(1)
+        self.save_answers(0)
+        response = self.client.post(self.str_draft_url + 'finalize/')
+        self.assertEqual(response.status_code, 201)
+        test_submission = TestSubmission.objects.get(user=self.participant)
+        self.assertEqual(response.json(), {'id': test_submission.id})
+        # first answers are right ones
+        self.assertEqual(test_submission.right_answers_number, len(self.dict_test['questions']))
+        self.assertFalse(DraftAnswer.objects.filter(user=self.participant).exists())
+
+        response_replay = self.client.post(self.str_draft_url + 'finalize/')
+        self.assertEqual(response_replay.status_code, 200)
+        self.assertEqual(response_replay.json(), {'id': test_submission.id})
+        self.assertEqual(TestSubmission.objects.filter(user=self.participant).count(), 1)
+
+    def test_finalize_concurrently(self):
+        self.save_answers(0)
+        # key of the same draft is inserted by concurrent finalization
+        with mock.patch.object(TestSubmissionKey.objects, 'bulk_create', side_effect=IntegrityError):
+            response = self.client.post(self.str_draft_url + 'finalize/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'detail': 'Draft is being finalized now, retry later.'})
+        self.assertFalse(TestSubmission.objects.filter(user=self.participant).exists())
+        self.assertTrue(DraftAnswer.objects.filter(user=self.participant).exists())
+
+
+@override_settings(SUBMISSION_QUEUE_ENABLED=True)
+class SubmissionQueueTestCase(APITestCase):
+    """
+    Write-behind submission queue: queued submissions are counted by test close and written by drain.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        generate_feedback_questions()
+        cls.owner = create_user('owner@test.com')
+        cls.list_participants = [create_user('p{}@test.com'.format(int_participant)) for int_participant in range(3)]
+        cls.dict_test = create_open_test(cls.owner)
+
+    def submit(self, user: User) -> str:
+        response = get_client(user).post('/api/test/{}/submit/'.format(self.dict_test['id']),
+                                         submission_json(self.dict_test), format='json')
+        self.assertEqual(response.status_code, 202)
+        return response.json()['token']
+
+    def test_close(self):
+        str_close_url = '/api/test/{}/close/'.format(self.dict_test['id'])
+        client_owner = get_client(self.owner)
+        self.assertEqual(client_owner.post(str_close_url).status_code, 400)
+        self.submit(self.list_participants[0])
+        # submission is not written yet, pending one is counted
+        self.assertFalse(TestSubmission.objects.exists())
+        self.assertEqual(client_owner.post(str_close_url).status_code, 200)
+
+    def test_drain(self):
+        list_tokens = [self.submit(participant) for participant in self.list_participants[:2]]
+        # the same participant queued twice (view refuses it, concurrent requests may not)
+        dict_data = validate_submission(dict(submission_json(self.dict_test), test_id=self.dict_test['id']),
+                                        self.list_participants[1])
+        list_tokens.append(str(enqueue_submission(dict_data).token))
+        # bad row fails the bulk write
+        dict_data = validate_submission(dict(submission_json(self.dict_test), test_id=self.dict_test['id']),
+                                        self.list_participants[2])
+        dict_data['answers'][0] = dict_data['answers'][0][:2] + (None, True)
+        list_tokens.append(str(enqueue_submission(dict_data).token))
+        self.assertEqual(get_pending_number(self.dict_test['id']), 4)
+
+        self.assertEqual(drain_queue(10), 4)
+        self.assertEqual(drain_queue(10), 0)
+        self.assertEqual(get_pending_number(self.dict_test['id']), 0)
+        list_statuses = [get_status(QueuedSubmission.objects.get(token=str_token)) for str_token in list_tokens]
+        self.assertEqual([dict_status['status'] for dict_status in list_statuses],
+                         [QueuedSubmission.DONE] * 2 + [QueuedSubmission.FAILED] * 2)
+        self.assertEqual(list_statuses[2]['detail'], 'Test has been already submitted.')
+        self.assertEqual(sorted(dict_status['id'] for dict_status in list_statuses[:2]),
+                         sorted(TestSubmission.objects.values_list('id', flat=True)))
+        self.assertFalse(TestSubmission.objects.filter(user=self.list_participants[2]).exists())
+        self.assertEqual(Test.objects.get(id=self.dict_test['id']).participants_number, 2)
+
+
+class LeaderboardTestCase(APITestCase):
+    """
+    Test leaderboard ranks: ties are broken by submission date and id.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        generate_feedback_questions()
+        cls.owner = create_user('owner@test.com')
+        cls.dict_test = create_open_test(cls.owner)
+        cls.list_participants = []
+        # right answers numbers 2, 3, 2, 1, 3 (answers of index 0 are right)
+        for int_participant, int_answer in enumerate((1, 0, 1, 2, 0)):
+            participant = create_user('p{}@test.com'.format(int_participant))
+            get_client(participant).post('/api/test/{}/submit/'.format(cls.dict_test['id']),
+                                         submission_json(cls.dict_test, int_answer), format='json')
+            cls.list_participants.append(participant)
+        cls.str_url = '/api/test/{}/leaderboard/'.format(cls.dict_test['id'])
+
+    def get_leaderboard(self, **dict_params) -> dict:
+        response = get_client(self.owner).get(self.str_url, dict_params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get_user_ids(self, list_entries: list) -> list:
+        return [dict_entry['participant']['id'] for dict_entry in list_entries]
+
+    def get_participant_ids(self, *tuple_participants) -> list:
+        return [self.list_participants[int_participant].id for int_participant in tuple_participants]
+
+    def test_ties(self):
+        dict_leaderboard = self.get_leaderboard()
+        self.assertEqual(dict_leaderboard['participants_number'], 5)
+        self.assertEqual(self.get_user_ids(dict_leaderboard['top']), self.get_participant_ids(1, 4, 0, 2, 3))
+        self.assertEqual([dict_entry['rank'] for dict_entry in dict_leaderboard['top']], [1, 2, 3, 4, 5])
+        self.assertEqual([dict_entry['right_answers_number'] for dict_entry in dict_leaderboard['top']],
+                         [3, 3, 2, 2, 1])
+
+    def test_ties_same_date(self):
+        TestSubmission.objects.filter(user__in=self.list_participants[1::3]) \
+            .update(date_submission=timezone.now())
+        dict_leaderboard = self.get_leaderboard(top=2, around=self.list_participants[4].id)
+        # earlier submission id wins
+        self.assertEqual(self.get_user_ids(dict_leaderboard['top']), self.get_participant_ids(1, 4))
+        self.assertEqual(dict_leaderboard['around']['rank'], 2)
+
+    def test_around_edges(self):
+        dict_around = self.get_leaderboard(around=self.list_participants[1].id)['around']
+        self.assertEqual(dict_around['rank'], 1)
+        self.assertEqual(self.get_user_ids(dict_around['entries']), self.get_participant_ids(1, 4, 0))
+        self.assertEqual(dict_around['entries'][0]['rank'], 1)
+
+        dict_around = self.get_leaderboard(around=self.list_participants[3].id)['around']
+        self.assertEqual(dict_around['rank'], 5)
+        self.assertEqual(self.get_user_ids(dict_around['entries']), self.get_participant_ids(0, 2, 3))
+        self.assertEqual(dict_around['entries'][0]['rank'], 3)
+
+        self.assertIsNone(self.get_leaderboard(around=self.owner.id)['around'])
+
+    def test_deleted_test(self):
+        self.get_leaderboard()
+        soft_delete_test(self.dict_test['id'])
+        # cached leaderboard is not served
+        self.assertEqual(get_client(self.owner).get(self.str_url).status_code, 404)
+
+
+@override_settings(REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={
+    'registration': '3/min',
+    'registration.email': '2/min',
+}))
+class TokenBucketThrottleTestCase(SimpleTestCase):
+    """
+    Token bucket throttling with mocked timer.
+    """
+    view = SimpleNamespace(throttle_scope='registration', kwargs={})
+
+    def setUp(self):
+        throttling._store = None
+        cache.clear()
+        self.float_now = 1000.0
+        patcher = mock.patch.object(throttling, 'time', SimpleNamespace(time=lambda: self.float_now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def allow(self, throttle_class, request) -> bool:
+        throttle = throttle_class()
+        bool_allowed = throttle.allow_request(request, self.view)
+        self.float_wait = throttle.wait()
+        return bool_allowed
+
+    def assertBurstAndRefill(self):
+        request = SimpleNamespace(user=SimpleNamespace(is_authenticated=True, pk=1))
+        # burst of bucket capacity
+        self.assertEqual([self.allow(throttling.UserTokenBucketThrottle, request) for _ in range(4)],
+                         [True, True, True, False])
+        self.assertAlmostEqual(self.float_wait, 20)
+        # token per 20 seconds
+        self.float_now += 10
+        self.assertFalse(self.allow(throttling.UserTokenBucketThrottle, request))
+        self.assertAlmostEqual(self.float_wait, 10)
+        self.float_now += 10
+        self.assertTrue(self.allow(throttling.UserTokenBucketThrottle, request))
+        self.assertFalse(self.allow(throttling.UserTokenBucketThrottle, request))
+        # refill is capped by capacity
+        self.float_now += 3600
+        self.assertEqual([self.allow(throttling.UserTokenBucketThrottle, request) for _ in range(4)],
+                         [True, True, True, False])
+        # other users have own buckets
+        self.assertTrue(self.allow(throttling.UserTokenBucketThrottle,
+                                   SimpleNamespace(user=SimpleNamespace(is_authenticated=True, pk=2))))
+
+    def test_local_store(self):
+        self.assertBurstAndRefill()
+
+    @override_settings(THROTTLE_STORE='cache')
+    def test_cache_store(self):
+        self.assertBurstAndRefill()
+        self.assertIsInstance(throttling.get_store(), throttling.CacheTokenBucketStore)
+
+    def test_email_bucket(self):
+        self.assertTrue(self.allow(throttling.EmailTokenBucketThrottle, SimpleNamespace(data={'email': 'a@test.com'})))
+        self.assertTrue(self.allow(throttling.EmailTokenBucketThrottle, SimpleNamespace(data={'email': 'a@test.com'})))
+        # emails are compared case insensitive
+        self.assertFalse(self.allow(throttling.EmailTokenBucketThrottle,
+                                    SimpleNamespace(data={'email': ' A@Test.com'})))
+        self.assertAlmostEqual(self.float_wait, 30)
+        self.assertTrue(self.allow(throttling.EmailTokenBucketThrottle, SimpleNamespace(data={'email': 'b@test.com'})))
+        # requests without email are limited by other throttles only
+        self.assertTrue(self.allow(throttling.EmailTokenBucketThrottle, SimpleNamespace(data={})))
+        self.float_now += 30
+        self.assertTrue(self.allow(throttling.EmailTokenBucketThrottle, SimpleNamespace(data={'email': 'a@test.com'})))
+
+
+class PurgeUserTestCase(APITestCase):
+    """
+    Purge of deleted user: batched raw deletes and feedback analytics rollup of other owners.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        generate_feedback_questions()
+        cls.owner = create_user('owner@test.com')
+        cls.user = create_user('user@test.com')
+        participant = create_user('participant@test.com')
+        cls.dict_test = create_open_test(cls.owner)
+        dict_test_user = create_open_test(cls.user)
+
+        # purged user chooses other feedback answers, so some rollup rows have only his choices
+        dict_submission = submission_json(cls.dict_test)
+        for dict_question, dict_question_test in zip(dict_submission['questions_feedback'],
+                                                     cls.dict_test['questions_feedback']):
+            dict_answer = dict_question_test['answers'][-1]
+            dict_question['answers'] = [dict(dict_answer, content=dict_answer['content'] or 'other')]
+        get_client(cls.user).patch('/api/test/{}/draft/'.format(cls.dict_test['id']),
+                                   submission_json(cls.dict_test), format='json')
+        submit_batch(cls.user, [dict(dict_submission, test_id=cls.dict_test['id'], idempotency_key='key-1')])
+        get_client(participant).post('/api/test/{}/submit/'.format(cls.dict_test['id']),
+                                     submission_json(cls.dict_test), format='json')
+        get_client(participant).post('/api/test/{}/submit/'.format(dict_test_user['id']),
+                                     submission_json(dict_test_user), format='json')
+        refresh_feedback_rollup(1000)
+
+    def test_purge(self):
+        self.assertEqual(FeedbackAnswerRollup.objects.filter(owner=self.user).count(),
+                         len(self.dict_test['questions_feedback']))
+        self.assertTrue(DraftAnswer.objects.filter(user=self.user).exists())
+        soft_delete_user(self.user)
+        self.assertEqual(purge_user(self.user.id, 1, 0), 2)
+
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+        self.assertEqual(list(Test.objects.values_list('id', flat=True)), [self.dict_test['id']])
+        self.assertEqual(Test.objects.get(id=self.dict_test['id']).participants_number, 1)
+        queryset_submission_ids = TestSubmission.objects.values('id')
+        for model in (QuestionAnswerSubmission, QuestionFeedbackAnswerSubmission, TestSubmissionKey):
+            with self.subTest(model=model.__name__):
+                self.assertFalse(model.objects.exclude(test_submission_id__in=queryset_submission_ids).exists())
+        self.assertFalse(DraftAnswer.objects.exists())
+
+        # rollup matches remaining submissions, rows of purged user choices only are removed
+        self.assertFalse(FeedbackAnswerRollup.objects.exclude(test__owner=self.owner).exists())
+        self.assertFalse(FeedbackAnswerRollup.objects.filter(choices_number__lte=0).exists())
+        self.assertEqual(FeedbackAnswerRollup.objects.count(), len(self.dict_test['questions_feedback']))
+        self.assertEqual(get_feedback_distribution(self.owner.id, None, 'day', bool_rollup=True),
+                         get_feedback_distribution(self.owner.id, None, 'day', bool_rollup=False))
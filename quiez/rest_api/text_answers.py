@@ -0,0 +1,79 @@
+"""
+Free text answers aggregation.
+
+* Answers are normalized (Unicode NFKC, case folding, whitespace collapsing) and grouped
+with a dictionary in a single pass, so grouping is linear in number of answers.
+* Optionally groups with similar normalized text are merged (see TEXT_ANSWERS_SIMILARITY setting),
+similarity is computed over distinct groups only, not over all answers.
+"""
+import unicodedata
+from difflib import SequenceMatcher
+
+
+def normalize_text_answer(str_content: str) -> str:
+    """
+    Normalizes free text answer for grouping.
+
+    :param str_content: answer content.
+    :return: normalized content.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', str_content or '').casefold().split())
+
+
+def _is_similar(str_first: str, str_second: str, float_similarity: float) -> bool:
+    int_lengths = len(str_first) + len(str_second)
+    # ratio can not be greater than 2 * min length / sum of lengths, skip matching when it is already too low
+    if not int_lengths or 2 * min(len(str_first), len(str_second)) / int_lengths < float_similarity:
+        return False
+    matcher = SequenceMatcher(None, str_first, str_second, autojunk=False)
+    return matcher.real_quick_ratio() >= float_similarity and \
+        matcher.quick_ratio() >= float_similarity and \
+        matcher.ratio() >= float_similarity
+
+
+def _merge_similar(dict_groups: dict, float_similarity: float) -> dict:
+    """
+    Merges groups with similar keys into most chosen one.
+
+    :param dict_groups: dictionary normalized content - [first row, choices number].
+    :param float_similarity: minimal difflib ratio of merged keys.
+    :return: dictionary normalized content - [first row, choices number] (in order of first occurrence).
+    """
+    list_keys_representatives = []
+    dict_representatives = {}
+    for str_key in sorted(dict_groups, key=lambda _str_key: -dict_groups[_str_key][1]):
+        dict_representatives[str_key] = next((str_representative for str_representative in list_keys_representatives
+                                              if _is_similar(str_key, str_representative, float_similarity)), str_key)
+        if dict_representatives[str_key] == str_key:
+            list_keys_representatives.append(str_key)
+
+    dict_merged = {}
+    for str_key, (row_first, int_number) in dict_groups.items():
+        str_representative = dict_representatives[str_key]
+        if str_representative in dict_merged:
+            dict_merged[str_representative][1] += int_number
+        else:
+            dict_merged[str_representative] = [dict_groups[str_representative][0], int_number]
+    return dict_merged
+
+
+def group_text_answers(iterable_rows, float_similarity: float = 0.0) -> list:
+    """
+    Groups free text answers with the same normalized content.
+
+    :param iterable_rows: answer rows, content is the first value of row.
+    :param float_similarity: if greater than 0 - groups with difflib ratio of normalized contents
+    not less than this value are merged.
+    :return: list of tuples (first row of group, choices number) in order of first occurrence.
+    """
+    dict_groups = {}
+    for row in iterable_rows:
+        str_key = normalize_text_answer(row[0])
+        list_group = dict_groups.get(str_key)
+        if list_group is None:
+            dict_groups[str_key] = [row, 1]
+        else:
+            list_group[1] += 1
+    if float_similarity > 0 and len(dict_groups) > 1:
+        dict_groups = _merge_similar(dict_groups, float_similarity)
+    return [tuple(list_group) for list_group in dict_groups.values()]
@@ -0,0 +1,193 @@
+"""
+Token bucket request throttling.
+
+* Rates are configured per view throttle_scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+in DRF format ('<number>/<period>'): '<scope>' - per user (per IP for anonymous users),
+'<scope>.test' - per test (all users together), '<scope>.email' - per email in request body.
+* Bucket capacity is rate number of requests, it is refilled continuously during rate period,
+so short bursts are allowed while average rate is limited.
+* Buckets are stored in process memory (THROTTLE_STORE='local') or in Django cache (THROTTLE_STORE='cache').
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DICT_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class LocalTokenBucketStore:
+    """
+    Process-local token bucket store.
+        - Buckets which would be full again are pruned when store grows over max_keys.
+    """
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key - (tokens, update timestamp, full timestamp)
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, int_capacity: int, float_refill_rate: float, float_now: float) -> float:
+        """
+        Takes one token from bucket.
+
+        :param key: bucket key.
+        :param int_capacity: bucket capacity.
+        :param float_refill_rate: tokens per second.
+        :param float_now: current timestamp.
+        :return: 0 if token is taken, otherwise seconds to wait for the next token.
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                float_tokens = int_capacity
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(float_now)
+            else:
+                float_tokens = min(int_capacity, bucket[0] + (float_now - bucket[1]) * float_refill_rate)
+            float_wait = 0.0
+            if float_tokens >= 1:
+                float_tokens -= 1
+            else:
+                float_wait = (1 - float_tokens) / float_refill_rate
+            self._buckets[key] = (float_tokens, float_now,
+                                  float_now + (int_capacity - float_tokens) / float_refill_rate)
+            return float_wait
+
+    def _prune(self, float_now: float) -> None:
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= float_now]:
+            del self._buckets[key]
+
+
+class CacheTokenBucketStore:
+    """
+    Django cache token bucket store, shared by all processes using the same cache.
+        - Read and write of bucket are not atomic, concurrent requests may occasionally take the same token.
+    """
+    def consume(self, key: str, int_capacity: int, float_refill_rate: float, float_now: float) -> float:
+        """
+        Takes one token from bucket.
+
+        :param key: bucket key.
+        :param int_capacity: bucket capacity.
+        :param float_refill_rate: tokens per second.
+        :param float_now: current timestamp.
+        :return: 0 if token is taken, otherwise seconds to wait for the next token.
+        """
+        bucket = cache.get(key)
+        if bucket is None:
+            float_tokens = int_capacity
+        else:
+            float_tokens = min(int_capacity, bucket[0] + (float_now - bucket[1]) * float_refill_rate)
+        float_wait = 0.0
+        if float_tokens >= 1:
+            float_tokens -= 1
+        else:
+            float_wait = (1 - float_tokens) / float_refill_rate
+        # bucket expires when it would be full again
+        cache.set(key, (float_tokens, float_now), int((int_capacity - float_tokens) / float_refill_rate) + 1)
+        return float_wait
+
+
+_store = None
+_dict_parsed_rates = {}
+
+
+def get_store():
+    """
+    Returns token bucket store configured by THROTTLE_STORE setting.
+
+    :return: token bucket store.
+    """
+    global _store
+    if _store is None:
+        _store = CacheTokenBucketStore() if settings.THROTTLE_STORE == 'cache' else LocalTokenBucketStore()
+    return _store
+
+
+def parse_rate(str_rate: str) -> tuple:
+    """
+    Parses DRF rate string (e.g. '30/min').
+
+    :param str_rate: rate string.
+    :return: tuple (bucket capacity, refill rate in tokens per second).
+    """
+    tuple_rate = _dict_parsed_rates.get(str_rate)
+    if tuple_rate is None:
+        str_number, str_period = str_rate.split('/')
+        int_number = int(str_number)
+        tuple_rate = _dict_parsed_rates[str_rate] = (int_number, int_number / DICT_PERIODS[str_period[0]])
+    return tuple_rate
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Abstract token bucket throttle.
+        - Subclasses define rate scope suffix and bucket key.
+    """
+    scope_suffix = ''
+
+    def get_key(self, request, view):
+        """
+        Returns bucket key of request or None if request should not be throttled.
+        """
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self.float_wait = 0.0
+        str_scope = getattr(view, 'throttle_scope', None)
+        if str_scope is None:
+            return True
+        str_scope += self.scope_suffix
+        str_rate = api_settings.DEFAULT_THROTTLE_RATES.get(str_scope)
+        if not str_rate:
+            return True
+        str_key = self.get_key(request, view)
+        if str_key is None:
+            return True
+        int_capacity, float_refill_rate = parse_rate(str_rate)
+        self.float_wait = get_store().consume('throttle:{}:{}'.format(str_scope, str_key),
+                                              int_capacity, float_refill_rate, time.time())
+        return self.float_wait == 0.0
+
+    def wait(self):
+        return self.float_wait
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Per user (per IP for anonymous users) token bucket throttle, rate '<scope>'.
+    """
+    def get_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return 'user-{}'.format(request.user.pk)
+        return 'ip-{}'.format(self.get_ident(request))
+
+
+class EmailTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Per email (from request body) token bucket throttle, rate '<scope>.email'.
+        - Anonymous clients behind one NAT are limited separately.
+    """
+    scope_suffix = '.email'
+
+    def get_key(self, request, view):
+        str_email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(str_email, str) or not str_email:
+            return None
+        return 'email-{}'.format(hashlib.sha1(str_email.strip().lower().encode()).hexdigest())
+
+
+class TestTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Per test token bucket throttle (all users together), rate '<scope>.test'.
+    """
+    scope_suffix = '.test'
+
+    def get_key(self, request, view):
+        test_id = view.kwargs.get('test_id')
+        return None if test_id is None else str(test_id)
@@ -1,31 +1,17 @@
+from django.conf import settings
 from django.urls import path, include
 
-from rest_framework.permissions import AllowAny
-
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
 from .views.auth import UserRegistrationView, UserDetailsView
-from .views.test import TestListView, TestDetailView, TestSubmissionView, \
-    TestSubmissionOpenView, TestSubmissionCloseView, \
-    TestResultOverviewView, UserTestResultView, \
-    UserTestSubmissionListView
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="QuiEz API",
-      default_version='v1',
-      description="QuiEz application REST API.",
-      contact=openapi.Contact(email="valera071998@gmail.com"),
-   ),
-   public=True,
-   permission_classes=(AllowAny,),
-)
+from .views.test import TestListView, TestSearchView, TestDetailView, TestSubmissionView, TestSubmissionBatchView, \
+    TestDraftView, TestDraftFinalizeView, TestSubmissionOpenView, TestSubmissionCloseView, \
+    TestResultOverviewView, TestResultStatisticsView, TestLeaderboardView, UserTestResultView, \
+    UserTestSubmissionListView, SubmissionQueueStatusView
+from .views.analytics import OwnerFeedbackView
+from .views.bank import QuestionBankListView, QuestionBankDetailView
+from .views.organization import OrganizationListView, OrganizationMemberListView
+from .views.schema import schema_view, swagger_ui_view
 
 urlpatterns = [
-    # docs
-    path('', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-
     # browsable API autharization
     path('auth-rest/', include('rest_framework.urls', namespace='rest_framework')),
     # override rest_auth /user view
@@ -37,11 +23,37 @@ urlpatterns = [
 
     # test
     path('test/', TestListView.as_view()),
+    path('test/search/', TestSearchView.as_view()),
     path('test/<int:test_id>/', TestDetailView.as_view()),
     path('test/<int:test_id>/open/', TestSubmissionOpenView.as_view()),
     path('test/<int:test_id>/close/', TestSubmissionCloseView.as_view()),
     path('test/<int:test_id>/submit/', TestSubmissionView.as_view()),
+    path('test/<int:test_id>/draft/', TestDraftView.as_view()),
+    path('test/<int:test_id>/draft/finalize/', TestDraftFinalizeView.as_view()),
     path('test/<int:test_id>/result/', TestResultOverviewView.as_view()),
+    path('test/<int:test_id>/result/stats/', TestResultStatisticsView.as_view()),
+    path('test/<int:test_id>/leaderboard/', TestLeaderboardView.as_view()),
     path('test/<int:test_id>/result/<int:user_id>/', UserTestResultView.as_view()),
     path('test/submission/<int:user_id>/', UserTestSubmissionListView.as_view()),
+    path('submissions/batch/', TestSubmissionBatchView.as_view()),
+    path('submissions/queue/<uuid:token>/', SubmissionQueueStatusView.as_view()),
+
+    # question bank
+    path('bank/', QuestionBankListView.as_view()),
+    path('bank/<int:question_id>/', QuestionBankDetailView.as_view()),
+
+    # organizations (tenant of request is set by X-Organization header)
+    path('organization/', OrganizationListView.as_view()),
+    path('organization/<int:organization_id>/member/', OrganizationMemberListView.as_view()),
+
+    # analytics
+    path('owner/<int:owner_id>/feedback/', OwnerFeedbackView.as_view()),
 ]
+
+if settings.API_SCHEMA_ENABLED:
+    # docs
+    urlpatterns[:0] = [
+        path('', swagger_ui_view, name='schema-swagger-ui'),
+        path('schema.json', schema_view, {'str_format': 'json'}, name='schema-json'),
+        path('schema.yaml', schema_view, {'str_format': 'yaml'}, name='schema-yaml'),
+    ]
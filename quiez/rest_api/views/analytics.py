@@ -0,0 +1,37 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+
+from django.conf import settings
+
+from ..analytics import get_feedback_distribution, TUPLE_PERIODS
+from ..tenancy import get_organization_id
+
+
+class OwnerFeedbackView(APIView):
+    """
+    Owner feedback analytics view class.
+
+    get:
+    Get feedback answers distribution over time across all owner tests.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, owner_id):
+        """
+        Returns feedback answers distribution of all owner tests in request tenant.
+        * ?period=day|month (month by default).
+        """
+        if request.user.id != owner_id:
+            return Response({"detail": "You are not owner of these tests to get their feedback."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        str_period = request.query_params.get('period', 'month')
+        if str_period not in TUPLE_PERIODS:
+            return Response({"detail": "Period must be one of: {}.".format(', '.join(TUPLE_PERIODS))},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_feedback_distribution(owner_id, get_organization_id(request), str_period,
+                                                  settings.FEEDBACK_ANALYTICS_ROLLUP),
+                        status=status.HTTP_200_OK)
@@ -1,3 +1,5 @@
+import concurrent.futures
+
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -7,32 +9,51 @@ from rest_framework.authentication import TokenAuthentication
 from rest_auth.views import UserDetailsView as RestAuthUserDetailsView
 
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 
+from quiez.rest_api.passwords import PasswordHashingBusy, hash_password
+from quiez.rest_api.purge import soft_delete_user
 from quiez.rest_api.serializers.auth import UserSerializer
+from quiez.rest_api.throttling import EmailTokenBucketThrottle, UserTokenBucketThrottle
 
 
 class UserRegistrationView(GenericAPIView):
     """
     User registration view.
+        - Throttled per email and per IP (only against floods, clients behind one NAT share it).
     """
     permission_classes = (AllowAny, )
+    throttle_classes = (EmailTokenBucketThrottle, UserTokenBucketThrottle)
+    throttle_scope = 'registration'
     serializer_class = UserSerializer
 
     def post(self, request):
         """
         Registration function for new users.
         * Email will be used as username.
+        * Existing user is checked before password hashing, so repeated registrations do not cost hash,
+        username unique constraint detects concurrent ones.
         """
         serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
             str_username = serializer.validated_data["email"]
             serializer.validated_data["username"] = str_username
+            user = User(**serializer.validated_data)
+            user.username = User.normalize_username(user.username)
+            user.email = User.objects.normalize_email(user.email)
+            if User.objects.filter(username=user.username).exists():
+                return Response({'detail': 'User with given email already exists.'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                user.password = hash_password(serializer.validated_data["password"])
+            except (PasswordHashingBusy, concurrent.futures.TimeoutError):
+                return Response({'detail': 'Registration is overloaded, try again later.'},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE)
             try:
-                user = User.objects.get(username=str_username)
+                with transaction.atomic():
+                    user.save(force_insert=True)
+            except IntegrityError:
                 return Response({'detail': 'User with given email already exists.'}, status=status.HTTP_400_BAD_REQUEST)
-            except User.DoesNotExist:
-                User.objects.create_user(**serializer.validated_data)
-                return Response(serializer.validated_data, status=status.HTTP_201_CREATED)
+            return Response(serializer.validated_data, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -51,3 +72,12 @@ class UserDetailsView(RestAuthUserDetailsView):
         """
         serializer = UserSerializer(request.user)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        """
+        Deletes the user.
+        * User is deactivated and his tests are soft-deleted at once,
+        his content is removed in background by purge_deleted command.
+        """
+        soft_delete_user(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
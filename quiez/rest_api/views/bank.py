@@ -0,0 +1,103 @@
+from rest_framework.generics import GenericAPIView, get_object_or_404
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+
+from django.db import transaction
+
+from ..serializers.question import QuestionPostSerializer, QuestionBankGetSerializer
+from ..models.question import Question
+
+
+class QuestionBankListView(GenericAPIView):
+    """
+    Question bank view class.
+
+    get:
+    Read latest versions of user bank questions.
+
+    post:
+    Create bank question.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return QuestionBankGetSerializer
+        if self.request.method == 'POST':
+            return QuestionPostSerializer
+        return None
+
+    def get(self, request):
+        """
+        Reads latest versions of user bank questions.
+        """
+        queryset_questions = Question.objects.bank_latest(request.user.id).prefetch_related('answers')
+        return Response(QuestionBankGetSerializer(queryset_questions, many=True).data, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        """
+        Creates bank question using passed JSON from request body.
+        """
+        serializer = QuestionPostSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.validated_data['owner'] = request.user
+            with transaction.atomic():
+                question = serializer.create(validated_data=serializer.validated_data)
+            return Response({"id": question.id, "version": question.version}, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class QuestionBankDetailView(GenericAPIView):
+    """
+    Question bank version view class.
+
+    get:
+    Read bank question version.
+
+    put:
+    Create new version of bank question.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return QuestionBankGetSerializer
+        if self.request.method == 'PUT':
+            return QuestionPostSerializer
+        return None
+
+    def get(self, request, question_id):
+        """
+        Reads bank question version.
+        """
+        question = get_object_or_404(Question, id=question_id, test__isnull=True)
+        if question.owner_id != request.user.id:
+            return Response({"detail": "You are not owner of this bank question to read it."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(QuestionBankGetSerializer(question).data, status=status.HTTP_200_OK)
+
+    def put(self, request, question_id):
+        """
+        Creates new version of bank question using passed JSON from request body.
+        * Versions are immutable: tests using previous version (and their submissions) are not changed.
+        """
+        serializer = QuestionPostSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            question = get_object_or_404(Question.objects.select_for_update(), id=question_id, test__isnull=True)
+            if question.owner_id != request.user.id:
+                return Response({"detail": "You are not owner of this bank question to edit it."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if question.next_versions.exists():
+                return Response({"detail": "Only latest version of bank question can be edited."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            serializer.validated_data['owner'] = request.user
+            serializer.validated_data['version'] = question.version + 1
+            serializer.validated_data['previous'] = question
+            question_new = serializer.create(validated_data=serializer.validated_data)
+        return Response({"id": question_new.id, "version": question_new.version}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,111 @@
+"""
+Conditional GET (ETag / Last-Modified) functions for test views.
+
+* Used with django.views.decorators.http.condition, so 304 response is returned
+before the view loads and serializes test.
+"""
+from django.db.models import Count, Max, Sum
+
+from ..tenancy import get_organization_id, tenant_tests
+
+
+def get_test_stamp(request, test_id: int):
+    """
+    Reads test version stamp (single query), caches it on request for etag and last modified functions.
+
+    :param request: request instance.
+    :param test_id: test id.
+    :return: dictionary of stamp fields or None if test does not exist in request tenant.
+    """
+    dict_stamps = getattr(request, '_test_stamps', None)
+    if dict_stamps is None:
+        dict_stamps = request._test_stamps = {}
+    if test_id not in dict_stamps:
+        dict_stamps[test_id] = tenant_tests(request) \
+            .filter(id=test_id) \
+            .values('id', 'version', 'date_creation', 'date_open', 'date_close', 'owner_id', 'shuffle') \
+            .first()
+    return dict_stamps[test_id]
+
+
+def _format_date(date) -> str:
+    return '{:f}'.format(date.timestamp()) if date is not None else '-'
+
+
+def is_test_shuffled_for(dict_stamp: dict, user) -> bool:
+    """
+    Checks if user gets test with own questions order (owner always gets original order).
+
+    :param dict_stamp: test stamp.
+    :param user: request user.
+    :return: True if test is shuffled for user.
+    """
+    return dict_stamp['shuffle'] and dict_stamp['owner_id'] != user.id
+
+
+def test_etag(request, test_id: int, *args, **kwargs):
+    """
+    Returns ETag of test, changed on open, close, structure change and submission.
+        - Shuffled test ETag is different for every participant.
+
+    :param request: request instance.
+    :param test_id: test id.
+    :return: ETag value or None if test does not exist.
+    """
+    dict_stamp = get_test_stamp(request, test_id)
+    if dict_stamp is None:
+        return None
+    str_etag = 'test-{}-{}-{}-{}'.format(dict_stamp['id'], dict_stamp['version'],
+                                         _format_date(dict_stamp['date_open']), _format_date(dict_stamp['date_close']))
+    if is_test_shuffled_for(dict_stamp, request.user):
+        str_etag += '-u{}'.format(request.user.id)
+    return str_etag
+
+
+def test_detail_cache_key(dict_stamp: dict) -> str:
+    """
+    Returns cache key of rendered test.
+        - Test structure is not editable after creation (bank questions edits create new versions),
+        so only open and close dates are part of key, submissions do not invalidate it.
+
+    :param dict_stamp: test stamp.
+    :return: cache key.
+    """
+    return 'test-detail:{}:{}:{}'.format(dict_stamp['id'], _format_date(dict_stamp['date_open']),
+                                         _format_date(dict_stamp['date_close']))
+
+
+def test_last_modified(request, test_id: int, *args, **kwargs):
+    """
+    Returns last modification date of test.
+        - Only open and close dates are used, so it is not used by views depending on submissions.
+
+    :param request: request instance.
+    :param test_id: test id.
+    :return: datetime or None if test does not exist.
+    """
+    dict_stamp = get_test_stamp(request, test_id)
+    if dict_stamp is None:
+        return None
+    return max(date for date in (dict_stamp['date_creation'], dict_stamp['date_open'], dict_stamp['date_close'])
+               if date is not None)
+
+
+def test_list_etag(request, *args, **kwargs) -> str:
+    """
+    Returns ETag of test list of request user in request tenant.
+        - Any test creation, deletion, open, close or submission changes it.
+
+    * Last-Modified is not used for list, because user submissions change it without changing dates.
+
+    :param request: request instance.
+    :return: ETag value.
+    """
+    dict_aggregate = tenant_tests(request).aggregate(count=Count('id'), max_id=Max('id'), sum_version=Sum('version'),
+                                                     max_date_open=Max('date_open'),
+                                                     max_date_close=Max('date_close'))
+    return 'tests-{}-{}-{}-{}-{}-{}-{}'.format(get_organization_id(request) or 0, request.user.id,
+                                               dict_aggregate['count'], dict_aggregate['max_id'],
+                                               dict_aggregate['sum_version'],
+                                               _format_date(dict_aggregate['max_date_open']),
+                                               _format_date(dict_aggregate['max_date_close']))
@@ -0,0 +1,99 @@
+from rest_framework.generics import GenericAPIView, get_object_or_404
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from ..serializers.organization import OrganizationSerializer, MembershipGetSerializer, MembershipPostSerializer
+from ..models.organization import Organization, Membership
+
+
+class OrganizationListView(GenericAPIView):
+    """
+    Organization view class.
+
+    get:
+    Read organizations of user.
+
+    post:
+    Create organization, user becomes its admin.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = OrganizationSerializer
+
+    def get(self, request):
+        """
+        Reads organizations of user.
+        """
+        queryset_organizations = Organization.objects.filter(memberships__user_id=request.user.id)
+        return Response(OrganizationSerializer(queryset_organizations, many=True).data, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        """
+        Creates organization using passed JSON from request body.
+        """
+        serializer = OrganizationSerializer(data=request.data)
+        if serializer.is_valid():
+            with transaction.atomic():
+                organization = serializer.save()
+                Membership.objects.create(organization=organization, user=request.user, role=Membership.ADMIN)
+            return Response({"id": organization.id}, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class OrganizationMemberListView(GenericAPIView):
+    """
+    Organization members view class.
+
+    get:
+    Read organization members.
+
+    post:
+    Add member to organization.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return MembershipGetSerializer
+        if self.request.method == 'POST':
+            return MembershipPostSerializer
+        return None
+
+    def get(self, request, organization_id):
+        """
+        Reads organization members.
+        """
+        organization = get_object_or_404(Organization, pk=organization_id)
+        if not organization.memberships.filter(user_id=request.user.id).exists():
+            return Response({"detail": "You are not a member of this organization."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        queryset_memberships = organization.memberships.select_related('user').order_by('id')
+        return Response(MembershipGetSerializer(queryset_memberships, many=True).data, status=status.HTTP_200_OK)
+
+    def post(self, request, organization_id):
+        """
+        Adds user with passed email to organization (only by organization admin).
+        """
+        organization = get_object_or_404(Organization, pk=organization_id)
+        if not organization.memberships.filter(user_id=request.user.id, role=Membership.ADMIN).exists():
+            return Response({"detail": "You are not an admin of this organization to add members."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer = MembershipPostSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = User.objects.filter(email=serializer.validated_data['email']).first()
+        if user is None:
+            return Response({"detail": "There is not user with this email."}, status=status.HTTP_400_BAD_REQUEST)
+        membership, bool_created = Membership.objects.get_or_create(
+            organization=organization, user=user, defaults={'role': serializer.validated_data['role']}
+        )
+        if not bool_created:
+            return Response({"detail": "User is already a member of this organization."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"id": user.id}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,117 @@
+"""
+API schema views.
+
+* Schema is generated once at deploy time by `./manage.py generate_schema` into JSON / YAML artifacts
+(API_SCHEMA_DIR), served with Cache-Control and ETag. Live generation is used only in DEBUG without artifacts.
+* Swagger UI page is rendered without schema generation, it loads schema from schema.json.
+* drf_yasg is imported on first use, not on URL configuration import, so worker boot does not pay for it.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+
+DICT_CONTENT_TYPES = {
+    'json': 'application/json',
+    'yaml': 'application/yaml',
+}
+
+
+def generate_schema():
+    """
+    Generates API schema by introspection of all views and serializers.
+        - Schema has no host, so it is valid for any host serving it.
+
+    :return: drf_yasg Swagger schema.
+    """
+    from drf_yasg import openapi
+    from drf_yasg.generators import OpenAPISchemaGenerator
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    generator = OpenAPISchemaGenerator(openapi.Info(
+        title="QuiEz API",
+        default_version='v1',
+        description="QuiEz application REST API.",
+        contact=openapi.Contact(email="valera071998@gmail.com"),
+    ))
+    # views choose serializer by request method, so schema is generated with mock request
+    schema = generator.get_schema(request=Request(APIRequestFactory().get('/api/')), public=True)
+    schema.pop('host', None)
+    schema.pop('schemes', None)
+    return schema
+
+
+def encode_schema(schema, str_format: str) -> bytes:
+    """
+    Encodes schema to JSON or YAML.
+
+    :param schema: drf_yasg Swagger schema.
+    :param str_format: 'json' or 'yaml'.
+    :return: encoded schema.
+    """
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    codec_class = OpenAPICodecJson if str_format == 'json' else OpenAPICodecYaml
+    return codec_class(validators=[]).encode(schema)
+
+
+def get_schema_path(str_format: str) -> str:
+    return os.path.join(settings.API_SCHEMA_DIR, 'openapi.{}'.format(str_format))
+
+
+@lru_cache(maxsize=None)
+def _load_artifact(str_format: str):
+    """
+    Reads schema artifact (artifacts change only on deploy, so they are read once per process).
+
+    :param str_format: 'json' or 'yaml'.
+    :return: tuple (content, ETag) or None if artifact does not exist.
+    """
+    try:
+        with open(get_schema_path(str_format), 'rb') as file_schema:
+            bytes_content = file_schema.read()
+    except FileNotFoundError:
+        return None
+    return bytes_content, '"{}"'.format(hashlib.sha1(bytes_content).hexdigest())
+
+
+def schema_view(request, str_format: str = 'json'):
+    """
+    API schema in JSON or YAML format.
+    """
+    tuple_artifact = _load_artifact(str_format)
+    if tuple_artifact is None:
+        if not settings.DEBUG:
+            raise Http404('API schema is not generated, run generate_schema command.')
+        return HttpResponse(encode_schema(generate_schema(), str_format),
+                            content_type=DICT_CONTENT_TYPES[str_format])
+
+    bytes_content, str_etag = tuple_artifact
+    if str_etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(bytes_content, content_type=DICT_CONTENT_TYPES[str_format])
+    response['ETag'] = str_etag
+    patch_cache_control(response, public=True, max_age=settings.API_SCHEMA_CACHE_SECONDS)
+    return response
+
+
+def swagger_ui_view(request, *args, **kwargs):
+    """
+    Swagger UI of API schema.
+        - ?format=openapi returns JSON schema (as drf_yasg schema view did).
+    """
+    if request.GET.get('format') == 'openapi':
+        return schema_view(request, 'json')
+    from drf_yasg.renderers import SwaggerUIRenderer
+
+    dict_context = {'request': request}
+    SwaggerUIRenderer().set_context(dict_context, None)
+    dict_context['title'] = 'QuiEz API'
+    return HttpResponse(render_to_string(SwaggerUIRenderer.template, dict_context, request),
+                        content_type='text/html; charset=utf-8')
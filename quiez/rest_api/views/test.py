@@ -5,14 +5,33 @@ from rest_framework import status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.utils.decorators import method_decorator
 from django.utils.timezone import localtime
+from django.views.decorators.http import condition
 
 from ..serializers.test import TestPostSerializer, TestGetSerializer, TestGetConciseSerializer, \
     TestSubmissionPostSerializer, \
     TestResultOverviewGetSerializer, UserTestResultGetSerializer
+from ..serializers.lean import test_to_representation, tests_concise_to_representation
 from ..models.test import Test
 from ..models.test import TestSubmission as TestSubmissionModel
+from ..models.queue import QueuedSubmission
+from ..drafts import DraftError, get_draft, save_draft, finalize_draft
+from ..leaderboard import get_top, get_around
+from ..scores import SCORE_FIELDS, ensure_test_scores
+from ..purge import soft_delete_test
+from ..search import search_tests
+from ..tenancy import get_organization_id, get_tenant_cache, tenant_tests
+from ..shuffle import shuffle_test
+from ..statistics import get_test_statistics
+from ..submission_queue import enqueue_submission, is_queued, get_pending_number, wait_for_drain, get_status
+from ..submissions import ItemError, submit_batch, validate_submission
+from ..throttling import UserTokenBucketThrottle, TestTokenBucketThrottle
+from .conditional import get_test_stamp, is_test_shuffled_for, test_detail_cache_key, \
+    test_etag, test_last_modified, test_list_etag
 
 
 class TestListView(GenericAPIView):
@@ -35,6 +54,7 @@ class TestListView(GenericAPIView):
             return TestPostSerializer
         return None
 
+    @method_decorator(condition(etag_func=test_list_etag))
     def get(self, request):
         """
         Reads lists of all test instances.
@@ -42,40 +62,102 @@ class TestListView(GenericAPIView):
         set_user_submitted_tests_ids = set(TestSubmissionModel.objects \
                                            .filter(user_id=request.user.id) \
                                            .values_list("test_id", flat=True))
-        queryset_user_unsubmitted_tests = Test.objects.exclude(id__in=set_user_submitted_tests_ids)
-        serializer = TestGetConciseSerializer(queryset_user_unsubmitted_tests, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        queryset_user_unsubmitted_tests = tenant_tests(request).exclude(id__in=set_user_submitted_tests_ids)
+        return Response(tests_concise_to_representation(queryset_user_unsubmitted_tests), status=status.HTTP_200_OK)
 
     def post(self, request):
         """
         Creates test instance using passed JSON from request body.
         """
-        serializer = TestPostSerializer(data=request.data)
+        serializer = TestPostSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.validated_data['owner'] = request.user
+            serializer.validated_data['organization_id'] = get_organization_id(request)
             test = serializer.create(validated_data=serializer.validated_data)
             return Response({"id": test.id}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TestSearchView(APIView):
+    """
+    Test search view class.
+
+    get:
+    Search tests by name, description and questions.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    page_size_max = 100
+
+    def get(self, request):
+        """
+        Returns ranked page of tests matching query.
+        * ?q=<query>&page=<page number from 1>&page_size=<tests per page, 20 by default>.
+        """
+        str_query = request.query_params.get('q', '').strip()
+        if not str_query:
+            return Response({"detail": "Search query (q) is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            int_page = max(int(request.query_params.get('page', 1)), 1)
+            int_page_size = min(max(int(request.query_params.get('page_size', 20)), 1), self.page_size_max)
+        except ValueError:
+            return Response({"detail": "Page and page size must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        int_count, list_ids = search_tests(str_query, get_organization_id(request),
+                                           (int_page - 1) * int_page_size, int_page_size)
+        dict_tests = {dict_test['id']: dict_test
+                      for dict_test in tests_concise_to_representation(Test.objects.filter(id__in=list_ids))}
+        return Response({
+            "count": int_count,
+            "page": int_page,
+            "page_size": int_page_size,
+            "results": [dict_tests[test_id] for test_id in list_ids if test_id in dict_tests],
+        }, status=status.HTTP_200_OK)
+
+
 class TestDetailView(GenericAPIView):
     """
     Test view class.
 
     get:
     Read test instance by id.
+
+    delete:
+    Delete test instance by id.
     """
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     serializer_class = TestGetSerializer
 
+    @method_decorator(condition(etag_func=test_etag, last_modified_func=test_last_modified))
     def get(self, request, test_id: int):
         """
         Reads test instance by id.
+        * Rendered test is cached, shuffled test is ordered for participant over cached one.
+        """
+        dict_stamp = get_test_stamp(request, test_id)
+        if dict_stamp is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        str_cache_key = test_detail_cache_key(dict_stamp)
+        tenant_cache = get_tenant_cache(get_organization_id(request))
+        dict_test = tenant_cache.get(str_cache_key)
+        if dict_test is None:
+            dict_test = test_to_representation(get_object_or_404(tenant_tests(request), pk=test_id))
+            tenant_cache.set(str_cache_key, dict_test, None)
+        if is_test_shuffled_for(dict_stamp, request.user):
+            dict_test = shuffle_test(dict_test, test_id, request.user.id)
+        return Response(dict_test, status=status.HTTP_200_OK)
+
+    def delete(self, request, test_id: int):
         """
-        test = get_object_or_404(Test, pk=test_id)
-        serializer = TestGetSerializer(test)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        Deletes test instance by id.
+        * Test is soft-deleted at once, its submissions are removed in background by purge_deleted command.
+        """
+        test = get_object_or_404(tenant_tests(request), pk=test_id)
+        if test.owner_id != request.user.id:
+            return Response({"detail": "You are not owner of this test to delete it."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        soft_delete_test(test.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class TestSubmissionView(GenericAPIView):
@@ -87,16 +169,19 @@ class TestSubmissionView(GenericAPIView):
     """
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserTokenBucketThrottle, TestTokenBucketThrottle)
+    throttle_scope = 'test_submission'
     serializer_class = TestSubmissionPostSerializer
 
     def post(self, request, test_id):
         """
         Creates test submission instance using passed JSON from request body.
         """
-        test = get_object_or_404(Test, pk=test_id)
+        test = get_object_or_404(tenant_tests(request), pk=test_id)
         # if test has not been submitted yet
         if test.owner != request.user:
-            if not TestSubmissionModel.objects.filter(test__id=test.id, user__id=request.user.id):
+            if not TestSubmissionModel.objects.filter(test__id=test.id, user__id=request.user.id) and \
+                    not (settings.SUBMISSION_QUEUE_ENABLED and is_queued(test.id, request.user.id)):
                 # check if test is opened for submission
                 if test.date_open is None:
                     return Response({"detail": "Test is not open for submission."}, status=status.HTTP_400_BAD_REQUEST)
@@ -106,12 +191,15 @@ class TestSubmissionView(GenericAPIView):
                 # check if test is not closed for submission
                 if test.date_close is not None:
                     return Response({"detail": "Test is closed for submission."}, status=status.HTTP_410_GONE)
+                elif settings.SUBMISSION_QUEUE_ENABLED:
+                    return self._enqueue(request, test_id)
                 else:
                     request.data['test_id'] = test_id
                     request.data['user_id'] = request.user.id
                     serializer = TestSubmissionPostSerializer(data=request.data)
                     if serializer.is_valid():
-                        test_submission = serializer.create(validated_data=serializer.validated_data)
+                        with transaction.atomic():
+                            test_submission = serializer.create(validated_data=serializer.validated_data)
                         return Response({"id": test_submission.id}, status=status.HTTP_201_CREATED)
                     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             else:
@@ -119,6 +207,162 @@ class TestSubmissionView(GenericAPIView):
         else:
             return Response({"detail": "Owner can not submit his test."}, status=status.HTTP_400_BAD_REQUEST)
 
+    @staticmethod
+    def _enqueue(request, test_id):
+        """
+        Validates submission and appends it to write-behind queue.
+        * Returns 202 with token of queued submission (see SubmissionQueueStatusView).
+        """
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Test submission JSON is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            dict_data = validate_submission(dict(request.data, test_id=test_id), request.user)
+        except ItemError as error:
+            return Response(error.detail if isinstance(error.detail, dict) else {"detail": error.detail},
+                            status=error.int_status)
+        queued_submission = enqueue_submission(dict_data)
+        return Response({"token": str(queued_submission.token)}, status=status.HTTP_202_ACCEPTED)
+
+
+class SubmissionQueueStatusView(APIView):
+    """
+    Queued test submission status view class.
+
+    get:
+    Get status of queued test submission.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, token):
+        """
+        Returns status of queued test submission: pending, done (with submission id) or failed (with detail).
+        """
+        queued_submission = get_object_or_404(QueuedSubmission, token=token, user_id=request.user.id)
+        return Response(get_status(queued_submission), status=status.HTTP_200_OK)
+
+
+def _get_pending_response(test_id: int):
+    """
+    Waits for drain of queued test submissions (SUBMISSION_QUEUE_RESULT_WAIT seconds).
+
+    :param test_id: test id.
+    :return: 503 response if there are still pending submissions, otherwise None.
+    """
+    if not settings.SUBMISSION_QUEUE_ENABLED:
+        return None
+    int_pending = wait_for_drain(test_id, settings.SUBMISSION_QUEUE_RESULT_WAIT)
+    if not int_pending:
+        return None
+    response = Response({"detail": "Test submissions are being processed, retry later.",
+                         "pending_submissions_number": int_pending}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = '1'
+    return response
+
+
+class TestSubmissionBatchView(APIView):
+    """
+    Test submission batch sync view class.
+
+    post:
+    Submit several tests at once.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserTokenBucketThrottle,)
+    throttle_scope = 'test_submission_batch'
+
+    def post(self, request):
+        """
+        Submits tests from list of submissions JSON with test_id and idempotency_key.
+        * Response contains status of every item in request order: 201 - submitted, 200 - already submitted
+        with this key, 4xx - item is not submitted (detail contains reason).
+        """
+        if not isinstance(request.data, list) or not request.data:
+            return Response({"detail": "List of submissions is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > settings.SUBMISSION_BATCH_MAX_SIZE:
+            return Response({"detail": "Batch can contain at most {} submissions.".format(
+                settings.SUBMISSION_BATCH_MAX_SIZE)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            list_results = submit_batch(request.user, request.data, tenant_tests(request))
+        except IntegrityError:
+            return Response({"detail": "Submissions with these idempotency keys are being synced now, retry later."},
+                            status=status.HTTP_409_CONFLICT)
+        return Response(list_results, status=status.HTTP_207_MULTI_STATUS)
+
+
+class TestDraftView(APIView):
+    """
+    Test draft submission view class.
+
+    get:
+    Read saved draft answers.
+
+    patch:
+    Save answers of some questions to draft.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserTokenBucketThrottle,)
+    throttle_scope = 'test_draft'
+
+    def get(self, request, test_id):
+        """
+        Returns draft answers (latest saved answers of every question) in test submission format.
+        """
+        get_object_or_404(tenant_tests(request), pk=test_id)
+        return Response(get_draft(test_id, request.user.id), status=status.HTTP_200_OK)
+
+    def patch(self, request, test_id):
+        """
+        Saves answers of questions from passed JSON (questions and / or questions_feedback lists) to draft.
+        """
+        test = get_object_or_404(tenant_tests(request), pk=test_id)
+        if test.owner_id == request.user.id:
+            return Response({"detail": "Owner can not submit his test."}, status=status.HTTP_400_BAD_REQUEST)
+        if test.date_open is None:
+            return Response({"detail": "Test is not open for submission."}, status=status.HTTP_400_BAD_REQUEST)
+        if test.date_close is not None:
+            return Response({"detail": "Test is closed for submission."}, status=status.HTTP_410_GONE)
+        if TestSubmissionModel.objects.filter(test_id=test_id, user_id=request.user.id).exists():
+            return Response({"detail": "Test has been already submitted."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Questions or questions_feedback list is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            int_saved = save_draft(test_id, request.user.id, request.data)
+        except DraftError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"saved_questions_number": int_saved}, status=status.HTTP_200_OK)
+
+
+class TestDraftFinalizeView(APIView):
+    """
+    Test draft finalization view class.
+
+    post:
+    Submit draft as test submission.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserTokenBucketThrottle, TestTokenBucketThrottle)
+    throttle_scope = 'test_submission'
+
+    def post(self, request, test_id):
+        """
+        Validates draft and converts it to test submission with bulk inserts.
+        * Finalization is idempotent: repeated request returns id of already created submission.
+        """
+        get_object_or_404(tenant_tests(request), pk=test_id)
+        try:
+            dict_result = finalize_draft(test_id, request.user)
+        except IntegrityError:
+            return Response({"detail": "Draft is being finalized now, retry later."}, status=status.HTTP_409_CONFLICT)
+        if dict_result['status'] in (200, 201):
+            return Response({"id": dict_result['id']}, status=dict_result['status'])
+        detail = dict_result['detail']
+        return Response(detail if isinstance(detail, dict) else {"detail": detail}, status=dict_result['status'])
+
 
 class TestSubmissionOpenView(APIView):
     """
@@ -134,11 +378,10 @@ class TestSubmissionOpenView(APIView):
         """
         Opens test submission.
         """
-        test = get_object_or_404(Test, pk=test_id)
+        test = get_object_or_404(tenant_tests(request), pk=test_id)
         if test.owner == request.user:
-            if test.date_open is None:
-                test.date_open = localtime()
-                test.save()
+            # only date_open is written, scores and version are updated concurrently by submissions
+            if Test.objects.filter(id=test.id, date_open__isnull=True).update(date_open=localtime()):
                 return Response({"detail": "Test is ready for submission now."}, status=status.HTTP_200_OK)
             else:
                 return Response({"detail": "Test is already opened."}, status=status.HTTP_400_BAD_REQUEST)
@@ -161,17 +404,17 @@ class TestSubmissionCloseView(APIView):
         """
         Closes test submission.
         """
-        test = get_object_or_404(Test, pk=test_id)
+        test = get_object_or_404(tenant_tests(request), pk=test_id)
         if test.owner == request.user:
             if test.date_open is None:
                 return Response({"detail": "Test is not even opened to be closed."}, status=status.HTTP_400_BAD_REQUEST)
             else:
                 if TestSubmissionModel.objects\
                         .filter(test_id=test_id)\
-                        .exists():
-                    if test.date_close is None:
-                        test.date_close = localtime()
-                        test.save()
+                        .exists() or \
+                        (settings.SUBMISSION_QUEUE_ENABLED and get_pending_number(test_id)):
+                    # only date_close is written, scores and version are updated concurrently by submissions
+                    if Test.objects.filter(id=test.id, date_close__isnull=True).update(date_close=localtime()):
                         return Response({"detail": "Test submission is closed now."}, status=status.HTTP_200_OK)
                     else:
                         return Response({"detail": "Test is already closed."}, status=status.HTTP_400_BAD_REQUEST)
@@ -192,13 +435,17 @@ class TestResultOverviewView(GenericAPIView):
     """
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserTokenBucketThrottle, TestTokenBucketThrottle)
+    throttle_scope = 'test_result'
     serializer_class = TestResultOverviewGetSerializer
 
+    # overview changes with submissions, which change only test version (ETag), not dates (Last-Modified)
+    @method_decorator(condition(etag_func=test_etag))
     def get(self, request, test_id):
         """
         Returns test result overview.
         """
-        test = get_object_or_404(Test, pk=test_id)
+        test = get_object_or_404(tenant_tests(request), pk=test_id)
         # check if test is opened
         if test.date_open is None:
             return Response({"detail": "Test is not opened."}, status=status.HTTP_400_BAD_REQUEST)
@@ -206,10 +453,99 @@ class TestResultOverviewView(GenericAPIView):
         if test.date_close is None:
             return Response({"detail": "Test is not closed. You can not get result until it is closed."},
                             status=status.HTTP_400_BAD_REQUEST)
+        response_pending = _get_pending_response(test.id)
+        if response_pending is not None:
+            return response_pending
+        if settings.SUBMISSION_QUEUE_ENABLED:
+            # score distribution is updated by drained submissions
+            test.refresh_from_db(fields=SCORE_FIELDS)
         serializer = TestResultOverviewGetSerializer()
         return Response(serializer.to_representation(test), status=status.HTTP_200_OK)
 
 
+class TestResultStatisticsView(APIView):
+    """
+    Test result statistics view class.
+
+    get:
+    Get test questions difficulty and discrimination statistics.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserTokenBucketThrottle, TestTokenBucketThrottle)
+    throttle_scope = 'test_result'
+
+    def get(self, request, test_id):
+        """
+        Returns test item analysis statistics.
+        * Statistics of closed test never change, so they are cached until test version changes.
+        """
+        test = get_object_or_404(tenant_tests(request), pk=test_id)
+        # check if test is opened
+        if test.date_open is None:
+            return Response({"detail": "Test is not opened."}, status=status.HTTP_400_BAD_REQUEST)
+        # check if test is closed to get result
+        if test.date_close is None:
+            return Response({"detail": "Test is not closed. You can not get result until it is closed."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        response_pending = _get_pending_response(test.id)
+        if response_pending is not None:
+            return response_pending
+        test.refresh_from_db(fields=['version'])    # version is incremented by drained submissions
+        str_cache_key = 'test-statistics:{}:{}'.format(test.id, test.version)
+        tenant_cache = get_tenant_cache(get_organization_id(request))
+        dict_statistics = tenant_cache.get(str_cache_key)
+        if dict_statistics is None:
+            dict_statistics = get_test_statistics(test.id)
+            tenant_cache.set(str_cache_key, dict_statistics, None)
+        return Response(dict_statistics, status=status.HTTP_200_OK)
+
+
+class TestLeaderboardView(APIView):
+    """
+    Test leaderboard view class.
+
+    get:
+    Get top participants of test and rank of participant.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserTokenBucketThrottle, TestTokenBucketThrottle)
+    throttle_scope = 'test_leaderboard'
+    top_max = 100
+    around_number = 2   # entries before and after participant
+
+    def get(self, request, test_id):
+        """
+        Returns leaderboard of test.
+        * ?top=<number of top entries, 10 by default>&around=<user id, entries around participant>.
+        * Leaderboard is cached for LEADERBOARD_CACHE_SECONDS, so it may lag behind recent submissions.
+        """
+        try:
+            int_top = min(max(int(request.query_params.get('top', 10)), 1), self.top_max)
+            user_id = int(request.query_params['around']) if 'around' in request.query_params else None
+        except ValueError:
+            return Response({"detail": "Top and around must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        # test is read before cache, so leaderboard of deleted test is not served from cache
+        test = get_object_or_404(tenant_tests(request), pk=test_id)
+        # check if test is opened
+        if test.date_open is None:
+            return Response({"detail": "Test is not opened."}, status=status.HTTP_400_BAD_REQUEST)
+        str_cache_key = 'test-leaderboard:{}:{}:{}'.format(test_id, int_top, user_id)
+        tenant_cache = get_tenant_cache(get_organization_id(request))
+        dict_leaderboard = tenant_cache.get(str_cache_key)
+        if dict_leaderboard is None:
+            ensure_test_scores(test)
+            dict_leaderboard = {
+                "participants_number": test.participants_number,
+                "top": get_top(test.id, int_top),
+            }
+            if user_id is not None:
+                dict_leaderboard['around'] = get_around(test.id, user_id, self.around_number)
+            tenant_cache.set(str_cache_key, dict_leaderboard, settings.LEADERBOARD_CACHE_SECONDS)
+        return Response(dict_leaderboard, status=status.HTTP_200_OK)
+
+
 class UserTestResultView(GenericAPIView):
     """
     User test result view class.
@@ -225,7 +561,7 @@ class UserTestResultView(GenericAPIView):
         """
         Returns test result overview of particular user.
         """
-        test = get_object_or_404(Test, pk=test_id)
+        test = get_object_or_404(tenant_tests(request), pk=test_id)
         user = get_object_or_404(User, pk=user_id)
         # check if test is opened
         if test.date_open is None:
@@ -234,9 +570,16 @@ class UserTestResultView(GenericAPIView):
         if test.date_close is None:
             return Response({"detail": "Test is not closed. You can not get result until it is closed."},
                             status=status.HTTP_400_BAD_REQUEST)
+        response_pending = _get_pending_response(test.id)
+        if response_pending is not None:
+            return response_pending
         test_submission = TestSubmissionModel.objects.get(test__id=test.id, user__id=user_id)
         serializer = UserTestResultGetSerializer()
-        return Response(serializer.to_representation(test, test_submission), status=status.HTTP_200_OK)
+        json_test_result = serializer.to_representation(test, test_submission)
+        if test.shuffle:
+            # participant sees result in the same order as test was passed
+            json_test_result = shuffle_test(json_test_result, test.id, user_id)
+        return Response(json_test_result, status=status.HTTP_200_OK)
 
 
 class UserTestSubmissionListView(GenericAPIView):
@@ -261,6 +604,5 @@ class UserTestSubmissionListView(GenericAPIView):
         set_user_submitted_tests_ids = set(TestSubmissionModel.objects \
                                            .filter(user_id=user_id) \
                                            .values_list("test_id", flat=True))
-        queryset_user_submitted_tests = Test.objects.filter(id__in=set_user_submitted_tests_ids)
-        serializer = TestGetConciseSerializer(queryset_user_submitted_tests, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        queryset_user_submitted_tests = tenant_tests(request).filter(id__in=set_user_submitted_tests_ids)
+        return Response(tests_concise_to_representation(queryset_user_submitted_tests), status=status.HTTP_200_OK)